@@ -9,13 +9,31 @@ from bgpy.__QuantLib import *
 from bgpy.QL.bgdate import toDate, dateTuple, dateFirstOfMonth, toPyDate
 from bgpy.QL.tenor import Tenor
 
-from bgpy.QL.bonds import SimpleBond, Call
+from bgpy.QL.bonds import SimpleBond, Call, CalcCache, rollSettlement
 from bgpy.QL.munibonds import MuniBond
 from bgpy.QL.ustbonds import USTBond, USTBill
 from bgpy.QL.assetswap import AssetSwap
 
 from bgpy.QL.irswaps import USDLiborSwap, USDLiborSwaption
 
-from bgpy.QL.termstructure import SimpleCurve, SpreadedCurve, ZCurve
+from bgpy.QL.termstructure import SimpleCurve, SpreadedCurve, ZCurve, KeyRateCurve
 from bgpy.QL.ratiotermstructure import RatioCurve
 
+from bgpy.QL.oasrunner import solveSpreads
+from bgpy.QL.keyrates import keyRateDV01s
+from bgpy.QL.warmstart import WarmStart
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    # vectorized bond math requires numpy
+    from bgpy.QL.bondarrays import calcArray, bondArrays, priceBonds, yieldBonds
+    from bgpy.QL.bondtable import BondTable
+    from bgpy.QL.horizon import horizon, rollDownYields
+    from bgpy.QL.curvepricing import curvePrices, zSpreads
+    from bgpy.QL.lattice import ShortRateLattice, latticeCallValues
+    from bgpy.QL.swapbook import SwapBook
@@ -7,14 +7,25 @@ Support option adjusted calculations
 import bgpy.__QuantLib as ql
 
 from bgpy.QL.bgdate import toDate
+from bgpy.QL.tenor import Tenor
 from bgpy.QL.bonds import SimpleBond
 from bgpy.dpatterns import Struct
-from bgpy.math import Secant, SolverExceptions
-from bgpy.QL.termstructure import SpreadedCurve
+from bgpy.math import Hybrid, SolverExceptions, SolverStats
+from bgpy.QL.termstructure import SpreadedCurve, TermStructureModel
 from bgpy.QL.irswaps import USDLiborSwap, USDLiborSwaption, BasisSwap
 
+from collections import OrderedDict
 from math import floor, fmod
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    # numpy call lattice, see setLattice
+    from bgpy.QL.lattice import latticeCallValues
+
 class BondValues(Struct):
     alist = ['bondyield', 'price',
               'oasYield', 'callvalue', 'oasPrice', 
@@ -35,6 +46,7 @@ class AssetSwap(object):
     
     def __init__(self, bond, termstructure=None, spread=0.0, ratio=1.0):
         
+        self.bond = bond
         self.calllist = bond.calllist
         self.coupon = bond.coupon
         self.maturity = bond.maturity
@@ -50,6 +62,22 @@ class AssetSwap(object):
         self.spreadType = {"S": self.aswValue,
                            "O": self.oasValue}
         
+        # convergence statistics from the last solveSpread/solveImpliedVol
+        self.solverStats = None
+        
+        # call option lattice, see setLattice
+        self.timeSteps = 50
+        self.latticeTol = None
+        self.richardson = False
+        self.nativeLattice = False
+        self.latticeAccuracy = None
+        
+        # swaps, swaptions and oas curves kept alive between valuations
+        self.instruments_ = OrderedDict()
+        self.maxInstruments = self.MAX_INSTRUMENTS
+        self.callRates_ = {}
+        self.callFlows_ = {}
+        
         if termstructure:
             self.update(termstructure, spread, ratio)
     
@@ -70,72 +98,316 @@ class AssetSwap(object):
         
         Does not work for zero coupon callable bonds
         Does not work for non par calls if ratio != 1.0
+        
+        Both come from the instrument cache (instrument_), as in valuation.
         '''     
         assetSwapSettle = termstructure.referenceDate()
         self.assetSwapCoupon = self.coupon / ratio   
         self.assetSwapRatio = ratio
-        self.baseswap = USDLiborSwap(termstructure, 
+        build = lambda: USDLiborSwap(termstructure, 
                                      assetSwapSettle, 
                                      self.maturity, 
                                      self.assetSwapCoupon, 
                                      PayFlag=1, 
                                      spread=spread_,
                                      notionalAmount = 100.0)
+        self.baseswap = self.instrument_('asw', termstructure, build,
+                                         (self.assetSwapCoupon, spread_))
         
-        self.swaption = None
-        if self.calllist:
-            firstcall, callprice, callbond = self.calllist[0]
-                        
+        # None if not callable or called within 30 days of maturity
+        self.swaption = self.callSwaption(termstructure, spread_, ratio)
+        
+        return (self.baseswap, self.swaption)
+        
+    MAX_INSTRUMENTS = 16
+    
+    # per curve: oas curve, base swap and call swaption
+    INSTRUMENTS_PER_CURVE = 3
+    
+    def reserveInstruments(self, ncurves):
+        '''keep instruments for at least ncurves curves'''
+        self.maxInstruments = max(self.maxInstruments, 
+                                  self.INSTRUMENTS_PER_CURVE * ncurves)
+        return self.maxInstruments
+    
+    def instrument_(self, kind, termstructure, build, params=None):
+        '''
+        Cached instrument of kind for termstructure, built by build() 
+        if missing or if params have changed.  
+        Keyed by curve identity and reference date, so curve updates that 
+        relink the same curve object reuse the instrument.
+        '''
+        key = (kind, id(termstructure), 
+               termstructure.referenceDate().serialNumber())
+               
+        cached = self.instruments_.pop(key, None)
+        if cached is None or cached[2] != params:
+            cached = (termstructure, build(), params)
+        
+        self.instruments_[key] = cached
+        while len(self.instruments_) > self.maxInstruments:
+            self.instruments_.popitem(last=False)
+            
+        return cached[1]
+    
+    def clearInstruments(self):
+        self.instruments_.clear()
+        self.callRates_.clear()
+        self.callFlows_.clear()
+        
+    def baseValue(self, termstructure, spread_=0.0, ratio=1.0):
+        '''
+        Value of the base swap paying coupon/ratio versus libor + spread_.
+        
+        The swap is built once per curve at the bond coupon and zero spread;
+        the fixed leg scales with 1/ratio and the floating leg is linear in
+        the spread, so new spreads and ratios cost only an NPV 
+        recalculation.
+        '''
+        refdate = termstructure.referenceDate()
+        build = lambda: USDLiborSwap(termstructure, refdate, self.maturity,
+                                     self.coupon, PayFlag=1, spread=0.0,
+                                     notionalAmount=100.0, 
+                                     setPriceEngine=True)
+        self.baseswap = self.instrument_('base', termstructure, build)
+        
+        swap = self.baseswap.swap
+        fixedvalue = swap.fixedLegBPS() * 1e4 * self.coupon
+        
+        return (fixedvalue / ratio + (swap.NPV() - fixedvalue) + 
+                swap.floatingLegBPS() * 1e4 * spread_)
+    
+    def callCouponRate(self, ratio=1.0):
+        '''
+        Fixed rate of the swaption replicating the call feature: the 
+        asset swap coupon, or its yield to first call for premium calls.
+        None if not callable (or first call within 30 days of maturity).
+        '''
+        if not self.calllist:
+            return None
+            
+        firstcall, callprice, callterm = self.calllist[0]
+        
+        # assuming 30days call notice as a minimum
+        if ql.Thirty360().dayCount(firstcall, self.maturity) < 30:
+            return None
+            
+        assetSwapCoupon = self.coupon / ratio
+        callCpnRate = self.callRates_.get(ratio, None)
+        if callCpnRate is None:
             if callprice > 100.0:
-                callCpnRate = SimpleBond(self.assetSwapCoupon, 
-                                   self.maturity, 
-                                   settledate=firstcall).toYTM(callprice)
+                callCpnRate = SimpleBond(assetSwapCoupon, 
+                                         self.maturity, 
+                                         settledate=firstcall).toYTM(callprice)
             else:
-                callCpnRate = self.assetSwapCoupon
+                callCpnRate = assetSwapCoupon
+            self.callRates_[ratio] = callCpnRate
             
-            # assuming 30days call notice as a minimum
-            if ql.Thirty360().dayCount(firstcall, self.maturity) >= 30:
-                self.swaption = USDLiborSwaption(termstructure, 
-                                                 firstcall, 
-                                                 self.maturity, 
-                                                 callCpnRate, 
-                                                 PayFlag=0, 
-                                                 spread=spread_,
-                                                 bermudan=True,
-                                                 notionalAmount = 100.0)
+        return callCpnRate
         
-        return (self.baseswap, self.swaption)
+    def callFlows(self, ratio=1.0, notional=100.0):
+        '''
+        Flows of the swaption replicating the call, as built by 
+        USDLiborSwaption, without building it: 
+            (exercise dates, [(pay date, fixed amount)], 
+             [(floating accrual start, end)])
+        the fixed leg including notional at the end of the swap.  
+        None if not callable.
+        '''
+        key = (ratio, notional)
+        if key in self.callFlows_:
+            return self.callFlows_[key]
+            
+        rate = self.callCouponRate(ratio)
+        if rate is None:
+            return None
+    
+        firstcall, maturity = self.calllist[0][0], self.maturity
+        swap = USDLiborSwap
+        calendar = swap.calendar
+        
+        def dates_(period, end, convention):
+            dates, n = [firstcall], 1
+            while True:
+                dt = calendar.advance(firstcall, period.length() * n, 
+                                      period.units(), ql.Unadjusted)
+                if dt >= end:
+                    break
+                dates.append(dt)
+                n += 1
+            dates.append(end)
+            return [calendar.adjust(d, convention) for d in dates]
+            
+        fixed = dates_(swap.fixedLegPeriod, maturity, swap.fixedLegAdjustment)
+        dc = swap.fixedLegDayCounter
+        flows = [(d1, notional * rate * dc.yearFraction(d0, d1))
+                 for d0, d1 in zip(fixed[:-1], fixed[1:])]
+        
+        floating = dates_(swap.floatingLegPeriod, maturity, 
+                          swap.floatingLegAdjustment)
+        floating = list(zip(floating[:-1], floating[1:]))
+        
+        # swap maturity is the later of the two legs' ends
+        swapend = max(fixed[-1], floating[-1][1])
+        flows.append((swapend, notional))
+    
+        # annual call schedule, USDLiborSwaption's default
+        period = ql.Period(ql.Annual)
+        lastcall = Tenor(period).advance(swapend, reverse=True)
+        if ql.Thirty360().dayCount(firstcall, lastcall) > 0:
+            exercise = dates_(period, lastcall, ql.Unadjusted)
+        else:
+            exercise = [firstcall]
+            
+        self.callFlows_[key] = (exercise, flows, floating)
+        return self.callFlows_[key]
         
-    def oasValue(self, termstructure, spread_, ratio_=1.0, vol=1e-7, 
-                       model=ql.BlackKarasinski, solver=False):
+    def intrinsicCallValue(self, termstructure, spread_=0.0, ratio=1.0):
         '''
-        Calculate Asset Swap premium value given OAS spread
+        Zero vol value of the call swaption: rates follow the forward 
+        curve, so the call is worth the best of exercising into the 
+        remaining swap on each call date, valued on the curve, or zero.
+        None if not callable.
+        '''
+        flows = self.callFlows(ratio)
+        if flows is None:
+            return None
+            
+        exercise, fixed, floating = flows
+        discount = termstructure.curve.discount
+        refdate = termstructure.curve.referenceDate()
+        dc = USDLiborSwap.floatingLegDayCounter
+        notional = fixed[-1][1]
+        
+        value_ = 0.0
+        for exdate in exercise:
+            if exdate < refdate:
+                continue
+            
+            # receive fixed after exdate, pay libor + spread_ from exdate;
+            # as in QuantLib's tree, the floating leg starts on exdate
+            swap = sum([a * discount(d, True) for d, a in fixed 
+                        if d > exdate])
+            swap -= notional * discount(exdate, True)
+            if spread_:
+                periods = [p for p in floating if p[0] >= exdate]
+                periods[:1] = [(exdate, p[1]) for p in periods[:1]]
+                swap -= notional * spread_ * sum([dc.yearFraction(d0, d1) * 
+                                                  discount(d1, True)
+                                                  for d0, d1 in periods])
+            value_ = max(value_, swap)
+            
+        return value_
         
+    def callSwaption(self, termstructure, spread_=0.0, ratio=1.0):
         '''
+        Swaption replicating the call feature, None if not callable.
+        Kept per curve and rebuilt only when the call coupon rate (which 
+        depends on ratio) changes; a new spread_ replaces just the 
+        underlying swap (USDLiborSwaption.setSpread).
+        '''
+        callCpnRate = self.callCouponRate(ratio)
+        if callCpnRate is None:
+            return None
+            
+        firstcall = self.calllist[0][0]
+        build = lambda: USDLiborSwaption(termstructure, 
+                                         firstcall, 
+                                         self.maturity, 
+                                         callCpnRate, 
+                                         PayFlag=0, 
+                                         spread=spread_,
+                                         bermudan=True,
+                                         notionalAmount = 100.0)
+        self.swaption = self.instrument_('call', termstructure, build, 
+                                         callCpnRate)
+        return self.swaption.setSpread(spread_)
+        
+    def setLattice(self, timeSteps=50, tol=None, richardson=False, 
+                   native=False):
+        '''
+        Lattice used to value the call option.
+        
+        timeSteps:   fixed number of steps; None sizes the lattice from 
+                     maturity and call frequency (adaptiveSteps)
+        tol:         if set, steps are doubled until two lattices agree 
+                     within tol (USDLiborSwaption.convergedValue); the 
+                     accuracy reached is kept in latticeAccuracy
+        richardson:  extrapolate the converged pair of values
+        native:      value the call on the numpy lattice instead 
+                     (lattice.latticeCallValues, ShortRateLattice's steps 
+                     a year); timeSteps, tol and richardson are unused
+        '''
+        errstr = "setLattice(): native lattice requires numpy"
+        assert not native or numpy is not None, errstr
+        
+        self.timeSteps = timeSteps
+        self.latticeTol = tol
+        self.richardson = richardson
+        self.nativeLattice = native
+        self.latticeAccuracy = None
+        return self
+        
+    # vols at or below ZERO_VOL, the 1e-7 'no vol' default included, value
+    # the call by intrinsicCallValue; also solveImpliedVol's bracket floor
+    ZERO_VOL = 1e-7
+    
+    def callValue_(self, termstructure, spread_, ratio, vol, model):
+        '''call swaption value per 100, None if not callable'''
+        if vol <= self.ZERO_VOL:
+            return self.intrinsicCallValue(termstructure, spread_, ratio)
+            
+        if self.nativeLattice:
+            if self.callFlows(ratio) is None:
+                return None
+            return float(latticeCallValues(termstructure, [self], vol, ratio,
+                                           spread_, model=model)[0])
+            
+        swaption = self.callSwaption(termstructure, spread_, ratio)
+        if not swaption:
+            return None
+            
+        if self.latticeTol:
+            value_ = swaption.convergedValue(vol, termstructure, model, 
+                                             self.timeSteps, 
+                                             self.latticeTol, 
+                                             self.richardson)
+            self.latticeAccuracy = swaption.accuracy
+            return value_
+            
+        steps = self.timeSteps
+        if not steps:
+            steps = swaption.adaptiveSteps(termstructure)
+        return swaption.value(vol, termstructure, model, steps)
         
-        if (not solver) or not getattr(self, "oasCurve", None):
-            self.oasCurve = SpreadedCurve(termstructure, type="Z")
+    def spreadedCurve(self, termstructure):
+        '''Z-spreaded curve over termstructure, kept between valuations'''
+        build = lambda: SpreadedCurve(termstructure, type="Z")
+        return self.instrument_('oas', termstructure, build)
         
-        # make sure swaps used to model underlying bond are setup
-        # self.baseswap & self.swaption
-        self.update(self.oasCurve, 0.0, ratio_) 
+    def oasValue(self, termstructure, spread_, ratio_=1.0, vol=1e-7, 
+                       model=ql.BlackKarasinski, solver=False):
+        '''
+        Calculate Asset Swap premium value given OAS spread
         
+        The swaps are built once on a spreaded curve; the spread is set 
+        through the curve's quote.  solver is accepted for compatibility 
+        and ignored.
+        '''
+        self.oasCurve = self.spreadedCurve(termstructure)
         self.oasCurve.spread = spread_
         
-        self.basevalue = self.baseswap.value(self.oasCurve)
+        self.assetSwapCoupon = self.coupon / ratio_
+        self.assetSwapRatio = ratio_
+        
+        self.basevalue = self.baseValue(self.oasCurve, 0.0, ratio_)
         prm = self.basevalue * ratio_
         
-        if self.swaption:
-            self.callvalue = self.swaption.value(vol, 
-            									 self.oasCurve, 
-                                                 model=model) * ratio_
+        callvalue = self.callValue_(self.oasCurve, 0.0, ratio_, vol, model)
+        if callvalue is not None:
+            self.callvalue = callvalue * ratio_
             prm += self.callvalue
         
-        if not solver:
-            self.baseswap = None
-            self.swaption = None
-            self.oasCurve = None
-        
         return 100.-prm 
 
     def aswValue(self, termstructure, spread_, ratio_ = 1.0,
@@ -144,33 +416,33 @@ class AssetSwap(object):
         Calculate asset swap premium, given spread and termstructure.
         Assumes termstructure object is derived from TermStructureModel class,
         or QuantLib YieldTermStructureHandle.
-        
+        solver is accepted for compatibility and ignored.
         '''
-        self.update(termstructure, spread_, ratio_)
+        self.assetSwapCoupon = self.coupon / ratio_
+        self.assetSwapRatio = ratio_
         
-        self.basevalue = self.baseswap.value(termstructure) 
+        self.basevalue = self.baseValue(termstructure, spread_, ratio_)
         prm = self.basevalue * ratio_
         
-        if self.swaption:
-            self.callvalue = self.swaption.value(vol, 
-                                                 termstructure, 
-                                                 model=model) * ratio_
+        callvalue = self.callValue_(termstructure, spread_, ratio_, vol, 
+                                    model)
+        if callvalue is not None:
+            self.callvalue = callvalue * ratio_
             prm += self.callvalue
 
-        if not solver:
-            self.baseswap = None
-            self.swaption = None
-            self.oasCurve = None
-            
         return 100. - prm 
                 
+    # lattice values resolve to about 1e-8: solves stop on 1e-9 steps
+    SOLVER_XTOL = 1e-9
+    
     def solveSpread(self, termstructure, price, vol=1e-7, 
                           baseSpread = 0.0,
                           baseRatio = 1.0,
                           solveRatio = False,
                           spreadType = "S",
                           model=ql.BlackKarasinski,
-                          calc_risk = True):
+                          calc_risk = True,
+                          guess = None):
         '''
         Calculate asset swap spread or ratio given price.
         
@@ -178,6 +450,9 @@ class AssetSwap(object):
             "S" for asset swap
             "O" for oas 
         
+        guess:  starting spread (or ratio, if solveRatio), e.g. yesterday's 
+                solution; see WarmStart
+        
         returns BondValues Object (repr = '<price, yield>')
         
         '''
@@ -189,21 +464,30 @@ class AssetSwap(object):
         
         if not solveRatio:
             valueFunc = lambda x_: spreadFunc(termstructure, baseSpread+x_, 
-                                              baseRatio, vol, model=model,
-                                              solver=True)
-            x_ = 0.0
-            x1 = bondYTM - self.fairSwapRate(termstructure)
+                                              baseRatio, vol, model=model)
+            if guess is None:
+                x_ = 0.0
+                x1 = bondYTM - self.fairSwapRate(termstructure)
+            else:
+                x_ = guess - baseSpread
+                x1 = x_ + 0.0001
                 
         else:
             valueFunc = lambda x_: spreadFunc(termstructure, baseSpread, 
                                               x_, vol,
-                                              model=model,
-                                              solver=True)
-            x_ = 1.0
-            x1 = bondYTM / self.fairSwapRate(termstructure)
+                                              model=model)
+            if guess is None:
+                x_ = 1.0
+                x1 = bondYTM / self.fairSwapRate(termstructure)
+            else:
+                x_ = guess
+                x1 = guess + .005
         
-        # Objective function is well-behaved, so secant search is sufficient.
-        value_ = Secant(x_, x1, valueFunc, objValue)
+        # Objective function is well-behaved, so secant steps do the work;
+        # the hybrid solver safeguards them once the root is bracketed.
+        self.solverStats = SolverStats()
+        value_ = Hybrid(x_, x1, valueFunc, objValue, xtol=self.SOLVER_XTOL,
+                        stats=self.solverStats)
         
         if solveRatio:
             ratio, spread = value_, baseSpread
@@ -223,11 +507,13 @@ class AssetSwap(object):
                               ratio = 1.0,
                               spreadType = "S",
                               model=ql.BlackKarasinski,
-                              calc_risk = True):
+                              calc_risk = True,
+                              guess = None):
         '''
         Calculate implied vol on asset swap.
         
         Enforces bound of 0.0% to 1000% on vol
+        guess:  starting vol, e.g. yesterday's solution; see WarmStart
         '''
         spreadFunc = self.spreadType.get(spreadType, self.aswValue)
             
@@ -236,19 +522,27 @@ class AssetSwap(object):
         # set objective value, value function and initial values
         objValue = price
         valueFunc = lambda x_: spreadFunc(termstructure, spread, ratio, 
-                                          x_, model=model, solver=True)
+                                          x_, model=model)
         
         # price can't be greater that 'zero' vol price or less than MAXVOL price
         # let's assume vol <= 1000%
-        if price > valueFunc(1e-7) or not self.calllist: 
-            vol_ = 1e-7
-        elif price < valueFunc(10.0):
-            print("max vol price")
-            vol_ = 10.
-        else:    
-            x_ = 0.09
-            x1 = 0.10
-            vol_ = Secant(x_, x1, valueFunc, objValue)
+        self.solverStats = SolverStats()
+        minvolValue = valueFunc(self.ZERO_VOL)
+        if price > minvolValue or not self.calllist: 
+            vol_ = self.ZERO_VOL
+        else:
+            maxvolValue = valueFunc(10.0)
+            if price < maxvolValue:
+                print("max vol price")
+                vol_ = 10.
+            else:    
+                x_ = min(max(guess, .001), 9.9) if guess else 0.09
+                x1 = x_ + (.005 if guess else .01)
+                vol_ = Hybrid(x_, x1, valueFunc, objValue, 
+                              bracket=(self.ZERO_VOL, 10.0),
+                              bracketValues=(minvolValue, maxvolValue),
+                              xtol=self.SOLVER_XTOL,
+                              stats=self.solverStats)
         
         retval = self.value(termstructure, spread, ratio, vol_, spreadType, model,
                             calc_risk)
@@ -296,6 +590,31 @@ class AssetSwap(object):
         hedgeratio = dv01 / -swapdv01
 
         return (hedgeratio, dv01, swapdv01) 
+    
+    def keyrate_dv01(self, termstructure, spread, ratio, vol, 
+                           model=ql.BlackKarasinski, 
+                           valueFunc=None,
+                           tenors=TermStructureModel.KEYRATE_TENORS,
+                           shock=0.0001):
+        '''
+        dv01 per key rate tenor, revalued on the termstructure's shared 
+        key rate curves.  The instrument cache is sized to hold the key 
+        rate curves, with the base and parallel shift curves, so repeated 
+        passes reuse every instrument.
+        '''
+        if not valueFunc:
+            valueFunc = self.oasValue
+        
+        self.reserveInstruments(2 * len(tenors) + 3)
+            
+        scale = 0.0001 / (2.0 * shock)
+        dv01s = []
+        for crv_up, crv_dn in termstructure.keyRateCurves(tenors, shock):
+            p0 = valueFunc(crv_up, spread, ratio, vol, model)
+            p1 = valueFunc(crv_dn, spread, ratio, vol, model)
+            dv01s.append((p0-p1) * scale)
+            
+        return dv01s
         
     def spread_dv01(self, termstructure, spread, ratio, vol, 
                     model, valueFunc=None):
@@ -327,6 +646,81 @@ class AssetSwap(object):
         
         return (p0-p1) / 2.0
 
+    RISK_GREEKS = ('dv01', 'spreaddv01', 'ratiodv01', 'vega')
+    
+    # smallest vol given a central vega bump, of half the vol
+    VEGA_MIN_VOL = .0002
+    
+    def riskReport(self, termstructure, spread=0.0, ratio=1.0, vol=1e-7,
+                         spreadType="S", 
+                         model=ql.BlackKarasinski,
+                         greeks=RISK_GREEKS):
+        '''
+        Value and greeks in one pass: curve hedge (as hedge_risk), 
+        spread_dv01, dvRatio and vega.  greeks selects the bump pairs 
+        valued, of RISK_GREEKS ('dv01' gives dv01, swapdv01 and 
+        hedgeratio); the others are None.
+        
+        Bumps on the same curve share this AssetSwap's swaps, spreaded curve
+        and, on the native lattice, the curve's short-rate lattice; the 
+        shifted curves are the termstructure's shared scenarios.  Bumps run in turn: QuantLib 
+        calls hold the GIL, so a thread pool would not run them in 
+        parallel, and the cached instruments are not safe to share 
+        between threads.
+        
+        Vega is per 1% vol; the vol bump is half the vol for vols under 
+        2%, and never under 1bp: below VEGA_MIN_VOL (2bp) vega is the 
+        forward difference of two lattice values, one and two bp of vol 
+        up, so lattice round-off is not scaled up by a tiny bump and both 
+        bumps stay clear of ZERO_VOL.
+        
+        returns Struct: price, callvalue, dv01, swapdv01, hedgeratio, 
+                        spreaddv01, ratiodv01, vega
+        '''
+        valueFunc = self.spreadType.get(spreadType, self.aswValue)
+        
+        def values_(crv, spread_, ratio_, vol_):
+            self.callvalue = 0.0
+            p = valueFunc(crv, spread_, ratio_, vol_, model)
+            return (p, self.basevalue, self.callvalue)
+        
+        def diff(up, dn):
+            return (values_(*up)[0] - values_(*dn)[0]) / 2.0
+        
+        ts = termstructure
+        price, basevalue, callvalue = values_(ts, spread, ratio, vol)
+        report = dict.fromkeys(('dv01', 'swapdv01', 'hedgeratio', 
+                                'spreaddv01', 'ratiodv01', 'vega'))
+        report.update({'price': price, 'callvalue': callvalue})
+        
+        if 'dv01' in greeks:
+            up = values_(ts.shift_up, spread, ratio, vol)
+            dn = values_(ts.shift_dn, spread, ratio, vol)
+            dv01, swapdv01 = (up[0] - dn[0]) / 2.0, (up[1] - dn[1]) / 2.0
+            report.update({'dv01': dv01,
+                           'swapdv01': swapdv01,
+                           'hedgeratio': dv01 / -swapdv01 if swapdv01 
+                                         else None})
+        if 'spreaddv01' in greeks:
+            report['spreaddv01'] = diff((ts, spread-0.0001, ratio, vol), 
+                                        (ts, spread+0.0001, ratio, vol))
+        if 'ratiodv01' in greeks:
+            report['ratiodv01'] = diff((ts, spread, ratio-.01, vol), 
+                                       (ts, spread, ratio+.01, vol))
+        if 'vega' in greeks:
+            if vol >= self.VEGA_MIN_VOL:
+                dvol = min(.01, vol / 2.0)
+                vols = (vol - dvol, vol + dvol)
+            else:
+                dvol = .0001 / 2.0
+                vols = (vol + 2 * dvol, vol + 4 * dvol)
+            report['vega'] = diff((ts, spread, ratio, vols[0]), 
+                                  (ts, spread, ratio, vols[1])) * .01 / dvol
+        
+        self.baseswap = None
+        self.swaption = None
+        self.oasCurve = None
+        return Struct(report)
         
     def value(self, termstructure,
                     spread = 0.0,
@@ -337,19 +731,23 @@ class AssetSwap(object):
                     calc_risk=False):
         '''
         Calculates termstructure / asset swap values -- sets "values" property.
+        With calc_risk, the curve hedge comes from riskReport.
         '''
-        valueFunc = self.spreadType.get(spreadType, self.aswValue)
-
-        value_ = valueFunc(termstructure, spread, ratio, vol, 
-                           model=model, solver=True)
-
-        risk = self.hedge_risk(termstructure, spread, ratio, vol, 
-                                model, valueFunc) if calc_risk else None
-        hedge, dv01, swapdv01 = risk if risk else (None, None, None)
+        if calc_risk:
+            report = self.riskReport(termstructure, spread, ratio, vol, 
+                                     spreadType, model, greeks=('dv01',))
+            value_, callvalue = report.price, report.callvalue
+            hedge, dv01, swapdv01 = (report.hedgeratio, report.dv01, 
+                                     report.swapdv01)
+        else:
+            valueFunc = self.spreadType.get(spreadType, self.aswValue)
+            value_ = valueFunc(termstructure, spread, ratio, vol, model=model)
+            callvalue = getattr(self, "callvalue", 0.0)
+            hedge, dv01, swapdv01 = (None, None, None)
                 
         dvalues = self.calc(bondprice=value_, dict_out=True)
         
-        dvalues['callvalue'] = getattr(self, "callvalue", 0.0)
+        dvalues['callvalue'] = callvalue
         dvalues['oasPrice'] = value_ + dvalues['callvalue']
         dvalues['oasYield'] = self.toYTM(dvalues['oasPrice'])
         dvalues['spreadType'] = spreadType
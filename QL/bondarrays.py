@@ -0,0 +1,185 @@
+'''
+Vectorized bond math for portfolios.
+
+Same street-convention price/yield formula as SimpleBond.ytmToPrice and
+SimpleBond.toYTM, evaluated over arrays of bonds in one pass.
+
+Requires numpy (not available under IronPython).
+
+Example:
+> terms = bondArrays(bonds)
+> calcArray(bondyield=yields, **terms)['price']
+
+'''
+import numpy as np
+
+import bgpy.__QuantLib as ql
+
+from bgpy.math.solvers import SolverExceptions
+
+def _floats(*args):
+    return np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in args])
+
+def aiArray(coupon, frac, frequency=2):
+    '''accrued interest, per 1.0 face, as SimpleBond.ai'''
+    coupon, frac, frequency = _floats(coupon, frac, frequency)
+
+    return np.where(frac == 0.0, 0.0, (1. - frac) * coupon / frequency)
+
+def ytmToPriceArray(coupon, nper, frac, yld, redemption=100., frequency=2):
+    '''
+    Price given yield to the redemption date described by nper, frac.
+    Matches SimpleBond.ytmToPrice, including rounding to 6 places and
+    price of 100.0 when yield equals coupon.
+
+    '''
+    coupon, nper, frac, yld, redemption, frequency = _floats(coupon, nper,
+                                                             frac, yld,
+                                                             redemption,
+                                                             frequency)
+    cpn = coupon / frequency
+    y = yld / frequency
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u = cpn / y
+        z = 1. / (1. + y)**nper
+        t = 1. / (1. + y)**frac
+
+    nxtcpn = np.where(frac == 0.0, 0.0, cpn)
+    ai = aiArray(coupon, frac, frequency)
+
+    prc = (t*(u*(1.0-z) + z*redemption/100.0 + nxtcpn) - ai)*100.0
+
+    return np.where(yld == coupon, 100.0, np.round(prc, 6))
+
+def toYTMArray(price, coupon, nper, frac, redemption=100., frequency=2,
+               oid=None):
+    '''
+    Yield to the redemption date described by nper, frac, given price.
+
+    Runs the same secant iteration, from the same initial values, as
+    SimpleBond.toYTM for every bond at once; bonds drop out of the
+    iteration as they converge.
+
+    oid may be None, or an array with nan where a bond has no oid.
+    '''
+    MAXITER = SolverExceptions.MAX_ITERATIONS
+    MINVAL = SolverExceptions.MIN_VALUE
+
+    if oid is None:
+        oid = np.nan
+
+    price, coupon, nper, frac, redemption, frequency, oid = _floats(
+                    price, coupon, nper, frac, redemption, frequency, oid)
+    shape_ = price.shape
+    price, coupon, nper, frac, redemption, frequency, oid = [
+                    np.ravel(a) for a in (price, coupon, nper, frac,
+                                          redemption, frequency, oid)]
+
+    # initial values, as in SimpleBond.toYTM
+    has_oid = ~np.isnan(oid) & (oid != 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x0 = np.where(coupon > 0.0, coupon, np.where(has_oid, oid, .05))
+        x1 = np.where(coupon > 0.0, 100. * coupon / price,
+                      np.where(has_oid, 100. * oid / price, .04))
+
+    x1 = np.where(np.abs(x1 - x0) <= MINVAL, x0 + 0.001, x1)
+
+    pricer = lambda y, n: ytmToPriceArray(coupon[n], nper[n], frac[n], y,
+                                          redemption[n], frequency[n])
+
+    allbonds = np.arange(price.size)
+    v_ = pricer(x0, allbonds)
+
+    v_diff = np.zeros(price.shape)
+    delta = np.ones(price.shape)
+
+    # at par, yield is the coupon--no search needed
+    active = np.abs(price - 100.0) >= 1e-7
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for ictr in range(MAXITER):
+            n = allbonds[active]
+            if not n.size:
+                break
+
+            x1[n] = x1[n] - v_diff[n] / delta[n]
+            v1 = pricer(x1[n], n)
+            v_diff[n] = v1 - price[n]
+            delta[n] = (v1 - v_[n]) / (x1[n] - x0[n])
+            x0[n], v_[n] = x1[n], v1
+
+            active[n] = ((np.abs(v_diff[n]) > MINVAL) &
+                         (np.abs(delta[n]) > MINVAL))
+
+    ytm = np.where(np.abs(price - 100.0) < 1e-7, coupon, x1)
+    return ytm.reshape(shape_)
+
+def calcArray(coupon, nper, frac, redemption=100.,
+              bondyield=None, bondprice=None,
+              frequency=2, oid=None):
+    '''
+    Vectorized price/yield to maturity calculation.
+    Exactly one of bondyield, bondprice must be given.
+
+    returns {'bondyield': array, 'price': array, 'ai': array}
+    '''
+    errstr = "calcArray(): exactly one of bondyield, bondprice must be given"
+    assert (bondyield is None) != (bondprice is None), errstr
+
+    if bondprice is None:
+        bondprice = ytmToPriceArray(coupon, nper, frac, bondyield,
+                                    redemption, frequency)
+    else:
+        bondyield = toYTMArray(bondprice, coupon, nper, frac,
+                               redemption, frequency, oid)
+
+    bondprice, bondyield, ai = [np.array(a) for a in
+                                _floats(bondprice, bondyield,
+                                        aiArray(coupon, frac, frequency))]
+    return {'bondyield': bondyield,
+            'price': bondprice,
+            'ai': ai}
+
+def worstLegs(values, rows, prices, serials, tomaturity=0):
+    '''
+    Worst of several redemption legs (maturity, calls) per bond:
+    lowest value, ties to a call before maturity (tomaturity 0 for a
+    call, 1 for maturity), then the lower redemption price, then the
+    earlier date, as in SimpleBond.toWorst.
+
+    returns (rows, index of the worst leg for each of those rows)
+    '''
+    values, prices = [np.asarray(a, dtype=float) for a in (values, prices)]
+    rows, serials = [np.asarray(a, dtype=int) for a in (rows, serials)]
+    tomaturity = np.broadcast_to(np.asarray(tomaturity, dtype=int),
+                                 rows.shape)
+
+    order = np.lexsort((serials, prices, tomaturity, values, rows))
+    rows_, first = np.unique(rows[order], return_index=True)
+
+    return rows_, order[first]
+
+def bondArrays(bonds):
+    '''
+    Term arrays for a sequence of SimpleBond objects, as keyword arguments
+    for calcArray: coupon, nper, frac, redemption, frequency, oid.
+
+    '''
+    terms_ = [(b.coupon, b.nper, b.frac, b.redvalue,
+               ql.freqValue(b.frequency),
+               b.oid if b.oid else np.nan) for b in bonds]
+
+    keys_ = ('coupon', 'nper', 'frac', 'redemption', 'frequency', 'oid')
+    if not terms_:
+        return dict([(k, np.zeros(0)) for k in keys_])
+
+    return dict(zip(keys_, [np.array(a, dtype=float) for a in zip(*terms_)]))
+
+def priceBonds(bonds, yields):
+    '''yields to maturity -> calcArray dict for a list of bonds'''
+    return calcArray(bondyield=yields, **bondArrays(bonds))
+
+def yieldBonds(bonds, prices):
+    '''prices -> calcArray dict (yields to maturity) for a list of bonds'''
+    return calcArray(bondprice=prices, **bondArrays(bonds))
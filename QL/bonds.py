@@ -7,13 +7,25 @@ Created on Jan 24, 2010
 '''
 import logging
 
+from array import array
+from collections import OrderedDict
 from math import floor, fmod
 
 import bgpy.__QuantLib as ql
 
 from bgpy.QL import toDate
+from bgpy.QL.pricegrid import PriceGrid
 from bgpy.math import Secant, SolverExceptions
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    # vectorized yield-to-worst over the call schedule
+    from bgpy.QL.bondarrays import ytmToPriceArray, toYTMArray
+
 #globals
 calendar = ql.TARGET()
     
@@ -60,6 +72,8 @@ class SimpleBondType(BondType):
         return d
 
 class Call(object):
+    __slots__ = ('firstcall', 'callprice', 'parcall', 'frequency')
+    
     def __init__(self, firstcall=None, callprice=100., parcall=None, 
                  frequency=ql.Semiannual, redvalue=100., ObjectId=None):
         '''
@@ -73,18 +87,212 @@ class Call(object):
         self.parcall = parcall if parcall else ql.Date()
         self.frequency = frequency
         
+    def __getstate__(self):
+        '''dates as serial numbers, so calls pickle with any protocol'''
+        return (self.firstcall.serialNumber(), self.callprice, 
+                self.parcall.serialNumber(), self.frequency)
+    
+    def __setstate__(self, state):
+        firstcall, self.callprice, parcall, self.frequency = state
+        self.firstcall = ql.Date(firstcall) if firstcall else ql.Date()
+        self.parcall = ql.Date(parcall) if parcall else ql.Date()
+        
     def __str__(self):
         return "@".join((str(self.firstcall), str(self.callprice)))
 
     def __repr__(self):
         return self.__str__()
 
+def callDates(call, maturity, daycount=ql.Thirty360(), face=100.0):
+    '''
+    Call date serial numbers and call prices for a Call feature, 
+    from first call up to maturity.
+    Call price steps down linearly from callprice to face at parcall.
+    
+    '''
+    serials, prices = [], []
+    
+    dtp = 0.0
+    freq = ql.Period(call.frequency)
+    
+    if ((call.parcall > call.firstcall) and 
+        (call.callprice > face)):
+        
+        callyears = daycount.yearFraction(call.firstcall, call.parcall)
+        
+        dtp = (call.callprice-face)/(ql.freqValue(call.frequency)*callyears)
+    
+    price = call.callprice
+    calldate = call.firstcall
+    
+    while ql.ActualActual().dayCount(calldate, maturity) > 0:
+        serials.append(calldate.serialNumber())
+        prices.append(price)
+        
+        calldate = calendar.advance(calldate, freq, ql.Unadjusted)
+        
+        if calldate >= call.parcall:
+            price = face
+        else:
+            price = price - dtp
+    
+    return serials, prices
+
+class CallSchedule(object):
+    '''
+    Call schedule of a bond, stored as compact arrays:
+    call date serial numbers, call prices and nper/frac terms from
+    settlement to each call date.
+    
+    Indexing returns (calldate, callprice, (nper, frac)).
+    '''
+    def __init__(self, bond):
+        self.serials = array('l')
+        self.prices = array('d')
+        self.nper = array('d')
+        self.frac = array('d')
+        
+        # index of first call at least one period after settlement
+        self.first = 0
+        
+        call = bond.callfeature
+        if not call:
+            return
+        
+        serials, prices = callDates(call, bond.maturity, bond.daycount, 
+                                    getattr(bond, "face", 100.0))
+        self.serials.extend(serials)
+        self.prices.extend(prices)
+        
+        self.setTerms(bond)
+        
+    def setTerms(self, bond):
+        '''
+        nper/frac to each call date, from the bond's settlement date
+        '''
+        freq = float(ql.freqValue(bond.frequency))
+        yearFraction = bond.daycount.yearFraction
+        dayCount = bond.daycount.dayCount
+        settle_ = bond.settle_
+        
+        earliestcall = calendar.advance(settle_, ql.Period(bond.frequency))
+        
+        self.first = len(self.serials)
+        for n, serial in enumerate(self.serials):
+            calldt = ql.Date(serial)
+            term = freq * yearFraction(settle_, calldt)
+            nper = floor(term)
+            
+            if n >= len(self.nper):
+                self.nper.append(nper)
+                self.frac.append(term - nper)
+            else:
+                self.nper[n] = nper
+                self.frac[n] = term - nper
+                
+            if n < self.first and dayCount(earliestcall, calldt) >= 0:
+                self.first = n
+        
+        return self
+        
+    def candidates(self, level=None):
+        '''
+        Indices of calls to consider for yield/price to worst.
+        If level (a price) is given, only calls at or below that price.
+        '''
+        return [n for n in range(self.first, len(self.serials))
+                if level is None or self.prices[n] <= level]
+    
+    def __len__(self):
+        return len(self.serials)
+        
+    def __getitem__(self, n):
+        return (ql.Date(self.serials[n]), self.prices[n], 
+                (self.nper[n], self.frac[n]))
+    
+    def __iter__(self):
+        for n in range(len(self.serials)):
+            yield self[n]
+    
+    def __repr__(self):
+        return "<CallSchedule: %d calls>" % len(self.serials)
+    
+class CalcCache(object):
+    '''
+    LRU cache of SimpleBond.calc results, keyed by bond terms, settlement
+    serial number and input level.  Opt-in, e.g.:
+    
+    > SimpleBond.calcCache = CalcCache()          # shared by all bonds
+    > bond.calcCache = CalcCache(maxsize=64)      # one bond
+    
+    Keys include the call feature and settlement, so entries for a bond's
+    old settlement are never served; they age out.  hits/misses count
+    lookups.  invalidate drops all entries for one bond's terms.
+    '''
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries_ = OrderedDict()
+        self.bondkeys_ = {}
+        
+    def get(self, key):
+        value = self.entries_.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+            
+        self.hits += 1
+        self.entries_[key] = value
+        return value
+        
+    def put(self, key, value):
+        self.entries_.pop(key, None)
+        self.entries_[key] = value
+        self.bondkeys_.setdefault(key[0], set()).add(key)
+        
+        while len(self.entries_) > self.maxsize:
+            oldkey, oldvalue = self.entries_.popitem(last=False)
+            self.discard_(oldkey)
+    
+    def discard_(self, key):
+        keys = self.bondkeys_.get(key[0], None)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.bondkeys_[key[0]]
+            
+    def invalidate(self, bondkey):
+        '''drop all entries for bond terms bondkey'''
+        for key in self.bondkeys_.pop(bondkey, ()):
+            self.entries_.pop(key, None)
+    
+    def clear(self):
+        self.entries_.clear()
+        self.bondkeys_.clear()
+        self.hits = self.misses = 0
+        
+    def __len__(self):
+        return len(self.entries_)
+        
+    def __repr__(self):
+        return "<CalcCache: %d entries, %d hits, %d misses>" % (len(self), 
+                                                                self.hits,
+                                                                self.misses)
+        
 class SimpleBond(SimpleBondType):
     '''
     Bond Object: 
     coupon, maturity, issuedate, oid, callfeature, bondtype, redvalue
     
     '''
+    # optional CalcCache for calc results
+    calcCache = None
+    
+    # optional PriceGrid keyword arguments, e.g. {'tol': 1e-6}; 
+    # toPrice/toYield answer from the grid when within tolerance
+    priceGridSpec = None
+    
     def __init__(self, coupon, maturity, 
                  callfeature=None, oid=None, issuedate=None, 
                  redvalue=100.,
@@ -123,18 +331,64 @@ class SimpleBond(SimpleBondType):
             if callfeature.firstcall >= self.maturity:
                 callfeature = None
                 
+        self.reset_()
         self.callfeature = callfeature
         
-        # call list contains bond objects representing each call
-        # calling self.CallList sets those settlement dates.
+        # call list contains dates, prices and terms for each call
+        # terms are rolled in place by setSettlement.
         self.calllist = self.CallList()
         
+    def cacheKey(self):
+        '''bond terms, identifying the bond in a CalcCache'''
+        call = getattr(self, "callfeature", None)
+        serial = lambda dt: dt.serialNumber() if dt else None
+        
+        callkey = (serial(call.firstcall), call.callprice, 
+                   serial(call.parcall), 
+                   ql.freqValue(call.frequency)) if call else None
+                   
+        return (self.__class__.__name__, self.coupon, 
+                serial(self.maturity), self.redvalue, self.oid, 
+                serial(self.issuedate), callkey)
+    
+    def reset_(self):
+        '''drop state derived from settlement and call feature'''
+        self.grid_ = None
+        self.cashflows_ = None
+        
+    def invalidate(self):
+        '''drop cached results for this bond's terms, and its price grid'''
+        if self.calcCache is not None:
+            self.calcCache.invalidate(self.cacheKey())
+        self.reset_()
+    
+    def setPriceGrid(self, **kwargs):
+        '''
+        Use a PriceGrid for toPrice/toYield, kwargs as PriceGrid
+        (lo, hi, tol, ytol, nodes).  No arguments turns the grid off.
+        The grid is rebuilt after settlement or call feature changes.
+        '''
+        self.priceGridSpec = kwargs if kwargs else None
+        self.grid_ = None
+        
+    def priceGrid(self):
+        '''PriceGrid at current settlement, None if not used'''
+        if self.priceGridSpec is None:
+            return None
+            
+        if getattr(self, "grid_", None) is None:
+            self.grid_ = PriceGrid(self, **self.priceGridSpec)
+        return self.grid_
+        
         
     def setSettlement(self, settledate=None):
         '''
-        Change settlement for bond calculations
+        Change settlement for bond calculations.
+        Rolls the bond and its call schedule in place; no-op if settlement
+        is unchanged.
         '''
-        settledate = toDate(settledate)
+        if not (isinstance(settledate, ql.Date) and settledate != ql.Date()):
+            settledate = toDate(settledate)
         
         if not settledate:
             evalDate = ql.Settings.instance().getEvaluationDate() 
@@ -146,6 +400,12 @@ class SimpleBond(SimpleBondType):
         
         if self.issuedate and self.daycount.dayCount(self.issuedate, settle_) < 0: 
             settle_ = self.issuedate
+        
+        prev_ = getattr(self, "settle_", None)
+        if prev_ is not None and prev_ == settle_:
+            return self
+        
+        self.reset_()
         self.settle_ = settle_
                 
         #TODO: This maybe can be more robust for non-standard frequencies
@@ -158,6 +418,10 @@ class SimpleBond(SimpleBondType):
         self.frac = self.term - self.nper
         self.term /= freq
         
+        calls = getattr(self, "calllist", None)
+        if calls:
+            calls.setTerms(self)
+        
         return self
    
     def getSettlement(self):
@@ -167,44 +431,40 @@ class SimpleBond(SimpleBondType):
     
     def CallList(self):
         '''
-        Converts Call Feature to list of call dates and bond objects.
+        Converts Call Feature to CallSchedule of call dates, prices and terms.
         
         '''
-        
-        calllist = []
-        if self.callfeature:
-            dtp = 0.0
-            call = self.callfeature
-            
-            freq = ql.Period(call.frequency)
-            
-            if ((call.parcall > call.firstcall) and 
-                (call.callprice > self.face)):
-                
-                callyears = self.daycount.yearFraction(call.firstcall, call.parcall)
-                
-                dtp = (call.callprice-self.face)/(ql.freqValue(call.frequency)*callyears)
-            
-            price = call.callprice
-            calldate = call.firstcall
+        return CallSchedule(self)
+       
+    def cashflows(self):
+        '''
+        Coupon and redemption cash flows after settlement, per 100 face:
+        (date serial numbers, amounts) arrays, in date order.
+        Coupon dates step back from maturity by whole periods, unadjusted.
+        Generated once per settlement.
+        '''
+        flows = getattr(self, "cashflows_", None)
+        if flows is not None:
+            return flows
             
-            while ql.ActualActual().dayCount(calldate, self.maturity) > 0:
-                cbond = SimpleBond(self.coupon, calldate, 
-                                   issuedate = self.issuedate, 
-                                   oid=self.oid, 
-                                   redvalue=price,
-                                   settledate=self.settlementDate)
-                                   
-                calllist.append((calldate,price, cbond))
-                
-                calldate = calendar.advance(calldate, freq, ql.Unadjusted)
-                
-                if calldate >= call.parcall:
-                    price = getattr(self, "face", 100.0)         
-                else:
-                    price = price - dtp
-                
-        return calllist
+        months = 12 // ql.freqValue(self.frequency)
+        cpn = 100.0 * self.coupon / ql.freqValue(self.frequency)
+        settle = self.settle_.serialNumber()
+        
+        serials = []
+        paydate = self.maturity
+        while paydate.serialNumber() > settle:
+            serials.append(paydate.serialNumber())
+            paydate = calendar.advance(self.maturity, -months * len(serials),
+                                       ql.Months, ql.Unadjusted)
+        serials.reverse()
+        
+        amounts = [cpn] * len(serials)
+        if amounts:
+            amounts[-1] += self.redvalue
+        
+        self.cashflows_ = (array('l', serials), array('d', amounts))
+        return self.cashflows_
        
     def maxPrice(self):
         '''
@@ -223,7 +483,12 @@ class SimpleBond(SimpleBondType):
         Optional argument:  dict_out=True returns {'bondyield':  yld, 
                                                    'price': prc,
                                                    'pricedTo': toDate
-                                                   'toPrice': toPrice}
+                                                   'toPrice': toPrice,
+                                                   'dv01': dv01,
+                                                   'dv01YTM': dv01YTM,
+                                                   'duration': modified duration,
+                                                   'convexity': convexity}
+        Risk values are analytic, from the bond priced to worst.
         '''
     
         errstr = "calc(): bondyield=%s bondprice=%s exactly one must have a value"  
@@ -235,37 +500,6 @@ class SimpleBond(SimpleBondType):
         
             assert (not price or not bondyield), errstr % (price, bondyield)
         
-        def to_other(level, ytmfunc, cmplevel):
-            '''
-            cmplevel:  use to calculate yield to worst from price, if callable 
-                       otherwise returns ytm 
-            
-            '''
-            val = getattr(self, ytmfunc)(level)
-            todate = self.maturity
-            toprice = self.redvalue
-
-            if self.calllist:
-                earliestcall= calendar.advance(self.settle_, 
-                                               ql.Period(self.frequency))
-                
-                for call in self.calllist:
-                    calldt, callpx, cbond = call
-                    
-                    if all([(self.daycount.dayCount(earliestcall, calldt) >= 0),
-                            (callpx <= level or not cmplevel), 
-                            (calldt < todate or callpx < toprice)]):
-                        
-                        cbond.settlemenDate = self.settle_
-                        newval = getattr(cbond, ytmfunc)(level)
-                        
-                        if newval <= val:
-                            todate = calldt
-                            toprice = callpx
-                            val = newval
-                            
-            return (val, todate, toprice)
-                       
         if not bondyield:  
             #toYield
             level = price
@@ -279,8 +513,18 @@ class SimpleBond(SimpleBondType):
             cmplevel = False
             calcattr = 'price'
         
-        result_value = to_other(level, ytmfunc, cmplevel)
-        val, todate, toprice = result_value
+        cache = self.calcCache
+        if cache is not None:
+            key = (self.cacheKey(), self.settle_.serialNumber(), 
+                   calcattr, level, dict_out)
+            cached = cache.get(key)
+            if cached is not None:
+                rc, result = cached
+                self.result = dict(result)
+                return self.result if dict_out else rc
+        
+        result_value = self.toWorst(level, ytmfunc, cmplevel)
+        val, todate, toprice, toterm = result_value
         if not bondyield:
             bondyield = val
         else:
@@ -294,24 +538,101 @@ class SimpleBond(SimpleBondType):
         # TODO: should replace this functionality with a property that returns
         #       a dictionary
         if dict_out:
-            self.result['dv01'] = self.dv01(bondyield)
-            self.result['dv01YTM'] = self.dv01YTM(bondyield)
+            self.result.update(self.riskValues(bondyield, price, 
+                                               toprice, toterm))
             self.result[calcattr] = val
             rc = self.result
             
         else:
             rc = result_value[0]
+        
+        if cache is not None:
+            cache.put(key, (result_value[0], dict(self.result)))
             
         return rc
+    
+    def toWorst(self, level, ytmfunc='ytmToPrice', cmplevel=False):
+        '''
+        Value of the bond to maturity or to the worst call.
+        All eligible calls are valued in one vectorized step.
+        
+        ytmfunc:   'ytmToPrice' (level is yield) or 'toYTM' (level is price)
+        cmplevel:  use to calculate yield to worst from price, if callable 
+                   otherwise returns ytm 
+        
+        returns (value, toDate, toPrice, toTerm)
+        toTerm is (nper, frac) of the call priced to, None if to maturity.
+        '''
+        val = getattr(self, ytmfunc)(level)
+        
+        calls = self.calllist
+        ncalls = calls.candidates(level if cmplevel else None) if calls else []
+        if not ncalls:
+            return (val, self.maturity, self.redvalue, None)
+            
+        if np:
+            nper = np.frombuffer(calls.nper, dtype=float)[ncalls]
+            frac = np.frombuffer(calls.frac, dtype=float)[ncalls]
+            redemption = np.frombuffer(calls.prices, dtype=float)[ncalls]
+            freq_ = ql.freqValue(self.frequency)
+            if ytmfunc == 'toYTM':
+                values = toYTMArray(level, self.coupon, nper, frac, 
+                                    redemption, freq_, 
+                                    self.oid if self.oid else None)
+            else:
+                values = ytmToPriceArray(self.coupon, nper, frac, level,
+                                         redemption, freq_)
+            values = values.tolist()
+        else:
+            valueFunc = getattr(self, ytmfunc)
+            values = [valueFunc(level, calls.prices[n], 
+                                (calls.nper[n], calls.frac[n])) 
+                      for n in ncalls]
+        
+        # worst value; ties go to a call before maturity, then to the lower 
+        # call price, then the earlier date
+        worst = min([(val, 1, self.redvalue, self.maturity.serialNumber(), -1)] +
+                    [(v, 0, calls.prices[n], calls.serials[n], n) 
+                     for n, v in zip(ncalls, values)])
+        
+        val, tomaturity, toprice, serial, n = worst
+        if n < 0:
+            return (val, self.maturity, self.redvalue, None)
+            
+        return (val, ql.Date(serial), toprice, (calls.nper[n], calls.frac[n]))
+    
+    def riskValues(self, bondyield, price, toprice=None, toterm=None):
+        '''
+        Analytic risk measures given yield/price to worst and the 
+        redemption value and (nper, frac) term priced to (None for maturity).
+        Only dv01YTM on a bond priced to call needs another yield solve.
+        
+        '''
+        prc_, dprice, d2price = self.ytmRisk(bondyield, toprice, toterm)
+        fullprice = price + 100.0 * self.ai()
+        
+        if toterm is None:
+            dprice_ytm = dprice
+        else:
+            dprice_ytm = self.ytmRisk(self.toYTM(price))[1]
+        
+        return {'dv01': -dprice * 0.0001,
+                'dv01YTM': -dprice_ytm * 0.0001,
+                'duration': -dprice / fullprice,
+                'convexity': d2price / fullprice}
               
-    def ai(self):
-        if (self.frac==0):
+    def ai(self, term=None):
+        frac = term[1] if term else self.frac
+        if (frac==0):
                 return 0
         else:
-                return (1.-self.frac)*self.coupon/ql.freqValue(self.frequency)
+                return (1.-frac)*self.coupon/ql.freqValue(self.frequency)
             
-    def ytmToPrice(self, yld, redemption=None):
-        """calculates price given yield"""    
+    def ytmToPrice(self, yld, redemption=None, term=None):
+        """calculates price given yield
+        
+        term=(nper, frac) prices to a date other than maturity, e.g. a call.
+        """    
         if(yld < 0.0):
             logging.info("%s\nsettle: %s coupon: %s maturity: %s" % 
                             (BondException.NEG_YIELD_MSG,
@@ -323,6 +644,8 @@ class SimpleBond(SimpleBondType):
             
         if not redemption:
             redemption = self.redvalue
+        
+        nper, frac = term if term else (self.nper, self.frac)
             
         if(yld==self.coupon):
             price = 100.0
@@ -331,26 +654,95 @@ class SimpleBond(SimpleBondType):
             cpn = self.coupon/freq_
             y = yld/freq_
             u = cpn/y
-            z = 1. / (1.+y)**self.nper
-            t = 1. / (1.+y)**self.frac
-            if(self.frac == 0.0):
+            z = 1. / (1.+y)**nper
+            t = 1. / (1.+y)**frac
+            if(frac == 0.0):
                 nxtcpn = 0.0
             else:
                 nxtcpn = cpn
-            prc = (t*(u*(1.0-z) + z*redemption/100.0 + nxtcpn) - self.ai())*100.0
+            prc = (t*(u*(1.0-z) + z*redemption/100.0 + nxtcpn) - self.ai(term))*100.0
             price = round(prc,6)
 
         return price
     
+    def ytmRisk(self, yld, redemption=None, term=None, places=6):
+        '''
+        Price, first and second derivatives of price with respect to yield,
+        from the ytmToPrice formula in a single pass.
+        Price is rounded to places, as ytmToPrice; None leaves it unrounded.
+        
+        returns (price, dprice/dyield, d2price/dyield2)
+        '''
+        if not redemption:
+            redemption = self.redvalue
+            
+        freq_ = ql.freqValue(self.frequency)
+        cpn = self.coupon/freq_
+        y = yld/freq_
+        r = redemption/100.0
+        n, f = term if term else (self.nper, self.frac)
+        
+        v = 1. / (1.+y)
+        z = v**n
+        t = v**f
+        nxtcpn = 0.0 if f == 0.0 else cpn
+
+        if y == 0.0:
+            # limits as y -> 0: coupons undiscounted
+            a = cpn*n + r + nxtcpn
+            da = -cpn*n*(n+1.)/2. - r*n
+            d2a = cpn*n*(n+1.)*(n+2.)/3. + r*n*(n+1.)
+        else:
+            u = cpn/y
+            a = u*(1.0-z) + z*r + nxtcpn
+            da = -u/y*(1.0-z) + (u-r)*n*z*v
+            d2a = 2.*u/(y*y)*(1.0-z) - 2.*u/y*n*z*v - (u-r)*n*(n+1.)*z*v*v
+        dt = -f*t*v
+        d2t = f*(f+1.)*t*v*v
+        
+        if(yld==self.coupon):
+            price = 100.0
+        else:
+            price = (t*a - self.ai(term))*100.0
+            if places is not None:
+                price = round(price, places)
+            
+        dprice = 100.0*(dt*a + t*da)/freq_
+        d2price = 100.0*(d2t*a + 2.*dt*da + t*d2a)/(freq_*freq_)
+        
+        return (price, dprice, d2price)
+    
     def toYield(self, _price):
+        grid = self.priceGrid()
+        if grid:
+            value = grid.bondyield(_price)
+            if value is not None:
+                bondyield, todate, toprice = value
+                self.result = {'bondyield': bondyield, 
+                               'price': _price, 
+                               'toDate': todate,
+                               'toPrice': toprice}
+                return bondyield
+                
         return self.calc(bondprice = _price)
         
     def toPrice(self, _yield):
+        grid = self.priceGrid()
+        if grid:
+            value = grid.price(_yield)
+            if value is not None:
+                price, todate, toprice = value
+                self.result = {'bondyield': _yield, 
+                               'price': price, 
+                               'toDate': todate,
+                               'toPrice': toprice}
+                return price
+                
         return self.calc(_yield)
        
-    def toYTM(self, price, redemption=None):
+    def toYTM(self, price, redemption=None, term=None):
         '''
-        Calculate yield to maturity from price.
+        Calculate yield to maturity (or to term=(nper, frac)) from price.
         Secant search is sufficient as price is generally well-behaved,
         and coupon, current yield are natural initial values.
         
@@ -359,7 +751,7 @@ class SimpleBond(SimpleBondType):
         if not redemption:
             redemption = self.redvalue
             
-        objfunction = lambda x: self.ytmToPrice(x, redemption)
+        objfunction = lambda x: self.ytmToPrice(x, redemption, term)
         
         if abs(price-100.0) < 1e-7:
             yld=self.coupon
@@ -383,19 +775,36 @@ class SimpleBond(SimpleBondType):
         return yld
     
     def dv01(self, bondyield):
-        ydelta = 0.0001
-        p0 = self.toPrice(bondyield-ydelta)
-        p1 = self.toPrice(bondyield+ydelta)
-        
-        return (p0 - p1) / 2.0
-    
+        '''price change for 1bp change in yield, priced to worst'''
+        price, todate, toprice, toterm = self.toWorst(bondyield)
+        return -self.ytmRisk(bondyield, toprice, toterm)[1] * 0.0001
     
     def dv01YTM(self, bondyield):
-        ytm = self.toYTM(self.toPrice(bondyield))
-        ydelta = 0.0001
-        p0 = self.ytmToPrice(ytm-ydelta)
-        p1 = self.ytmToPrice(ytm+ydelta)
-        
-        return (p0 - p1) / 2.0
+        '''price change for 1bp change in yield, priced to maturity'''
+        price, todate, toprice, toterm = self.toWorst(bondyield)
+        ytm = bondyield if toterm is None else self.toYTM(price)
+        return -self.ytmRisk(ytm)[1] * 0.0001
+    
+    def duration(self, bondyield):
+        '''modified duration, priced to worst'''
+        price, todate, toprice, toterm = self.toWorst(bondyield)
+        dprice = self.ytmRisk(bondyield, toprice, toterm)[1]
+        return -dprice / (price + 100.0 * self.ai())
+    
+    def convexity(self, bondyield):
+        '''convexity, priced to worst'''
+        price, todate, toprice, toterm = self.toWorst(bondyield)
+        d2price = self.ytmRisk(bondyield, toprice, toterm)[2]
+        return d2price / (price + 100.0 * self.ai())
 
-        
\ No newline at end of file
+def rollSettlement(bonds, settledate=None):
+    '''
+    Roll settlement in place for a sequence of bonds, e.g. an inventory,
+    including their call schedules.
+    
+    '''
+    settledate = toDate(settledate)
+    for bond in bonds:
+        bond.setSettlement(settledate)
+        
+    return bonds
@@ -0,0 +1,533 @@
+'''
+Compact bond table for large universes, e.g. the whole muni market.
+
+Each bond is one row of a structured numpy array: dates are serial
+numbers, terms are floats, there are no per-bond python or QuantLib
+objects.  Call schedules are expanded on demand into one flat array of
+call legs.  calc() prices or yields the table to worst in a few vectorized
+passes, with the same formulas as SimpleBond.calc; bond(n) builds the
+full bond object for row n when the other SimpleBond methods are needed.
+
+Requires numpy (not available under IronPython).
+
+Example:
+> table = BondTable()
+> table.addBonds(bonds)
+> table.setSettlement(date(2010, 11, 17))
+> table.calc(bondyield=yields)['price']
+> table.memoryPerBond()
+
+'''
+from math import floor
+
+import numpy as np
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL import toDate
+from bgpy.QL.bonds import SimpleBond, Call, callDates, calendar
+from bgpy.QL.munibonds import MuniBond
+from bgpy.QL.ustbonds import USTBond
+from bgpy.QL.bondarrays import ytmToPriceArray, toYTMArray, aiArray, worstLegs
+
+# one row per bond; null dates are 0, no oid is nan
+BOND_DTYPE = np.dtype([('coupon', 'f8'),
+                       ('maturity', 'i4'),
+                       ('issuedate', 'i4'),
+                       ('settle', 'i4'),
+                       ('redvalue', 'f8'),
+                       ('oid', 'f8'),
+                       ('nper', 'f8'),
+                       ('frac', 'f8'),
+                       ('firstcall', 'i4'),
+                       ('callprice', 'f8'),
+                       ('parcall', 'i4'),
+                       ('callfreq', 'i1'),
+                       ('btype', 'i1')])
+
+# one row per call date of each callable bond
+LEG_DTYPE = np.dtype([('row', 'i4'),
+                      ('serial', 'i4'),
+                      ('price', 'f8'),
+                      ('nper', 'f8'),
+                      ('frac', 'f8'),
+                      ('eligible', 'b1')])
+
+def perUnique(func, *keys):
+    '''
+    func(*key) evaluated once for each distinct combination of the key
+    arrays, and broadcast back to the full length of the keys.
+
+    '''
+    keys_ = np.column_stack([np.asarray(k, dtype=float) for k in keys])
+    if not len(keys_):
+        return np.zeros(0)
+
+    uniq, inverse = np.unique(keys_, axis=0, return_inverse=True)
+    values = np.array([func(*k) for k in uniq.tolist()])
+
+    return values[np.ravel(inverse)]
+
+class BondTable(object):
+    '''
+    Bonds stored as rows of a numpy structured array (BOND_DTYPE),
+    70 bytes per bond, plus 33 bytes per call date once call legs
+    are built.
+
+    btype indexes bondtypes; callfreq indexes callfrequencies.
+    '''
+    bondtypes = (SimpleBond, MuniBond, USTBond)
+    callfrequencies = (ql.Annual, ql.Semiannual, ql.Quarterly, ql.Monthly)
+
+    def __init__(self, size=1024):
+        self.data_ = np.zeros(size, dtype=BOND_DTYPE)
+        self.size_ = 0
+        self.legs_ = None
+
+    def __len__(self):
+        return self.size_
+
+    def __repr__(self):
+        return "<BondTable: %d bonds>" % len(self)
+
+    @property
+    def data(self):
+        return self.data_[:self.size_]
+
+    def reserve(self, size):
+        '''grow storage to hold at least size bonds'''
+        if size > len(self.data_):
+            data_ = np.zeros(max(size, 2 * len(self.data_)), dtype=BOND_DTYPE)
+            data_[:self.size_] = self.data_[:self.size_]
+            self.data_ = data_
+
+    def add(self, coupon, maturity, callfeature=None, oid=None,
+            issuedate=None, redvalue=100., settledate=None,
+            bondtype=SimpleBond):
+        '''
+        Add one bond, same arguments as SimpleBond.
+        bondtype is one of bondtypes.  Returns the row number.
+        '''
+        n = self.append_(coupon, maturity, callfeature, oid, issuedate,
+                         redvalue, bondtype)
+        self.setSettlement(settledate, rows=[n])
+        return n
+
+    def addBonds(self, bonds):
+        '''add bond objects (instances of bondtypes), keeping settlement'''
+        self.reserve(self.size_ + len(bonds))
+
+        bysettle = {}
+        for bond in bonds:
+            n = self.append_(bond.coupon, bond.maturity, bond.callfeature,
+                             bond.oid, bond.issuedate, bond.redvalue,
+                             type(bond))
+            bysettle.setdefault(bond.settlementDate.serialNumber(),
+                                []).append(n)
+
+        for serial, rows in bysettle.items():
+            self.setSettlement(ql.Date(serial), rows=rows)
+
+        return self
+
+    def addBullets(self, coupons, maturities, settledate=None,
+                   bondtype=SimpleBond):
+        '''
+        Add non-callable bonds from coupon and maturity sequences, all 
+        settled on settledate.  Returns the new row numbers.
+        '''
+        self.reserve(self.size_ + len(coupons))
+        rows = [self.append_(coupon, maturity, None, None, None, 100.,
+                             bondtype)
+                for coupon, maturity in zip(coupons, maturities)]
+        self.setSettlement(settledate, rows=rows)
+        return np.array(rows, dtype=int)
+
+    def append_(self, coupon, maturity, callfeature, oid, issuedate,
+                redvalue, bondtype):
+        maturity, issuedate = map(toDate, [maturity, issuedate])
+        serial = lambda dt: dt.serialNumber() if dt else 0
+
+        if callfeature and callfeature.firstcall >= maturity:
+            callfeature = None
+
+        self.reserve(self.size_ + 1)
+        n = self.size_
+        row = self.data_[n]
+
+        row['coupon'] = coupon
+        row['maturity'] = serial(maturity)
+        row['issuedate'] = serial(issuedate)
+        row['redvalue'] = redvalue
+        row['oid'] = oid if oid else np.nan
+        row['btype'] = self.bondtypes.index(bondtype)
+
+        if callfeature:
+            row['firstcall'] = serial(callfeature.firstcall)
+            row['callprice'] = callfeature.callprice
+            row['parcall'] = serial(callfeature.parcall)
+            row['callfreq'] = self.callfrequencies.index(callfeature.frequency)
+
+        self.size_ += 1
+        self.legs_ = None
+
+        return n
+
+    def atSettlements(self, settledates):
+        '''
+        New table with every bond repeated for each settlement date:
+        row n * len(settledates) + k is bond n settled on settledates[k].
+        '''
+        settledates = [toDate(d) for d in settledates]
+        ndates = len(settledates)
+
+        table = BondTable(size=max(len(self) * ndates, 1))
+        table.data_[:len(self) * ndates] = np.repeat(self.data, ndates)
+        table.size_ = len(self) * ndates
+
+        for k, settledate in enumerate(settledates):
+            table.setSettlement(settledate,
+                                rows=np.arange(k, len(table), ndates))
+
+        return table
+
+    def bond(self, n):
+        '''bond object for row n'''
+        row = self.data[n]
+        date_ = lambda serial: ql.Date(int(serial)) if serial else None
+
+        callfeature = None
+        if row['firstcall']:
+            callfeature = Call(date_(row['firstcall']),
+                               float(row['callprice']),
+                               date_(row['parcall']),
+                               self.callfrequencies[row['callfreq']])
+
+        oid = None if np.isnan(row['oid']) else float(row['oid'])
+
+        bondtype = self.bondtypes[row['btype']]
+        return bondtype(float(row['coupon']), date_(row['maturity']),
+                        callfeature, oid, date_(row['issuedate']),
+                        float(row['redvalue']), date_(row['settle']))
+
+    def frequencies(self, rows=None):
+        '''coupon frequency per bond, from its bond type'''
+        freqs_ = np.array([ql.freqValue(b.frequency) for b in self.bondtypes],
+                          dtype=float)
+        btype = self.data['btype']
+        return freqs_[btype if rows is None else btype[rows]]
+
+    def setSettlement(self, settledate=None, rows=None):
+        '''
+        Change settlement for all bonds (or rows), as SimpleBond.setSettlement:
+        settledate, or the evaluation date plus each bond type's settlement
+        days; never before issue date.
+        Terms are calculated once per distinct settlement/maturity pair.
+        '''
+        settledate = toDate(settledate)
+        data = self.data
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        if not len(rows):
+            return self
+
+        btype = data['btype'][rows]
+        settle = np.zeros(len(rows), dtype=int)
+        for n, bondtype in enumerate(self.bondtypes):
+            if settledate:
+                settle_ = settledate
+            else:
+                evalDate = ql.Settings.instance().getEvaluationDate()
+                settle_ = bondtype.calendar.advance(evalDate,
+                                                    bondtype.settlementdays,
+                                                    ql.Days)
+            settle[btype == n] = settle_.serialNumber()
+
+        def beforeIssue(btype, issuedate, settle):
+            daycount = self.bondtypes[int(btype)].daycount
+            return bool(issuedate) and daycount.dayCount(
+                            ql.Date(int(issuedate)), ql.Date(int(settle))) < 0
+
+        issuedate = data['issuedate'][rows]
+        clamp = perUnique(beforeIssue, btype, issuedate, settle).astype(bool)
+        settle = np.where(clamp, issuedate, settle)
+
+        def terms(btype, settle, maturity):
+            bondtype = self.bondtypes[int(btype)]
+            freq = float(ql.freqValue(bondtype.frequency))
+            term = freq * bondtype.daycount.yearFraction(ql.Date(int(settle)),
+                                                         ql.Date(int(maturity)))
+            return (floor(term), term - floor(term))
+
+        nperfrac = perUnique(terms, btype, settle, data['maturity'][rows])
+
+        self.data_['settle'][rows] = settle
+        self.data_['nper'][rows] = nperfrac[:, 0]
+        self.data_['frac'][rows] = nperfrac[:, 1]
+
+        if self.legs_ is not None:
+            self.setLegTerms()
+
+        return self
+
+    def legs(self):
+        '''call legs (LEG_DTYPE), built on first use'''
+        if self.legs_ is None:
+            self.buildLegs()
+        return self.legs_
+
+    def buildLegs(self):
+        '''
+        Expand call features into call legs.  The call dates and prices are
+        generated once per distinct call structure.
+        '''
+        data = self.data
+        rows = np.flatnonzero(data['firstcall'])
+        keys_ = [data[k][rows] for k in ('btype', 'maturity', 'firstcall',
+                                         'callprice', 'parcall', 'callfreq')]
+
+        self.legs_ = np.zeros(0, dtype=LEG_DTYPE)
+        if not len(rows):
+            return self.legs_
+
+        uniq, inverse = np.unique(np.column_stack(keys_), axis=0,
+                                  return_inverse=True)
+        inverse = np.ravel(inverse)
+
+        serials, prices, counts = [], [], []
+        for btype, maturity, firstcall, callprice, parcall, callfreq in uniq:
+            bondtype = self.bondtypes[int(btype)]
+            call = Call(ql.Date(int(firstcall)), callprice,
+                        ql.Date(int(parcall)) if parcall else None,
+                        self.callfrequencies[int(callfreq)])
+            s_, p_ = callDates(call, ql.Date(int(maturity)), bondtype.daycount,
+                               bondtype.face)
+            serials.extend(s_)
+            prices.extend(p_)
+            counts.append(len(s_))
+
+        counts = np.array(counts, dtype=int)
+        offsets = np.cumsum(counts) - counts
+
+        nlegs = counts[inverse]
+        total = nlegs.sum()
+        start = np.repeat(np.cumsum(nlegs) - nlegs, nlegs)
+        source = np.repeat(offsets[inverse], nlegs) + np.arange(total) - start
+
+        legs_ = np.zeros(total, dtype=LEG_DTYPE)
+        legs_['row'] = np.repeat(rows, nlegs)
+        legs_['serial'] = np.array(serials, dtype=int)[source]
+        legs_['price'] = np.array(prices, dtype=float)[source]
+
+        self.legs_ = legs_
+        self.setLegTerms()
+
+        return self.legs_
+
+    def setLegTerms(self):
+        '''
+        nper/frac from settlement to each call date, and whether the call is
+        at least one period after settlement, as CallSchedule.setTerms.
+        '''
+        legs_ = self.legs_
+        if not len(legs_):
+            return self
+
+        data = self.data
+
+        def terms(btype, settle, serial):
+            bondtype = self.bondtypes[int(btype)]
+            settle_, calldt = ql.Date(int(settle)), ql.Date(int(serial))
+            freq = float(ql.freqValue(bondtype.frequency))
+            term = freq * bondtype.daycount.yearFraction(settle_, calldt)
+
+            earliestcall = calendar.advance(settle_,
+                                            ql.Period(bondtype.frequency))
+            eligible = bondtype.daycount.dayCount(earliestcall, calldt) >= 0
+
+            return (floor(term), term - floor(term), eligible)
+
+        values = perUnique(terms, data['btype'][legs_['row']],
+                           data['settle'][legs_['row']], legs_['serial'])
+
+        legs_['nper'] = values[:, 0]
+        legs_['frac'] = values[:, 1]
+        legs_['eligible'] = values[:, 2].astype(bool)
+
+        return self
+
+    def calc(self, bondyield=None, bondprice=None, rows=None):
+        '''
+        Price/yield to worst for all bonds (or rows), as SimpleBond.calc.
+        Exactly one of bondyield, bondprice must be given, as a scalar or
+        an array over rows.
+
+        returns {'bondyield': array, 'price': array, 'ai': array,
+                 'toDate': array of date serial numbers, 'toPrice': array}
+        '''
+        errstr = "calc(): exactly one of bondyield, bondprice must be given"
+        assert (bondyield is None) != (bondprice is None), errstr
+
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        bonds = self.data[rows]
+        freq = self.frequencies(rows)
+        oid = bonds['oid']
+
+        toyield = bondyield is None
+        level = np.asarray(bondprice if toyield else bondyield, dtype=float)
+        level = np.broadcast_to(level, rows.shape).astype(float)
+
+        if toyield:
+            values = toYTMArray(level, bonds['coupon'], bonds['nper'],
+                                bonds['frac'], bonds['redvalue'], freq, oid)
+        else:
+            values = ytmToPriceArray(bonds['coupon'], bonds['nper'],
+                                     bonds['frac'], level,
+                                     bonds['redvalue'], freq)
+
+        todate = bonds['maturity'].astype(int)
+        toprice = bonds['redvalue'].copy()
+
+        legs_ = self.legs()
+        if len(legs_):
+            position = np.full(len(self), -1, dtype=int)
+            position[rows] = np.arange(len(rows))
+
+            n = position[legs_['row']]
+            callable_ = (n >= 0) & legs_['eligible']
+            if toyield:
+                # yield to worst: only calls at or below the price
+                callable_[callable_] &= (legs_['price'][callable_] <=
+                                         level[n[callable_]])
+
+            calls = legs_[callable_]
+            n = n[callable_]
+            if toyield:
+                callvalues = toYTMArray(level[n], bonds['coupon'][n],
+                                        calls['nper'], calls['frac'],
+                                        calls['price'], freq[n], oid[n])
+            else:
+                callvalues = ytmToPriceArray(bonds['coupon'][n], calls['nper'],
+                                             calls['frac'], level[n],
+                                             calls['price'], freq[n])
+
+            allvalues = np.concatenate((values, callvalues))
+            allprices = np.concatenate((toprice, calls['price']))
+            allserials = np.concatenate((todate, calls['serial']))
+
+            worstrows, worst = worstLegs(
+                                allvalues,
+                                np.concatenate((np.arange(len(rows)), n)),
+                                allprices, allserials,
+                                np.concatenate((np.ones(len(rows), dtype=int),
+                                                np.zeros(len(calls), 
+                                                         dtype=int))))
+
+            values = allvalues[worst]
+            toprice = allprices[worst]
+            todate = allserials[worst]
+
+        if toyield:
+            bondyield, bondprice = values, level
+        else:
+            bondyield, bondprice = level, values
+
+        return {'bondyield': bondyield,
+                'price': bondprice,
+                'ai': aiArray(bonds['coupon'], bonds['frac'], freq),
+                'toDate': todate,
+                'toPrice': toprice}
+
+    def qtax(self, ptsyear=0.25, rows=None):
+        '''
+        De minimis state for all bonds (or rows), as MuniBond.qtax:
+        {'qtaxrval': accretion value at oid (or 100), 
+         'amddemin': de minimis discount, 
+         'qtaxyield': yield at the de minimis price}
+        '''
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        bonds = self.data[rows]
+        freq = self.frequencies(rows)
+        coupon, nper, frac = bonds['coupon'], bonds['nper'], bonds['frac']
+
+        oid = np.where(np.isnan(bonds['oid']), 0.0, bonds['oid'])
+        premium = oid > coupon
+
+        qtaxrval = np.where(premium,
+                            ytmToPriceArray(coupon, nper, frac, oid,
+                                            bonds['redvalue'], freq),
+                            100.0)
+        amddemin = np.floor(nper / freq) * ptsyear
+
+        with np.errstate(all='ignore'):
+            qtaxyield = toYTMArray(qtaxrval - amddemin, coupon, nper, frac,
+                                   bonds['redvalue'], freq, bonds['oid'])
+        qtaxyield = np.where(np.isfinite(qtaxyield), qtaxyield, coupon)
+
+        return {'qtaxrval': qtaxrval,
+                'amddemin': amddemin,
+                'qtaxyield': qtaxyield}
+
+    def calcAfterTax(self, bondprice=None, bondyield=None, capgains=.15,
+                     ordinc=.35, ptsyear=0.25, rows=None):
+        '''
+        After-tax yields and de minimis screen for all bonds (or rows), as
+        MuniBond.calcAfterTax.  Exactly one of bondprice, bondyield must be
+        given; a yield is first priced to worst.
+
+        Bonds at or below their qtax accretion value (qtaxflag True) are 
+        yielded to maturity, redeemed at 100 less tax on the market
+        discount: capital gains rate within de minimis, ordinary income
+        rate beyond it.  Others get yield to worst.
+
+        returns qtax() values plus {'price', 'aftertaxyield', 'qtaxflag'}
+        '''
+        errstr = "calcAfterTax(): exactly one of bondprice, bondyield must be given"
+        assert (bondyield is None) != (bondprice is None), errstr
+
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        if bondprice is None:
+            price = self.calc(bondyield=bondyield, rows=rows)['price']
+        else:
+            price = np.broadcast_to(np.asarray(bondprice, dtype=float),
+                                    rows.shape).astype(float)
+
+        result = self.qtax(ptsyear, rows)
+        qtaxrval, amddemin = result['qtaxrval'], result['amddemin']
+
+        qtaxflag = price <= qtaxrval
+        aty = np.zeros(len(rows))
+
+        discount = np.flatnonzero(qtaxflag)
+        if len(discount):
+            bonds = self.data[rows[discount]]
+            amd = np.maximum(qtaxrval[discount] - price[discount], 0.0)
+            taxrate = np.where(amd < amddemin[discount], capgains, ordinc)
+            aty[discount] = toYTMArray(price[discount], bonds['coupon'],
+                                       bonds['nper'], bonds['frac'],
+                                       100.0 - amd * taxrate,
+                                       self.frequencies(rows[discount]),
+                                       bonds['oid'])
+
+        premium = np.flatnonzero(~qtaxflag)
+        if len(premium):
+            aty[premium] = self.calc(bondprice=price[premium],
+                                     rows=rows[premium])['bondyield']
+
+        result.update({'price': price,
+                       'aftertaxyield': aty,
+                       'qtaxflag': qtaxflag})
+        return result
+
+    def memoryPerBond(self, includeLegs=True):
+        '''
+        Bytes per bond: table storage, plus call legs if built.
+        Use to size hosts for a bond universe.
+        '''
+        if not len(self):
+            return float(BOND_DTYPE.itemsize)
+
+        nbytes = BOND_DTYPE.itemsize * len(self)
+        if includeLegs and self.legs_ is not None:
+            nbytes += self.legs_.nbytes
+
+        return nbytes / float(len(self))
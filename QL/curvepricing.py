@@ -0,0 +1,132 @@
+'''
+Curve-discounted bond pricing and Z-spreads for portfolios.
+
+Cash flows come from SimpleBond.cashflows.  Discount factors are looked up
+once per distinct date across the whole portfolio; pricing and the
+Z-spread solve are then array operations over all cash flows at once.
+
+Z-spread is a continuously compounded spread to the zero curve, the same
+convention as SpreadedCurve(curve, spread, "Z").
+
+Requires numpy (not available under IronPython).
+
+Example:
+> curvePrices(bonds, curve)
+> zSpreads(bonds, curve, prices)
+
+'''
+import numpy as np
+
+import bgpy.__QuantLib as ql
+
+from bgpy.math.solvers import SolverExceptions
+
+def termstructureOf(curve):
+    '''TermStructureModel for a curve object, e.g. GovtCurve'''
+    return getattr(curve, "termstructure", curve)
+
+def cashflowArrays(bonds):
+    '''
+    Cash flows of a sequence of bonds, flattened:
+    {'bond': bond index, 'serial': pay date, 'amount': per 100 face,
+     'settle': settlement serial per bond, 'ai': accrued per 100 per bond}
+    '''
+    index, serials, amounts = [], [], []
+    for n, bond in enumerate(bonds):
+        s_, a_ = bond.cashflows()
+        index.extend([n] * len(s_))
+        serials.extend(s_)
+        amounts.extend(a_)
+
+    return {'bond': np.array(index, dtype=int),
+            'serial': np.array(serials, dtype=int),
+            'amount': np.array(amounts, dtype=float),
+            'settle': np.array([b.settlementDate.serialNumber()
+                                for b in bonds], dtype=int),
+            'ai': np.array([100.0 * b.ai() for b in bonds], dtype=float)}
+
+def discountArrays(curve, serials):
+    '''
+    Discount factors and times from the curve reference date for an
+    array of date serial numbers, from a single batched query of the
+    curve (TermStructureModel.discounts) for all the distinct dates.
+
+    returns (discount, time) arrays
+    '''
+    dates, inverse = np.unique(serials, return_inverse=True)
+    dates = dates.tolist()
+    values = termstructureOf(curve).discounts(dates)
+
+    dfs, times = np.array([values[d] for d in dates],
+                          dtype=float).reshape(-1, 2).T
+    inverse = np.ravel(inverse)
+    return dfs[inverse], times[inverse]
+
+def flowDiscounts_(flows, curve):
+    '''forward discount factors and times from settlement for each flow'''
+    nflows = len(flows['serial'])
+    dfs, times = discountArrays(curve, np.concatenate((flows['serial'],
+                                                       flows['settle'])))
+    bond = flows['bond']
+    settledf = dfs[nflows:][bond]
+    settletime = times[nflows:][bond]
+
+    return dfs[:nflows] / settledf, times[:nflows] - settletime
+
+def curvePrices(bonds, curve, zspreads=0.0, flows=None):
+    '''
+    Clean prices, per 100 face, discounting each bond's cash flows on the
+    curve from its settlement date, at Z-spreads (scalar or per bond).
+    Bonds without cash flows after settlement are nan.
+    '''
+    flows = flows if flows is not None else cashflowArrays(bonds)
+    nbonds = len(flows['settle'])
+    dfs, taus = flowDiscounts_(flows, curve)
+
+    z = np.broadcast_to(np.asarray(zspreads, dtype=float), (nbonds,))
+    pv = flows['amount'] * dfs * np.exp(-z[flows['bond']] * taus)
+
+    prices = np.bincount(flows['bond'], pv, nbonds) - flows['ai']
+    prices[np.bincount(flows['bond'], minlength=nbonds) == 0] = np.nan
+
+    return prices
+
+def zSpreads(bonds, curve, prices, flows=None, tol=1e-10,
+             maxiter=SolverExceptions.MAX_ITERATIONS):
+    '''
+    Z-spreads matching clean prices (scalar or per bond), solved by Newton
+    iteration for all bonds at once.  Price is convex and decreasing in
+    the spread, so the iteration converges from zero without bracketing;
+    bonds drop out as they converge.  Bonds without cash flows after
+    settlement are nan.
+    '''
+    flows = flows if flows is not None else cashflowArrays(bonds)
+    nbonds = len(flows['settle'])
+    bond = flows['bond']
+    dfs, taus = flowDiscounts_(flows, curve)
+
+    target = np.broadcast_to(np.asarray(prices, dtype=float),
+                             (nbonds,)) + flows['ai']
+    cfs = flows['amount'] * dfs
+
+    def residual(z):
+        pv = cfs * np.exp(-z[bond] * taus)
+        return (np.bincount(bond, pv, nbonds) - target,
+                -np.bincount(bond, pv * taus, nbonds))
+
+    z = np.zeros(nbonds)
+    value, slope = residual(z)
+    active = (np.abs(value) > tol) & (slope != 0.0)
+    for ictr in range(maxiter):
+        if not active.any():
+            break
+        z[active] -= value[active] / slope[active]
+        value, slope = residual(z)
+        active &= (np.abs(value) > tol) & (slope != 0.0)
+
+    if active.any():
+        raise SolverExceptions("zSpreads: Max iterations reached for %d bonds"
+                               % active.sum())
+
+    z[np.bincount(bond, minlength=nbonds) == 0] = np.nan
+    return z
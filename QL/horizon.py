@@ -0,0 +1,96 @@
+'''
+Horizon analysis: carry and roll-down of bonds over future settlement dates.
+
+Every (bond, settlement date) pair is a row of one BondTable, so the
+whole horizon grid is priced to worst in a single vectorized calc; call
+schedules are generated once per bond, not once per date.
+
+Requires numpy (not available under IronPython).
+
+Example:
+> dates = [date(2011, 1, 3), date(2011, 7, 1), date(2012, 1, 3)]
+> horizon(bonds, dates, yields=[.040, .041, .042])['price']
+> horizon(bonds, dates, curve=curve, spreads=spreads)['bondyield']
+
+'''
+import numpy as np
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL import toDate
+from bgpy.QL.bondtable import BondTable
+
+def rollDownYields(table, curve, spreads=None):
+    '''
+    Yields from a constant curve: each row's yield is the curve's par
+    yield for the row's remaining term (maturity less settlement), plus
+    spreads (scalar or per row).  Par yields are computed once per
+    distinct remaining term.
+    '''
+    data = table.data
+    refdate = curve.curve.referenceDate()
+    refserial = refdate.serialNumber()
+
+    remaining = data['maturity'] - data['settle']
+    terms, inverse = np.unique(remaining, return_inverse=True)
+
+    pars = []
+    for term in terms.tolist():
+        if term <= 0:
+            pars.append(np.nan)
+        else:
+            pars.append(curve.bondpar(ql.Date(refserial + int(term))))
+
+    yields = np.array(pars, dtype=float)[np.ravel(inverse)]
+    if spreads is not None:
+        yields = yields + np.asarray(spreads, dtype=float)
+
+    return yields
+
+def horizon(bonds, settledates, yields=None, curve=None, spreads=None):
+    '''
+    Price, accrued, yield to worst and to-date for each bond at each
+    settlement date.
+
+    bonds:        SimpleBond objects, or a BondTable
+    yields:       yield path: one yield per date, or an array
+                  (bonds x dates)
+    curve:        TermStructureModel for constant-curve roll-down, used if
+                  yields is None; spreads (scalar, per bond, or
+                  bonds x dates) are added to the curve's par yields
+
+    returns {'settle', 'bondyield', 'price', 'ai', 'toDate', 'toPrice'},
+    arrays (bonds x dates); dates are serial numbers.  Bonds that have
+    matured by a settlement date are nan.
+    '''
+    errstr = "horizon(): one of yields, curve must be given"
+    assert (yields is not None) or (curve is not None), errstr
+
+    table = bonds if isinstance(bonds, BondTable) else \
+            BondTable(size=max(len(bonds), 1)).addBonds(bonds)
+    settledates = [toDate(d) for d in settledates]
+    shape_ = (len(table), len(settledates))
+
+    grid = table.atSettlements(settledates)
+
+    if yields is None:
+        if spreads is not None:
+            spreads = np.asarray(spreads, dtype=float)
+            if spreads.ndim == 1:
+                spreads = spreads[:, np.newaxis]
+            spreads = np.broadcast_to(spreads, shape_).ravel()
+        yields = rollDownYields(grid, curve, spreads)
+    else:
+        yields = np.broadcast_to(np.asarray(yields, dtype=float),
+                                 shape_).ravel()
+
+    live = grid.data['maturity'] > grid.data['settle']
+    result = grid.calc(bondyield=yields[live], rows=np.flatnonzero(live))
+
+    out = {'settle': grid.data['settle'].astype(float)}
+    for key in ('bondyield', 'price', 'ai', 'toDate', 'toPrice'):
+        values = np.full(len(grid), np.nan)
+        values[live] = result[key]
+        out[key] = values
+
+    return dict([(k, v.reshape(shape_)) for k, v in out.items()])
@@ -4,7 +4,7 @@ Created on Oct 14, 2009
 @author: bartmosley
 
 '''
-from math import exp, log
+from math import ceil, exp, log
 
 import bgpy.__QuantLib as ql
 
@@ -43,6 +43,7 @@ class USDLiborSwap(object):
                 setPriceEngine=False):
                 
         self.termstructure = termstructure
+        self.twins_ = None
         
         startDate, termDate = map(toDate, [startDate, termDate])
         self.payFlag = FixedPayer if PayFlag else FixedReceiver
@@ -110,6 +111,25 @@ class USDLiborSwap(object):
             
         return self.swap.NPV()
 
+    def bumpedTwins(self):
+        '''
+        (up, dn) copies of the swap on the termstructure's shift_up and 
+        shift_dn curves, built once and kept until the scenarios are 
+        rebuilt (new shift curve objects).
+        '''
+        crv_up = self.termstructure.shift_up
+        crv_dn = self.termstructure.shift_dn
+        
+        twins = self.twins_
+        if not twins or twins[0] is not crv_up or twins[1] is not crv_dn:
+            swp0 = USDLiborSwap(crv_up, self.startDate, self.termDate, 
+                                self.fixedRate)
+            swp1 = USDLiborSwap(crv_dn, self.startDate, self.termDate, 
+                                self.fixedRate)
+            self.twins_ = twins = (crv_up, crv_dn, swp0, swp1)
+        
+        return twins[2:]
+    
     def z_dv01(self, termstructure_=None):
         '''Z DV01
         Price sensitivity to bp change in discount rates across the term structure.
@@ -119,13 +139,7 @@ class USDLiborSwap(object):
         if not self.termstructure:
             return None 
             
-        crv_up = self.termstructure.shift_up
-        crv_dn = self.termstructure.shift_dn
-        
-        swp0 = USDLiborSwap(crv_up, self.startDate, self.termDate, 
-                            self.fixedRate)
-        swp1 = USDLiborSwap(crv_dn, self.startDate, self.termDate, 
-                            self.fixedRate)
+        swp0, swp1 = self.bumpedTwins()
         
         p0 = swp0.value()
         p1 = swp1.value()
@@ -140,6 +154,12 @@ class USDLiborSwaption(object):
     calendar = ql.TARGET()
     fixedLegAdjustment = USDLiborSwap.fixedLegAdjustment
     
+    # adaptive lattice sizing
+    STEPS_PER_YEAR = 12
+    STEPS_PER_CALL = 4
+    MIN_STEPS = 20
+    MAX_STEPS = 1600
+    
     def __init__(self, termstructure, firstCallDate, termDate, fixedRate, 
                 PayFlag=1, spread=0.0, 
                 notionalAmount=100.0,
@@ -148,12 +168,15 @@ class USDLiborSwaption(object):
                 ):
         self.termstructure = termstructure
         self.spread = spread
+        self.notionalAmount = notionalAmount
+        self.callFrequency = callFrequency
         firstCallDate, termDate = map(toDate, [firstCallDate, termDate])
         
-        self.swap = USDLiborSwap(self.termstructure, firstCallDate, termDate, 
-                            fixedRate, 
-                            PayFlag, self.spread, 
-                            notionalAmount).swap
+        self.underlying_ = USDLiborSwap(self.termstructure, firstCallDate, 
+                                        termDate, fixedRate, 
+                                        PayFlag, self.spread, 
+                                        notionalAmount)
+        self.swap = self.underlying_.swap
         
         bermSchedule = None
         if bermudan:
@@ -179,19 +202,89 @@ class USDLiborSwaption(object):
         
         self.swaption = ql.Swaption(self.swap, self.exercise)
     
-    def value(self, vol, termstructure_=None, model=ql.BlackKarasinski):
+    def setSpread(self, spread):
+        '''
+        Change the floating spread.  QuantLib swaps take the spread as a 
+        number, so only the underlying swap and swaption are rebuilt; the 
+        schedules, index and exercise are kept.
+        '''
+        if spread == self.spread:
+            return self
+            
+        leg = self.underlying_
+        self.spread = spread
+        self.swap = ql.VanillaSwap(leg.payFlag, self.notionalAmount,
+                                   leg.fixedSchedule, leg.fixedRate, 
+                                   leg.fixedLegDayCounter,
+                                   leg.floatingSchedule, 
+                                   leg.iborIndex, spread,
+                                   leg.floatingLegDayCounter)
+        self.swaption = ql.Swaption(self.swap, self.exercise)
+        return self
+        
+    def value(self, vol, termstructure_=None, model=ql.BlackKarasinski,
+                    timeSteps=50):
         '''
         Requires volatility input
         
         '''
         if termstructure_:
-            engine = termstructure_.swaptionEngine(vol, model=model)
+            engine = termstructure_.swaptionEngine(vol, timeSteps=timeSteps,
+                                                   model=model)
         else:
-            engine = self.termstructure.swaptionEngine(vol, model=model)
+            engine = self.termstructure.swaptionEngine(vol, 
+                                                       timeSteps=timeSteps,
+                                                       model=model)
         
         self.swaption.setPricingEngine(engine)
         
         return self.swaption.NPV()
+    
+    def adaptiveSteps(self, termstructure_=None, 
+                            stepsPerYear=STEPS_PER_YEAR,
+                            stepsPerCall=STEPS_PER_CALL):
+        '''
+        Lattice steps for the swap's remaining term: stepsPerYear, and at 
+        least stepsPerCall per call period, within MIN_STEPS, MAX_STEPS.
+        '''
+        ts = termstructure_ if termstructure_ else self.termstructure
+        years = ts.daycount.yearFraction(ts.referenceDate(), 
+                                         self.swap.maturityDate())
+        perYear = max(stepsPerYear, 
+                      stepsPerCall * ql.freqValue(self.callFrequency))
+        
+        steps = int(ceil(years * perYear))
+        return min(max(steps, self.MIN_STEPS), self.MAX_STEPS)
+        
+    def convergedValue(self, vol, termstructure_=None, 
+                             model=ql.BlackKarasinski,
+                             timeSteps=None, 
+                             tol=1e-4, 
+                             richardson=False,
+                             maxSteps=MAX_STEPS):
+        '''
+        Value on lattices of N and 2N steps, doubling N until the two agree
+        within tol or 2N reaches maxSteps.  N starts at timeSteps, default 
+        adaptiveSteps.  With richardson, returns 2*v(2N) - v(N) (the tree 
+        error is first order in the step size), otherwise v(2N).
+        
+        Sets timeSteps (2N) and accuracy (|v(2N) - v(N)|).
+        '''
+        ts = termstructure_ if termstructure_ else self.termstructure
+        steps = timeSteps if timeSteps else self.adaptiveSteps(ts)
+        
+        v0 = self.value(vol, ts, model, steps)
+        while True:
+            v1 = self.value(vol, ts, model, 2 * steps)
+            err = abs(v1 - v0)
+            if err <= tol or 4 * steps > maxSteps:
+                break
+            steps, v0 = 2 * steps, v1
+            
+        self.timeSteps = 2 * steps
+        self.accuracy = err
+        
+        return 2.0 * v1 - v0 if richardson else v1
         
 class BasisSwap(ql.Swap):
     '''
@@ -0,0 +1,50 @@
+'''
+Key rate durations for a portfolio of bonds.
+
+The key rate curves are built once on the base curve
+(TermStructureModel.keyRateCurves) and every bond is revalued against the
+same set, so the cost is one pair of curves per tenor, not per bond.
+
+Example:
+> values = [AssetSwap(b).solveSpread(curve, p, vol, spreadType="O")
+            for b, p in zip(bonds, prices)]
+> keyRateDV01s(bonds, curve, [v.spread for v in values], vol=vol)
+
+'''
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+from bgpy.QL.termstructure import TermStructureModel
+
+def perBond_(value, nbonds):
+    if hasattr(value, "__len__"):
+        assert len(value) == nbonds, "keyRateDV01s(): one value per bond"
+        return list(value)
+    return [value] * nbonds
+
+def keyRateDV01s(bonds, termstructure, spreads, ratios=1.0, vol=1e-7,
+                 spreadType="O", model=ql.BlackKarasinski,
+                 tenors=TermStructureModel.KEYRATE_TENORS, shock=0.0001):
+    '''
+    dv01 to each key rate, per 100 face, for bonds (or AssetSwaps) at
+    spreads and ratios (scalar or per bond).
+
+    spreadType:
+        "S" for asset swap
+        "O" for oas
+
+    returns list of rows, one per bond, one column per tenor
+    '''
+    nbonds = len(bonds)
+    spreads, ratios = perBond_(spreads, nbonds), perBond_(ratios, nbonds)
+
+    # build the shared curves up front
+    termstructure.keyRateCurves(tenors, shock)
+
+    matrix = []
+    for bond, spread, ratio in zip(bonds, spreads, ratios):
+        asw = bond if isinstance(bond, AssetSwap) else AssetSwap(bond)
+        valueFunc = asw.spreadType.get(spreadType, asw.aswValue)
+        matrix.append(asw.keyrate_dv01(termstructure, spread, ratio, vol,
+                                       model, valueFunc, tenors, shock))
+    return matrix
@@ -0,0 +1,256 @@
+'''
+Trinomial short-rate lattice (Hull-White, Black-Karasinski) in numpy,
+for valuing the call features of many bonds in one backward induction.
+
+The tree is the one QuantLib's TreeSwaptionEngine uses: an
+Ornstein-Uhlenbeck factor x on a trinomial grid, with the short rate
+r = x + phi(t) (HullWhite) or r = exp(x + phi(t)) (BlackKarasinski), and
+phi fitted step by step to the curve's discount factors.  The time grid is
+uniform and shared by all bonds: cash flow and exercise dates are moved to
+the nearest step, their amounts scaled by the curve discount ratio so
+their value on the curve is unchanged.
+
+A bond's call is valued as in AssetSwap.callValue_: a bermudan receiver
+swaption on the call coupon rate (AssetSwap.callCouponRate), i.e. an
+option to exchange the remaining fixed leg plus notional for par plus the
+floating spread, accrued from the exercise date as in QuantLib's tree.
+AssetSwap.setLattice(native=True) values calls this way, on the curve's
+shared lattice (TermStructureModel.shortRateLattice), so bonds valued on
+one curve at one vol, and solver iterations that move only the spread,
+reuse a single lattice.
+
+Requires numpy (not available under IronPython).
+
+Example:
+> asws = [AssetSwap(b) for b in bonds]
+> latticeCallValues(curve, asws, vol=.15)
+> lattice = ShortRateLattice(curve, .15, horizon=30.)
+> callValues(lattice, [callFlows(a) for a in asws])
+
+'''
+import numpy as np
+
+import bgpy.__QuantLib as ql
+
+from bgpy.math import SolverExceptions
+from bgpy.QL.irswaps import USDLiborSwap
+
+class ShortRateLattice(object):
+    '''
+    Trinomial lattice fitted to termstructure (a TermStructureModel) out
+    to horizon years, stepsPerYear steps a year.
+
+    model:  ql.HullWhite or ql.BlackKarasinski (or their names); alpha is
+            the mean reversion, vol the model volatility, as in
+            TermStructureModel.swaptionEngine
+    '''
+    STEPS_PER_YEAR = 24
+
+    def __init__(self, termstructure, vol, horizon, alpha=1e-7,
+                 model=ql.BlackKarasinski, stepsPerYear=STEPS_PER_YEAR):
+        self.model = getattr(model, "__name__", model)
+        errstr = "ShortRateLattice: model must be HullWhite or BlackKarasinski"
+        assert self.model in ("HullWhite", "BlackKarasinski"), errstr
+
+        self.vol = vol
+        self.alpha = alpha
+        self.horizon = horizon
+
+        self.handle = handle = termstructure.handle
+        self.discount = handle.discount
+        self.referenceDate = handle.referenceDate()
+        self.dayCounter = handle.dayCounter()
+
+        nsteps = max(int(np.ceil(horizon * stepsPerYear)), 1)
+        self.dt = float(horizon) / nsteps
+        self.times = self.dt * np.arange(nsteps + 1)
+        self.discounts = self.discounts_()
+
+        self.build_()
+
+    def discounts_(self):
+        return np.array([self.discount(float(t), True) for t in self.times])
+
+    def fits(self):
+        '''True while the curve is the one the lattice was fitted to'''
+        return (self.referenceDate == self.handle.referenceDate() and
+                np.array_equal(self.discounts, self.discounts_()))
+
+    def __len__(self):
+        return len(self.times) - 1
+
+    def fit_(self, q, x, target, i):
+        '''phi with sum(q * exp(-r(x + phi) dt)) = target'''
+        dt = self.dt
+        if self.model == "HullWhite":
+            return np.log(np.dot(q, np.exp(-x * dt)) / target) / dt
+
+        fwd = np.log(self.discounts[i] / target) / dt
+        if fwd <= 0.0:
+            raise SolverExceptions("ShortRateLattice: non-positive forward "
+                                   "rate at t=%s" % self.times[i])
+        phi = np.log(fwd)
+        for ictr in range(SolverExceptions.MAX_ITERATIONS):
+            rdt = np.exp(x + phi) * dt
+            qd = q * np.exp(-rdt)
+            value = qd.sum() - target
+            if abs(value) < 1e-15 * target:
+                return phi
+            phi += value / np.dot(qd, rdt)
+
+        raise SolverExceptions("ShortRateLattice: fit failed at t=%s" %
+                               self.times[i])
+
+    def build_(self):
+        '''branching, probabilities and node discount factors per step'''
+        a, dt, vol = self.alpha, self.dt, self.vol
+
+        decay = np.exp(-a * dt)
+        var = vol * vol * (-np.expm1(-2.0 * a * dt) / (2.0 * a) if a > 0.0
+                           else dt)
+        self.dx = dx = np.sqrt(3.0 * var)
+        e3 = np.sqrt(3.0 / var)
+
+        self.steps_ = []
+        self.sizes_ = [1]
+        q, jmin = np.ones(1), 0
+        for i in range(len(self)):
+            x = dx * np.arange(jmin, jmin + len(q))
+            phi = self.fit_(q, x, self.discounts[i+1], i)
+            r = x + phi if self.model == "HullWhite" else np.exp(x + phi)
+            df = np.exp(-r * dt)
+
+            m = x * decay
+            k = np.floor(m / dx + 0.5).astype(int)
+            e = m - k * dx
+            e2 = e * e / var
+            p = ((1.0 + e2 - e * e3) / 6.0,
+                 (2.0 - e2) / 3.0,
+                 (1.0 + e2 + e * e3) / 6.0)
+
+            nmin = k.min() - 1
+            nsize = k.max() + 2 - nmin
+            mid = k - nmin
+
+            qd = q * df
+            q = (np.bincount(mid - 1, qd * p[0], nsize) +
+                 np.bincount(mid, qd * p[1], nsize) +
+                 np.bincount(mid + 1, qd * p[2], nsize))
+
+            self.steps_.append((mid, p, df))
+            self.sizes_.append(nsize)
+            jmin = nmin
+
+    def rollback(self, values, i):
+        '''values (..., nodes at step i+1) discounted back to step i'''
+        mid, p, df = self.steps_[i]
+        return df * (p[0] * values[..., mid - 1] + p[1] * values[..., mid] +
+                     p[2] * values[..., mid + 1])
+
+    def size(self, i):
+        '''number of nodes at step i'''
+        return self.sizes_[i]
+
+    def time(self, date_):
+        return self.dayCounter.yearFraction(self.referenceDate, date_)
+
+    def snap(self, date_, amount=1.0):
+        '''
+        (step, amount) for a payment on date_, moved to the nearest step
+        with its value on the curve unchanged.
+        '''
+        t = self.time(date_)
+        step = int(round(t / self.dt))
+        assert step <= len(self), "ShortRateLattice: %s beyond horizon" % \
+                                  date_
+        return step, amount * self.discount(t, True) / self.discounts[step]
+
+def callFlows(asw, ratio=1.0, notional=100.0):
+    '''AssetSwap.callFlows: the flows of the swaption replicating the call'''
+    return asw.callFlows(ratio, notional)
+
+def callValues(lattice, flows, strike=100.0, spreads=0.0):
+    '''
+    Values of the swaptions given by flows (from callFlows, None for no
+    call), paying the floating spreads (scalar or per swaption), rolled
+    back together on lattice; 0.0 where there is no call.
+    '''
+    spreads = np.broadcast_to(np.asarray(spreads, dtype=float),
+                              (len(flows),))
+    dc = USDLiborSwap.floatingLegDayCounter
+
+    cash, exercise, accrual, starts = {}, {}, {}, {}
+    for n, flow in enumerate(flows):
+        if not flow:
+            continue
+        exdates, payments, floating = flow
+        for dt, amount in payments:
+            step, amount = lattice.snap(dt, amount)
+            cash.setdefault(step, {})
+            cash[step][n] = cash[step].get(n, 0.0) + amount
+        for dt in exdates:
+            if lattice.time(dt) >= 0.0:
+                step, k = lattice.snap(dt, strike)
+                exercise.setdefault(step, []).append((n, k))
+
+        # spread paid on each floating period, part of the swap exercised
+        # on or before the period start
+        notional = payments[-1][1]
+        for d0, d1 in floating if spreads[n] else []:
+            step, amount = lattice.snap(d1, -notional * spreads[n] *
+                                            dc.yearFraction(d0, d1))
+            accrual.setdefault(step, {})
+            accrual[step][n] = accrual[step].get(n, 0.0) + amount
+            starts.setdefault(lattice.snap(d0)[0], set()).add(n)
+
+    # roll back from the last payment, a shared lattice may run longer
+    last = max(list(cash) + list(accrual) + [0])
+    width = lattice.size(last)
+    underlying = np.zeros((len(flows), width))
+    option = np.zeros((len(flows), width))
+    accrued = np.zeros((len(flows), width)) if accrual else None
+    for i in range(last, -1, -1):
+        if i < last:
+            underlying = lattice.rollback(underlying, i)
+            option = lattice.rollback(option, i)
+            if accrual:
+                accrued = lattice.rollback(accrued, i)
+
+        # floating periods starting at step i join the underlying
+        for n in starts.get(i, ()):
+            underlying[n] += accrued[n]
+            accrued[n] = 0.0
+
+        # exercise into the flows paid after step i
+        for n, k in exercise.get(i, []):
+            option[n] = np.maximum(option[n], underlying[n] - k)
+
+        for n, amount in cash.get(i, {}).items():
+            underlying[n] += amount
+        for n, amount in accrual.get(i, {}).items():
+            accrued[n] += amount
+
+    return option[:, 0]
+
+def latticeCallValues(termstructure, assetswaps, vol, ratios=1.0,
+                      spreads=0.0, alpha=1e-7, model=ql.BlackKarasinski,
+                      stepsPerYear=ShortRateLattice.STEPS_PER_YEAR):
+    '''
+    Call values, per 100 notional, for AssetSwaps on termstructure at
+    floating spreads (scalar or per AssetSwap), from one lattice out to
+    the longest maturity, the curve's shared lattice
+    (TermStructureModel.shortRateLattice); compare USDLiborSwaption.value
+    on AssetSwap.callSwaption.
+    '''
+    ratios = np.broadcast_to(np.asarray(ratios, dtype=float),
+                             (len(assetswaps),))
+    flows = [callFlows(a, r) for a, r in zip(assetswaps, ratios.tolist())]
+
+    handle = termstructure.handle
+    refdate, dc = handle.referenceDate(), handle.dayCounter()
+    horizon = max([dc.yearFraction(refdate, f[1][-1][0])
+                   for f in flows if f] or [0.0])
+
+    lattice = termstructure.shortRateLattice(vol, horizon, alpha, model,
+                                             stepsPerYear)
+    return callValues(lattice, flows, spreads=spreads)
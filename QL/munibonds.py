@@ -28,14 +28,32 @@ class MuniBond(MuniBondType, SimpleBond):
     def __init__(self, coupon, maturity, callfeature=None,
                        oid=None,  issuedate=None,
                        redvalue=100.0, settledate=None):
+        self.qtax_ = {}
         SimpleBond.__init__(self, coupon, maturity, callfeature, 
                                   oid, issuedate, 
                                   redvalue, settledate)
         
+    def reset_(self):
+        '''drop state derived from settlement, including de minimis'''
+        SimpleBond.reset_(self)
+        self.qtax_ = {}
+        
     def qtax(self, settle=None, ptsyear=0.25):
-        """Calculate de minimus cut-off for market discount bonds"""
+        """Calculate de minimus cut-off for market discount bonds.
+        
+        Cached by (settlement, ptsyear, coupon, oid, redemption value); 
+        the cache is cleared when settlement changes.
+        """
         if settle or not self.settle_:
             self.setSettlement(settle)
+        
+        key = (self.settle_.serialNumber(), ptsyear, self.coupon, self.oid,
+               self.redvalue)
+        cached = self.qtax_.get(key, None)
+        if cached is not None:
+            (self.qtaxoid, self.qtaxrval, 
+             self.amddemin, self.qtaxyield) = cached
+            return self.qtaxyield
             
         if self.oid and self.oid > self.coupon:
             self.qtaxoid = self.oid
@@ -50,7 +68,10 @@ class MuniBond(MuniBondType, SimpleBond):
             self.qtaxyield = self.toYTM(self.qtaxrval - self.amddemin)
         except:
             self.qtaxyield = self.coupon
-            
+        
+        self.qtax_[key] = (self.qtaxoid, self.qtaxrval, 
+                           self.amddemin, self.qtaxyield)
+        
         return self.qtaxyield
     
     # TODO: allow after-tax yield to be passed in to get price.
@@ -0,0 +1,162 @@
+'''
+Portfolio OAS runner: AssetSwap.solveSpread over many bonds in a
+process pool.
+
+Bonds and the curve are sent to the workers as plain specs (serial
+numbers, floats, curve node data); each worker rebuilds its curve once
+and its bonds locally, so no QuantLib objects cross process boundaries.
+Results come back in input order and do not depend on the number of
+processes or the chunk size.
+
+Falls back to running in process where multiprocessing is not available
+(e.g. IronPython), or if processes=1; the caller's curve is then used as
+is, so the evaluation date and curve globals are left alone.
+
+Example:
+> results, errors = solveSpreads(bonds, prices, curve, vol=.15, 
+                                 spreadType="O", processes=4, chunksize=8)
+
+'''
+import logging
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.bonds import SimpleBond, Call
+from bgpy.QL.munibonds import MuniBond
+from bgpy.QL.ustbonds import USTBond
+from bgpy.QL.assetswap import AssetSwap, BondValues
+from bgpy.QL.termstructure import SimpleCurve
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+bondtypes = dict([(cls.__name__, cls) for cls in (SimpleBond, MuniBond,
+                                                  USTBond)])
+models = {'BlackKarasinski': ql.BlackKarasinski,
+          'HullWhite': ql.HullWhite}
+
+def serial_(dt):
+    return dt.serialNumber() if dt else None
+
+def date_(serial):
+    return ql.Date(serial) if serial else None
+
+def bondSpec(bond):
+    '''plain description of a bond, rebuilt by specBond'''
+    call = bond.callfeature
+    callspec = (serial_(call.firstcall), call.callprice,
+                serial_(call.parcall), int(call.frequency)) if call else None
+
+    return {'type': bond.__class__.__name__,
+            'coupon': bond.coupon,
+            'maturity': serial_(bond.maturity),
+            'call': callspec,
+            'oid': bond.oid,
+            'issuedate': serial_(bond.issuedate),
+            'redvalue': bond.redvalue,
+            'settle': serial_(bond.settlementDate)}
+
+def specBond(spec):
+    '''bond from bondSpec'''
+    call = None
+    if spec['call']:
+        firstcall, callprice, parcall, frequency = spec['call']
+        call = Call(date_(firstcall), callprice, date_(parcall), frequency)
+
+    return bondtypes[spec['type']](spec['coupon'],
+                                   date_(spec['maturity']),
+                                   call, spec['oid'],
+                                   date_(spec['issuedate']),
+                                   spec['redvalue'],
+                                   date_(spec['settle']))
+
+def curveSpec(curve):
+    '''plain description of a SimpleCurve: node data and curve date'''
+    return {'curvedata': dict(curve.curvedata),
+            'curvedate': serial_(curve.curvedate),
+            'datadivisor': curve.datadivisor,
+            'settledays': curve.settledays,
+            'setIborIndex': curve.setIborIndex}
+
+def specCurve(spec):
+    '''SimpleCurve from curveSpec'''
+    return SimpleCurve(spec['curvedata'], date_(spec['curvedate']),
+                       datadivisor=spec['datadivisor'],
+                       settledays=spec['settledays'],
+                       setIborIndex=spec['setIborIndex'])
+
+# per process curve, built once by the pool initializer
+_curve = {}
+
+def initWorker(curvespec):
+    _curve['spec'] = curvespec
+    _curve['curve'] = specCurve(curvespec)
+
+def errorText(e):
+    return "%s: %s" % (e.__class__.__name__, e)
+
+def solveOne(task, curve=None):
+    '''
+    solveSpread for one (bondspec, price, kwargs) task, on curve or the 
+    worker's curve; returns (plain dict of BondValues, None), or 
+    (None, error text) on failure.
+    '''
+    bondspec, price, kwargs = task
+    kwargs = dict(kwargs)
+    kwargs['model'] = models[kwargs.get('model', 'BlackKarasinski')]
+
+    try:
+        bond = specBond(bondspec)
+        values = AssetSwap(bond).solveSpread(curve or _curve['curve'], price, 
+                                             **kwargs)
+    except Exception as e:
+        logging.info("solveSpread failed for %s: %s" % (bondspec, e))
+        return None, errorText(e)
+
+    values = dict(values)
+    values['model'] = kwargs['model'].__name__
+    return values, None
+
+def result_(values):
+    '''BondValues from a worker result, model name mapped to its class'''
+    if values is None:
+        return None
+    values = BondValues(values)
+    values['model'] = models.get(values['model'], values['model'])
+    return values
+
+def solveSpreads(bonds, prices, curve, processes=None, chunksize=8,
+                 **kwargs):
+    '''
+    AssetSwap.solveSpread for each bond at the matching price on a
+    SimpleCurve.  kwargs as solveSpread: vol, baseSpread, baseRatio,
+    solveRatio, spreadType, model, calc_risk; model may be given as a
+    class or as 'BlackKarasinski' / 'HullWhite'.
+
+    processes:  pool size, default cpu count; 1 runs in this process
+    chunksize:  bonds per task sent to a worker
+
+    returns (results, errors): list of BondValues in the order of bonds,
+    None where the solve failed, and {bond index: error text} for the 
+    failures.
+    '''
+    model = kwargs.get('model', 'BlackKarasinski')
+    kwargs['model'] = getattr(model, "__name__", model)
+
+    tasks = [(bondSpec(b), p, kwargs) for b, p in zip(bonds, prices)]
+
+    if multiprocessing is None or processes == 1:
+        results = [solveOne(task, curve) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes, initWorker, 
+                                    (curveSpec(curve),))
+        try:
+            results = pool.map(solveOne, tasks, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+
+    errors = dict([(n, e) for n, (values, e) in enumerate(results) if e])
+    return [result_(values) for values, e in results], errors
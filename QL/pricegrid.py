@@ -0,0 +1,223 @@
+'''
+Price/yield grids for fast repricing of a bond at nearby levels.
+
+A grid tabulates price to worst against yield (and yield to worst against
+price) at the bond's settlement, with exact values and slopes at the
+nodes, and interpolates with monotone cubic Hermite splines.
+
+Price to worst is only smooth while the bond is priced to the same leg
+(maturity or one call); where the worst leg changes there is a kink that
+checks at fixed points can step over.  So each interval is first split
+where the worst leg changes, the switch located by bisection, leaving a
+gap of negligible width that is never served.  On an interval priced to
+one leg the Hermite error t^2(1-t)^2 h^4 f(4)/24 peaks at the midpoint,
+and the interval is checked there and at its quarter points and split
+until the checked error, times a safety factor, is within tolerance; an
+interval that cannot be brought within tolerance is flagged.  Lookups in
+flagged intervals and gaps return None so the caller falls back to the
+solver.
+
+Example:
+> bond.setPriceGrid(lo=.005, hi=.08, tol=1e-6)
+> bond.toPrice(.0412)     # from the grid
+> bond.priceGrid()        # <PriceGrid: ...>
+
+'''
+from bisect import bisect_right
+
+import bgpy.__QuantLib as ql
+
+from bgpy.math import hermite, monotoneSlopes
+
+class GridTable(object):
+    '''
+    Monotone Hermite table of f over [lo, hi], from func(x) -> (f, df/dx,
+    leg), leg identifying the smooth piece of f that x is on.
+
+    intervals are (x0, x1, f0, f1, d0, d1, err, leg), err is the largest
+    interpolation error found at the checked points, None for the gap
+    around a change of leg.
+    '''
+    CHECKPOINTS = (0.25, 0.5, 0.75)
+
+    def __init__(self, func, lo, hi, nodes=16, tol=1e-6, maxdepth=5,
+                 safety=2.0):
+        self.func = func
+        self.lo, self.hi = float(lo), float(hi)
+        self.tol = tol
+        self.safety = safety
+        self.xtol = (self.hi - self.lo) * 1e-10
+        self.evaluations = 0
+
+        step = (self.hi - self.lo) / nodes
+        xs = [self.lo + n * step for n in range(nodes)] + [self.hi]
+        points = [self.value_(x) for x in xs]
+
+        self.intervals = []
+        for n in range(nodes):
+            self.build_(points[n], points[n+1], maxdepth)
+
+        self.nodes = [iv[0] for iv in self.intervals]
+
+    def value_(self, x):
+        self.evaluations += 1
+        f, d, leg = self.func(x)
+        return (x, f, d, leg)
+
+    def switch_(self, p0, p1):
+        '''points either side of the change of leg between p0 and p1'''
+        while p1[0] - p0[0] > self.xtol:
+            pm = self.value_(0.5 * (p0[0] + p1[0]))
+            if pm[3] == p0[3]:
+                p0 = pm
+            else:
+                p1 = pm
+        return p0, p1
+
+    def build_(self, p0, p1, depth):
+        (x0, f0, d0, leg), (x1, f1, d1, leg1) = p0, p1
+        if x1 <= x0:
+            return
+
+        checks = []
+        if leg == leg1:
+            checks = [self.value_(x0 + t * (x1 - x0)) 
+                      for t in self.CHECKPOINTS]
+
+        # split where the leg changes, leaving a gap that is not served
+        points = [p0] + checks + [p1]
+        for a, b in zip(points[:-1], points[1:]):
+            if a[3] != b[3]:
+                pa, pb = self.switch_(a, b)
+                self.build_(p0, pa, depth)
+                self.intervals.append((pa[0], pb[0], pa[1], pb[1], 
+                                       pa[2], pb[2], None, None))
+                self.build_(pb, p1, depth)
+                return
+
+        s0, s1 = monotoneSlopes(x0, x1, f0, f1, d0, d1)
+        err = max([abs(hermite(x, x0, x1, f0, f1, s0, s1) - f)
+                   for x, f, d, leg_ in checks])
+
+        if err * self.safety > self.tol and depth > 0:
+            pm = checks[len(checks) // 2]
+            self.build_(p0, pm, depth - 1)
+            self.build_(pm, p1, depth - 1)
+        else:
+            self.intervals.append((x0, x1, f0, f1, s0, s1, err, leg))
+
+    def lookup(self, x):
+        '''
+        (interpolated value, leg), None if outside the table or tolerance
+        '''
+        if not (self.lo <= x <= self.hi):
+            return None
+
+        n = max(bisect_right(self.nodes, x) - 1, 0)
+        x0, x1, f0, f1, d0, d1, err, leg = self.intervals[n]
+        if err is None or err * self.safety > self.tol:
+            return None
+
+        return (hermite(x, x0, x1, f0, f1, d0, d1), leg)
+
+    def __call__(self, x):
+        '''interpolated value, None if outside the table or tolerance'''
+        value = self.lookup(x)
+        return value[0] if value else None
+
+    def errorBound(self):
+        '''largest checked error over intervals within tolerance'''
+        return max([iv[6] for iv in self.intervals
+                    if iv[6] is not None and iv[6] * self.safety <= self.tol] 
+                   or [0.0])
+
+    def __len__(self):
+        return len(self.intervals)
+
+class PriceGrid(object):
+    '''
+    Price to worst as a function of yield, and yield to worst as a
+    function of price, for a bond at its current settlement.
+
+    lo, hi:   yield range of the price table; the yield table covers the
+              matching price range
+    tol:      price tolerance
+    ytol:     yield tolerance, default tol/100
+
+    The tables are built on first use.  hits/misses count lookups.
+    '''
+    def __init__(self, bond, lo=0.0025, hi=0.12, tol=1e-6, ytol=None,
+                 nodes=16):
+        self.bond = bond
+        self.lo, self.hi = lo, hi
+        self.tol = tol
+        self.ytol = ytol if ytol else tol / 100.0
+        self.nodes = nodes
+        self.prices_ = None
+        self.yields_ = None
+        self.hits = 0
+        self.misses = 0
+
+    def priceFunc_(self, yld):
+        '''unrounded price to worst, so checks measure the Hermite error'''
+        bond = self.bond
+        price, todate, toprice, toterm = bond.toWorst(yld)
+        price, dprice = bond.ytmRisk(yld, toprice, toterm, None)[:2]
+        return (price, dprice, (todate.serialNumber(), toprice))
+
+    def yieldFunc_(self, price):
+        bond = self.bond
+        yld, todate, toprice, toterm = bond.toWorst(price, 'toYTM', True)
+        return (yld, 1.0 / bond.ytmRisk(yld, toprice, toterm)[1],
+                (todate.serialNumber(), toprice))
+
+    def priceTable(self):
+        if self.prices_ is None:
+            self.prices_ = GridTable(self.priceFunc_, self.lo, self.hi,
+                                     self.nodes, self.tol)
+        return self.prices_
+
+    def yieldTable(self):
+        if self.yields_ is None:
+            prices = self.priceTable().intervals
+            lo, hi = prices[-1][3], prices[0][2]
+            self.yields_ = GridTable(self.yieldFunc_, lo, hi, self.nodes,
+                                     self.ytol)
+        return self.yields_
+
+    def lookup_(self, table, x):
+        value = table.lookup(x)
+        if value is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        value, (serial, toprice) = value
+        return (value, ql.Date(serial), toprice)
+
+    def price(self, yld):
+        '''
+        (price to worst, toDate, toPrice) from the grid, None if not within
+        tolerance.  A yield equal to the coupon prices at 100 exactly 
+        (SimpleBond.ytmToPrice), off the grid.
+        '''
+        if yld == self.bond.coupon:
+            return None
+        value = self.lookup_(self.priceTable(), yld)
+        return value if value is None else (round(value[0], 6),) + value[1:]
+
+    def bondyield(self, price):
+        '''
+        (yield to worst, toDate, toPrice) from the grid, None if not within
+        tolerance.  A price of 100 yields the coupon (SimpleBond.toYTM), 
+        off the grid.
+        '''
+        if abs(price - 100.0) < 1e-7:
+            return None
+        return self.lookup_(self.yieldTable(), price)
+
+    def __repr__(self):
+        return "<PriceGrid: %s to %s, %d hits, %d misses>" % (self.lo,
+                                                              self.hi,
+                                                              self.hits,
+                                                              self.misses)
@@ -76,6 +76,7 @@ class RatioCurve(TermStructureModel):
         self.interp = interp
         
         self.muniswap_helpers = None
+        self.parratios_ = None
         if curvedata:
             self.update(disc_termstr, curvedata)
     
@@ -99,6 +100,9 @@ class RatioCurve(TermStructureModel):
                                                     helper=RatioHelper)
                                                
         bootstrap_ = self.bootstrap(self.muniswap_helpers.list)
+        self.nodes_ = sorted([h.maturity(self.settlement) 
+                              for h in self.muniswap_helpers.list],
+                             key=lambda x: x.serialNumber())
         
         datevector = bootstrap_.keys()
         datevector.sort(key=lambda x: x.serialNumber())
@@ -111,6 +115,9 @@ class RatioCurve(TermStructureModel):
                               
         curve_.enableExtrapolation()   
         self.curve.linkTo(curve_)
+        
+        # par ratio table is rebuilt for the new curve on first use
+        self.parratios_ = None
     
     def forwardRatio(self, begdate, enddate):
         '''
@@ -135,6 +142,9 @@ class RatioCurve(TermStructureModel):
         discount = lbrcrv.discount              #function calls
         advance = self.calendar.advance         #function calls
         tnr = Tenor(tenor)
+        if tnr.unit == 'Y' and tnr.length > 0:
+            return self.parRatioTable(tnr.length)[tnr.length]
+            
         if tnr.unit != 'Y':
             zeroRate = self.zeroRate
             enddt = Tenor(tenor).advance(self.settlement)
@@ -156,6 +166,56 @@ class RatioCurve(TermStructureModel):
         
         return sum2/sum1
     
+    def parRatioTable(self, years):
+        '''
+        Par ratios by year: entry n is parRatio('nY') for n = 1..years, 
+        entry 0 is parRatio('1W').
+        
+        All years come from one cumulative walk of the quarterly schedule,
+        kept between calls and extended as longer years are needed.  The 
+        table is reset by update, and rebuilt if the discount curve has 
+        moved since (see tableKey_).
+        '''
+        key = self.tableKey_()
+        if self.parratios_ is None or key != self.tablekey_:
+            self.tablekey_ = key
+            start = self.calendar.advance(self.settlement, 0, ql.Months, 
+                                          ql.ModifiedFollowing)
+            self.parratios_ = [self.parRatio('1W')]
+            self.ratiowalk_ = (0, start, 0.0, 0.0)
+        
+        if len(self.parratios_) <= years:
+            fwdratio = self.forwardPayment
+            fwdlbr = self.disc_termstr.forwardPayment
+            discount = self.disc_termstr.discount
+            advance = self.calendar.advance
+            
+            n, d0, sum1, sum2 = self.ratiowalk_
+            while len(self.parratios_) <= years:
+                for q in range(4):
+                    n += 3
+                    dt = advance(self.settlement, n, ql.Months, 
+                                 ql.ModifiedFollowing)
+                    df = discount(dt, True)
+                    sum1 += df * fwdlbr(d0, dt)
+                    sum2 += df * fwdratio(d0, dt)
+                    d0 = dt
+                    
+                self.parratios_.append(sum2/sum1)
+                
+            self.ratiowalk_ = (n, d0, sum1, sum2)
+        
+        return self.parratios_
+        
+    def tableKey_(self):
+        '''
+        Discount curve state the par ratio table depends on: its reference 
+        date and discount factors at the ratio curve's instrument maturities.
+        '''
+        discount = self.disc_termstr.discount
+        return (self.disc_termstr.referenceDate().serialNumber(),
+                tuple([discount(d, True) for d in self.nodes_]))
+        
     def maturityRatio(self, maturity):
         maturity = toDate(maturity)
         nYears = ql.ActualActual().yearFraction(self.referenceDate(), maturity)
@@ -164,8 +224,8 @@ class RatioCurve(TermStructureModel):
         y1 = y0 + 1
         f = nYears - float(y0)
         
-        r0 = self.parRatio("%s" % y0) if y0 > 0 else self.parRatio('1W')
-        r1 = self.parRatio("%s" % y1)
+        ratios = self.parRatioTable(y1)
+        r0, r1 = ratios[y0], ratios[y1]
         
         ratio = r0 * (1-f) + r1 * f
         
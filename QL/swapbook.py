@@ -0,0 +1,234 @@
+'''
+Vectorized valuation of a book of USD Libor swaps.
+
+Swaps follow USDLiborSwap conventions: fixed leg semiannual 30/360
+unadjusted, floating leg 3M Libor actual/360 modified following, single
+curve.  Schedules for the whole book are generated as arrays when the book
+is created; each valuation looks up discount factors once per distinct
+date across the whole book (curvepricing.discountArrays) and sums the legs
+as arrays.  Floating rates are Libor forwards from each coupon's fixing
+value date to the next coupon's, as QuantLib's par IborCoupon; swaps with
+a live coupon fixed before the evaluation date are rejected, there being
+no fixings to value them with.
+
+Requires numpy (not available under IronPython).
+
+Example:
+> book = SwapBook(starts, ends, rates, spreads=0.0, notionals=1e6)
+> book.value(curve)['npv']
+> book.value(curve.shift_up)['npv']
+
+'''
+import numpy as np
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.bgdate import toDate
+from bgpy.QL.irswaps import USDLiborSwap
+from bgpy.QL.curvepricing import discountArrays, termstructureOf
+
+EPOCH_ = np.datetime64('1899-12-30')
+
+def monthDates_(year, month, day, months):
+    '''
+    serials (and year, month, day) of dates months after year/month/day,
+    unadjusted, day clipped to month end, as Calendar.advance
+    '''
+    mon = ((year - 1970) * 12 + month - 1 + months).astype('datetime64[M]')
+    first = mon.astype('datetime64[D]')
+    monthend = (mon + 1).astype('datetime64[D]') - first
+    day = np.minimum(day, monthend.astype(int))
+    serial = (first + (day - 1) - EPOCH_).astype(int)
+
+    mon = mon.astype(int)
+    return serial, mon // 12 + 1970, mon % 12 + 1, day
+
+def lookup_(serials, func):
+    '''serials of func (ql.Date to ql.Date), one call per distinct date'''
+    unique, inverse = np.unique(serials, return_inverse=True)
+    mapped = [func(ql.Date(d)).serialNumber() for d in unique.tolist()]
+    return np.array(mapped, dtype=int)[np.ravel(inverse)]
+
+def adjust_(serials, convention, calendar=USDLiborSwap.calendar):
+    '''serials adjusted by convention, one calendar lookup per date'''
+    if convention == ql.Unadjusted:
+        return serials
+    return lookup_(serials, lambda d: calendar.adjust(d, convention))
+
+def thirty360_(s0, y0, m0, d0, s1, y1, m1, d1):
+    '''Thirty360 (bond basis) year fractions'''
+    d0 = np.minimum(d0, 30)
+    d1 = np.where((d1 == 31) & (d0 == 30), 30, d1)
+    return (360 * (y1 - y0) + 30 * (m1 - m0) + (d1 - d0)) / 360.0
+
+def actual360_(s0, y0, m0, d0, s1, y1, m1, d1):
+    '''Actual360 year fractions'''
+    return (s1 - s0) / 360.0
+
+class SwapBook(object):
+    '''
+    Book of swaps, one per element of starts, ends, fixedRates; spreads
+    (on the floating leg), notionals and payer (True pays fixed, as
+    USDLiborSwap PayFlag=1) are scalars or one per swap.
+    '''
+    # period, date adjustment and day count (USDLiborSwap's) per leg
+    legs = {'fixed': (USDLiborSwap.fixedLegPeriod,
+                      USDLiborSwap.fixedLegAdjustment,
+                      thirty360_),
+            'floating': (USDLiborSwap.floatingLegPeriod,
+                         USDLiborSwap.floatingLegAdjustment,
+                         actual360_)}
+    paymentConvention = USDLiborSwap.floatingLegAdjustment
+    libor = ql.USDLibor(USDLiborSwap.floatingLegPeriod)
+
+    def __init__(self, starts, ends, fixedRates, spreads=0.0,
+                 notionals=100.0, payer=True):
+        starts = [toDate(d) for d in starts]
+        ends = [toDate(d) for d in ends]
+        size = (len(starts),)
+
+        self.fixedRates = np.broadcast_to(np.asarray(fixedRates, dtype=float),
+                                          size)
+        self.spreads = np.broadcast_to(np.asarray(spreads, dtype=float), size)
+        self.notionals = np.broadcast_to(np.asarray(notionals, dtype=float),
+                                         size)
+        self.sign = np.where(np.broadcast_to(np.asarray(payer, dtype=bool),
+                                             size), 1.0, -1.0)
+
+        self.periods_ = dict([(leg, self.periods(starts, ends, leg))
+                              for leg in self.legs])
+        self.periods_['floating'].update(self.fixings(
+                                             self.periods_['floating']))
+
+    def __len__(self):
+        return len(self.fixedRates)
+
+    def periods(self, starts, ends, leg):
+        '''
+        accrual periods of a leg for all swaps, forward generated from 
+        start to end as ql.Schedule: 
+        {'swap': swap index, 'start', 'end': serials, 'tau': accrual}
+        '''
+        period, convention, dc = self.legs[leg]
+        step = period.length() * (12 if period.units() == ql.Years else 1)
+        
+        ymd = lambda dates: [np.array(x, dtype=int) for x in 
+                             zip(*[(d.year(), d.month(), d.dayOfMonth())
+                                   for d in dates])]
+        y0, m0, d0 = ymd(starts)
+        y1, m1, d1 = ymd(ends)
+        endserial = np.array([d.serialNumber() for d in ends], dtype=int)
+        
+        # regular dates start + k periods, k = 0..K, kept while before end
+        nmonths = 12 * (y1 - y0) + (m1 - m0)
+        count = nmonths // step + 1
+        swap = np.repeat(np.arange(len(starts)), count)
+        k = np.arange(len(swap)) - np.repeat(np.cumsum(count) - count, count)
+        dates = monthDates_(y0[swap], m0[swap], d0[swap], k * step)
+        keep = (dates[0] < endserial[swap]) | (k == 0)
+        
+        # append end dates, sort dates by swap
+        swap = np.concatenate((swap[keep], np.arange(len(starts))))
+        dates = [np.concatenate((x[keep], e)) for x, e in 
+                 zip(dates, (endserial, y1, m1, d1))]
+        order = np.lexsort((dates[0], swap))
+        swap = swap[order]
+        serial, year, month, day = [x[order] for x in dates]
+        
+        serial = adjust_(serial, convention)
+        
+        # periods run from each date to the next date of the same swap
+        first = np.ones(len(swap), dtype=bool)
+        first[1:] = swap[1:] != swap[:-1]
+        s0, s1 = np.flatnonzero(~first) - 1, np.flatnonzero(~first)
+        
+        tau = dc(serial[s0], year[s0], month[s0], day[s0], 
+                 serial[s1], year[s1], month[s1], day[s1])
+        
+        # VanillaSwap pays both legs on the floating leg convention
+        return {'swap': swap[s1],
+                'start': serial[s0],
+                'end': serial[s1],
+                'pay': adjust_(serial[s1], self.paymentConvention),
+                'tau': tau}
+        
+    def fixings(self, periods):
+        '''
+        Libor fixing dates of floating periods, and the value and end dates
+        of the forwards they project, as QuantLib's par IborCoupon: 
+        {'fixing', 'fixstart', 'fixend': serials}
+        '''
+        calendar, days = self.libor.fixingCalendar(), self.libor.fixingDays()
+        shift = lambda n: lambda d: calendar.advance(d, n, ql.Days)
+        
+        fixing = lookup_(periods['start'], shift(-days))
+        fixstart = lookup_(fixing, shift(days))
+        fixend = lookup_(lookup_(periods['end'], shift(-days)), shift(days))
+        return {'fixing': fixing,
+                'fixstart': fixstart,
+                'fixend': np.maximum(fixend, fixstart + 1)}
+        
+    def value(self, termstructure):
+        '''
+        Values on termstructure, arrays over swaps:
+            npv:           to the fixed payer (receiver, if not payer)
+            fixedNPV:      fixed leg
+            floatNPV:      floating leg, including spread
+            annuity:       fixed leg value of a 1.0 rate (BPS * 1e4)
+            floatAnnuity:  floating leg value of a 1.0 spread
+            fairRate:      fixed rate for zero npv
+        Cash flows on or before the curve reference date are excluded.
+        Raises ValueError if a live floating coupon fixed before the 
+        evaluation date, i.e. a swap started before the curve reference 
+        date.
+        '''
+        fixed, floating = self.periods_['fixed'], self.periods_['floating']
+        nswaps, nfixed = len(self), len(fixed['end'])
+
+        refserial = termstructureOf(termstructure).curve.referenceDate() \
+                                                   .serialNumber()
+        fixedlive = fixed['pay'] > refserial
+        fltlive = floating['pay'] > refserial
+        
+        evalserial = ql.Settings.instance().getEvaluationDate().serialNumber()
+        seasoned = fltlive & (floating['fixing'] < evalserial)
+        if seasoned.any():
+            n = np.flatnonzero(seasoned)[0]
+            raise ValueError("SwapBook.value: swap %d has a coupon fixed on "
+                             "%s, before the evaluation date" % 
+                             (floating['swap'][n], 
+                              ql.Date(int(floating['fixing'][n]))))
+        
+        dfs = discountArrays(termstructure,
+                             np.concatenate((fixed['pay'], floating['pay'],
+                                             floating['fixstart'],
+                                             floating['fixend'])))[0]
+        fixeddf = dfs[:nfixed]
+        enddf, startdf, fixenddf = np.split(dfs[nfixed:], 3)
+        
+        # Libor forwards, actual/360 over the fixing period
+        forward = (startdf / fixenddf - 1.0) * 360.0 / \
+                  (floating['fixend'] - floating['fixstart'])
+
+        swap = fixed['swap']
+        annuity = np.bincount(swap, fixed['tau'] * fixeddf * fixedlive,
+                              nswaps) * self.notionals
+
+        swap = floating['swap']
+        floatAnnuity = np.bincount(swap, floating['tau'] * enddf * fltlive,
+                                   nswaps) * self.notionals
+        forecast = np.bincount(swap, forward * floating['tau'] * enddf * 
+                                     fltlive, nswaps) * self.notionals
+
+        fixedNPV = self.fixedRates * annuity
+        floatNPV = forecast + self.spreads * floatAnnuity
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fairRate = floatNPV / annuity
+
+        return {'npv': self.sign * (floatNPV - fixedNPV),
+                'fixedNPV': fixedNPV,
+                'floatNPV': floatNPV,
+                'annuity': annuity,
+                'floatAnnuity': floatAnnuity,
+                'fairRate': fairRate}
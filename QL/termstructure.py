@@ -4,12 +4,24 @@ Term Structure Classes--a set of wrappers around QuantLib
 Created on May 26, 2010
 @author: bartmosley
 '''
+from collections import OrderedDict
+from math import ceil
+
 import bgpy.__QuantLib as ql
 
 from bgpy.QL.bgdate import toDate
 from bgpy.QL.tenor import Tenor
 from bgpy.math.solvers import Secant
 from termstructurehelpers import HelperWarehouse, SwapRate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    # short-rate lattices shared by bonds on a curve
+    from bgpy.QL.lattice import ShortRateLattice
         
 class TermStructureModel(object):
     '''
@@ -19,12 +31,17 @@ class TermStructureModel(object):
     term_daycount = ql.Thirty360()
     daycount = ql.ActualActualISDA
     calendar = ql.TARGET()
+    
+    # short-rate lattices kept per curve, oldest dropped first
+    MAX_LATTICES = 4
 
     def __init__(self, datadivisor=1.000, settledays=2, label=None):
         
         self.label = label
         self.datadivisor = datadivisor
         self.settledays = settledays
+        self.lattices_ = OrderedDict()
+        self.keyrates_ = {}
         
         # TODO:  need to refactor to self.curve_
         self.curve = ql.RelinkableYieldTermStructureHandle()
@@ -89,9 +106,42 @@ class TermStructureModel(object):
                              model=ql.BlackKarasinski): 
         '''
         models supported: BlackKarasinski, HullWhite
+        
+        QuantLib builds the tree on each valuation, at the swaption's 
+        exercise dates; for a lattice shared across bonds and solver 
+        iterations see shortRateLattice.
         '''
         return ql.TreeSwaptionEngine(model(self.handle, alpha, vol), 
                                      timeSteps, self.handle)
+    
+    def shortRateLattice(self, vol, horizon, alpha=1e-7, 
+                         model=ql.BlackKarasinski, stepsPerYear=None):
+        '''
+        numpy ShortRateLattice on this curve out to at least horizon 
+        years (rounded up to whole years, so the time grid is the same for
+        every horizon), kept and shared by all bonds valued at the same 
+        vol, alpha, model and steps.  A kept lattice is used while the 
+        curve's discount factors are those it was fitted to, so spread 
+        changes on a SpreadedCurve, or a relinked curve, rebuild it.
+        Requires numpy.
+        '''
+        stepsPerYear = stepsPerYear or ShortRateLattice.STEPS_PER_YEAR
+        key = (getattr(model, "__name__", model), alpha, vol, stepsPerYear)
+        horizon = max(ceil(horizon), 1.0)
+        
+        lattice = self.lattices_.pop(key, None)
+        if lattice is None or lattice.horizon < horizon or not lattice.fits():
+            lattice = ShortRateLattice(self, vol, horizon, alpha, model, 
+                                       stepsPerYear)
+            
+        self.lattices_[key] = lattice
+        while len(self.lattices_) > self.MAX_LATTICES:
+            self.lattices_.popitem(last=False)
+            
+        return lattice
+    
+    def clearLattices(self):
+        self.lattices_.clear()
 
     def forwardDepo(self, begDate, endDate, dc=depo_daycount):
         '''
@@ -166,6 +216,23 @@ class TermStructureModel(object):
         
         return 2.0 * sum(fltPvals) / sum(fixedPvals[1:])
     
+    def discounts(self, serials):
+        '''
+        Discount factors and times from the reference date for a batch of 
+        date serial numbers: the curve is queried once per distinct date.
+        Times are on the curve's day counter, as SpreadedCurve's spread.
+        returns {serial: (discount, time)}
+        '''
+        refdate = self.curve.referenceDate()
+        discount = self.curve.discount
+        yearFraction = self.curve.dayCounter().yearFraction
+        
+        values = {}
+        for serial in set(serials):
+            dt = ql.Date(int(serial))
+            values[serial] = (discount(dt, True), yearFraction(refdate, dt))
+        return values
+    
     def pfile(self, num=360, timeunit=ql.Months):
         discount = self.curve.discount
         advance = lambda x: ql.TARGET().advance(self.curve.referenceDate(), 
@@ -177,7 +244,29 @@ class TermStructureModel(object):
         self._shift_dn = SpreadedCurve(self, shock, spreadType)
         return True
     
+    KEYRATE_TENORS = ('2Y', '5Y', '10Y', '20Y', '30Y')
+    
+    def keyRateCurves(self, tenors=KEYRATE_TENORS, shock=0.0001):
+        '''
+        Key rate scenarios: list of (shift_up, shift_dn) KeyRateCurves, 
+        one pair per tenor, built once per curve and shared by every bond 
+        valued against them.  As with scenarios, "up" is the price-up 
+        (rate-down) shift.
+        '''
+        key = (tuple(tenors), shock)
+        curves = self.keyrates_.get(key, None)
+        if curves is None:
+            dates = [Tenor(t).advance(self.settlement) for t in tenors]
+            curves = [(KeyRateCurve(self, dates, n, -1.*shock),
+                       KeyRateCurve(self, dates, n, shock))
+                      for n in range(len(dates))]
+            self.keyrates_[key] = curves
+            
+        return curves
+    
     def clear_scenarios(self):
+        self.clearLattices()
+        self.keyrates_.clear()
         if hasattr(self, "_shift_up"):
             delattr(self, "_shift_up")
         if hasattr(self, "_shift_dn"):
@@ -336,6 +425,7 @@ class ZCurve(TermStructureModel):
         curve.enableExtrapolation()
         
         self.curve.linkTo(curve)
+        self.clearLattices()
     
     def from_pfile(self, settle, curvedata, timeunit=ql.Months, datadivisor=1.0):
         advance = lambda x: self.calendar.advance(settle, x, timeunit)
@@ -391,4 +481,37 @@ class SpreadedCurve(TermStructureModel):
         else:
             return "<SimpleCurve>"
             
-    spread = property(getSpread, setSpread)    
+    spread = property(getSpread, setSpread)
+
+class KeyRateCurve(TermStructureModel):
+    '''KeyRateCurve(termstructure, dates, key, shock=0.0001)
+    
+    Termstructure with a zero spread of shock at dates[key], falling 
+    linearly to zero at the neighbouring key dates, flat before the first 
+    and after the last key date.  The shifts over all keys sum to a 
+    parallel Z shift.
+    
+    '''
+    def __init__(self, termstructure, dates, key, shock=0.0001):
+        TermStructureModel.__init__(self, termstructure.datadivisor, 
+                                          termstructure.settledays, 
+                                          termstructure.label)
+                                          
+        self.curvedate_ = termstructure.curvedate
+        self.settlement_ = termstructure.settlement
+        
+        self.keydate = dates[key]
+        self.shock = shock
+        
+        self.spreads_ = [ql.SimpleQuote(shock if n == key else 0.0)
+                         for n in range(len(dates))]
+        handles = ql.QuoteHandleVector([ql.QuoteHandle(q) 
+                                        for q in self.spreads_])
+        curve = ql.PiecewiseZeroSpreadedTermStructure(termstructure.handle,
+                                                      handles,
+                                                      ql.DateVector(dates))
+        curve.enableExtrapolation()
+        self.curve.linkTo(curve)
+    
+    def __str__(self):
+        return "<KeyRateCurve %s %+g>" % (self.keydate, self.shock)    
@@ -0,0 +1,5 @@
+'''
+Tests for bgpy.QL
+
+Run with: python -m unittest discover -s bgpy -t <parent of bgpy>
+'''
@@ -0,0 +1,26 @@
+'''
+Shared fixtures: evaluation date, settlement and flat curves.
+'''
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.termstructure import TermStructureModel
+
+EVALDATE = ql.Date(15, 11, 2010)
+SETTLE = ql.Date(17, 11, 2010)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def setEvaluationDate():
+    ql.Settings.instance().setEvaluationDate(EVALDATE)
+
+def flatCurve(rate=.04, refdate=SETTLE):
+    '''TermStructureModel on a flat forward curve'''
+    setEvaluationDate()
+    curve = TermStructureModel()
+    curve.curve.linkTo(ql.FlatForward(refdate, rate, ql.Actual365Fixed()))
+    curve.settlement_ = SETTLE
+    curve.curvedate_ = EVALDATE
+    return curve
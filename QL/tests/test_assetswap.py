@@ -0,0 +1,221 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+from bgpy.QL.bonds import SimpleBond, Call
+from bgpy.QL.irswaps import USDLiborSwaption
+from bgpy.QL.tests.common import SETTLE, flatCurve
+
+def callableBond(coupon=.05, callprice=100.):
+    return SimpleBond(coupon, ql.Date(1, 6, 2030), 
+                      Call(ql.Date(1, 6, 2015), callprice), 
+                      settledate=SETTLE)
+
+class CallSwaptionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.curve = flatCurve()
+        self.asw = AssetSwap(callableBond())
+
+    def fresh(self, spread, ratio=1.0):
+        return USDLiborSwaption(self.curve, ql.Date(1, 6, 2015), 
+                                ql.Date(1, 6, 2030), 
+                                self.asw.callCouponRate(ratio), PayFlag=0,
+                                spread=spread, bermudan=True)
+
+    def testSpreadReusesSwaption(self):
+        swaption = self.asw.callSwaption(self.curve, .001)
+        for spread in (.002, -.001, 0.0):
+            self.assertTrue(self.asw.callSwaption(self.curve, spread) 
+                            is swaption)
+            self.assertEqual(swaption.spread, spread)
+            self.assertEqual(swaption.value(.15, self.curve),
+                             self.fresh(spread).value(.15, self.curve))
+
+    def testRatioRebuilds(self):
+        swaption = self.asw.callSwaption(self.curve, .001)
+        self.assertFalse(self.asw.callSwaption(self.curve, .001, 1.1) 
+                         is swaption)
+
+    def testAswValueMatchesFreshAssetSwap(self):
+        for spread in (.003, .001, .002):
+            fresh = AssetSwap(callableBond())
+            self.assertEqual(self.asw.aswValue(self.curve, spread, 1.0, .15),
+                             fresh.aswValue(self.curve, spread, 1.0, .15))
+
+    def testSolverKeywordIgnored(self):
+        for valueFunc in (self.asw.aswValue, self.asw.oasValue):
+            self.assertEqual(valueFunc(self.curve, .001, 1.0, .15, 
+                                       solver=True),
+                             valueFunc(self.curve, .001, 1.0, .15))
+
+    def testUpdateUsesCache(self):
+        baseswap, swaption = self.asw.update(self.curve, .001, 1.1)
+        self.assertEqual(baseswap.fixedRate, self.asw.coupon / 1.1)
+        self.assertEqual(baseswap.spread, .001)
+        self.assertEqual(swaption.value(.15, self.curve),
+                         self.fresh(.001, 1.1).value(.15, self.curve))
+        
+        again = self.asw.update(self.curve, .001, 1.1)
+        self.assertTrue(again[0] is baseswap and again[1] is swaption)
+        self.assertTrue(self.asw.callSwaption(self.curve, .001, 1.1) 
+                        is swaption)
+        self.assertFalse(self.asw.update(self.curve, .002, 1.1)[0] 
+                         is baseswap)
+        
+        bullet = AssetSwap(SimpleBond(.05, ql.Date(1, 6, 2030), 
+                                      settledate=SETTLE))
+        self.assertEqual(bullet.update(self.curve)[1], None)
+
+class KeyRateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.curve = flatCurve()
+        self.asw = AssetSwap(callableBond())
+
+    def instruments(self):
+        return [v[1] for v in self.asw.instruments_.values()]
+
+    def testRepeatedPassReuses(self):
+        tenors = ('1Y', '2Y', '3Y', '5Y', '7Y', '10Y', '20Y', '30Y')
+        for spreadType in ("O", "S"):
+            valueFunc = self.asw.spreadType[spreadType]
+            dv01s = self.asw.keyrate_dv01(self.curve, .001, 1.0, .15, 
+                                          valueFunc=valueFunc, tenors=tenors)
+            built = self.instruments()
+            self.assertEqual(self.asw.keyrate_dv01(self.curve, .001, 1.0, .15,
+                                                   valueFunc=valueFunc,
+                                                   tenors=tenors), dv01s)
+            self.assertEqual(len(self.instruments()), len(built))
+            for a, b in zip(self.instruments(), built):
+                self.assertTrue(a is b)
+
+    def testMatchesFreshAssetSwap(self):
+        dv01s = self.asw.keyrate_dv01(self.curve, .001, 1.0, .15)
+        fresh = AssetSwap(callableBond())
+        self.assertEqual(dv01s, fresh.keyrate_dv01(self.curve, .001, 1.0, .15))
+
+class RiskReportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.curve = flatCurve()
+        self.args = (.001, 1.0, .15)
+
+    def testMatchesGreeks(self):
+        for spreadType in ("S", "O"):
+            report = AssetSwap(callableBond()).riskReport(
+                self.curve, *self.args, spreadType=spreadType)
+            asw = AssetSwap(callableBond())
+            valueFunc = asw.spreadType[spreadType]
+            args = self.args + (ql.BlackKarasinski, valueFunc)
+            
+            self.assertEqual(report.price, valueFunc(self.curve, *self.args))
+            self.assertEqual(report.callvalue, asw.callvalue)
+            self.assertEqual((report.hedgeratio, report.dv01, 
+                              report.swapdv01),
+                             asw.hedge_risk(self.curve, *args))
+            self.assertEqual(report.spreaddv01, 
+                             asw.spread_dv01(self.curve, *args))
+            self.assertEqual(report.ratiodv01, asw.dvRatio(self.curve, *args))
+            self.assertEqual(report.vega, asw.vega(self.curve, *args))
+
+    def testVegaStableAtLowVol(self):
+        vegas = [AssetSwap(callableBond()).setLattice(steps).riskReport(
+                     self.curve, .001, 1.0, 1e-7, greeks=('vega',)).vega
+                 for steps in (50, 100)]
+        self.assertAlmostEqual(vegas[0], vegas[1], 4)
+
+    def testGreeksSubset(self):
+        report = AssetSwap(callableBond()).riskReport(self.curve, *self.args,
+                                                      greeks=('vega',))
+        full = AssetSwap(callableBond()).riskReport(self.curve, *self.args)
+        self.assertEqual(report.vega, full.vega)
+        self.assertEqual((report.dv01, report.spreaddv01, report.ratiodv01),
+                         (None, None, None))
+
+    def testValueWithRisk(self):
+        asw = AssetSwap(callableBond())
+        values = asw.value(self.curve, *self.args, spreadType="O", 
+                           calc_risk=True)
+        report = AssetSwap(callableBond()).riskReport(
+            self.curve, *self.args, spreadType="O", greeks=('dv01',))
+        self.assertEqual(values['price'], report.price)
+        self.assertEqual(values['callvalue'], report.callvalue)
+        self.assertEqual((values['dv01'], values['swapdv01'], 
+                          values['hedgeratio']),
+                         (report.dv01, report.swapdv01, report.hedgeratio))
+
+class VolRecordingAssetSwap(AssetSwap):
+    '''records the vols the call is valued at'''
+
+    def callValue_(self, termstructure, spread_, ratio, vol, model):
+        self.vols.append(vol)
+        return AssetSwap.callValue_(self, termstructure, spread_, ratio, vol,
+                                    model)
+
+class ZeroVolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.curve = flatCurve()
+        self.asw = VolRecordingAssetSwap(callableBond())
+        self.asw.vols = []
+
+    def calls(self):
+        return [k for k in self.asw.instruments_ if k[0] == 'call']
+
+    def testIntrinsicUpToZeroVol(self):
+        intrinsic = self.asw.intrinsicCallValue(self.curve, .002)
+        for vol in (0.0, 1e-12, 1e-9, AssetSwap.ZERO_VOL):
+            self.assertEqual(self.asw.callValue_(self.curve, .002, 1.0, vol,
+                                                 ql.BlackKarasinski), 
+                             intrinsic)
+        self.assertFalse(self.asw.instruments_)
+        
+        value = self.asw.callValue_(self.curve, .002, 1.0, 1e-6, 
+                                    ql.BlackKarasinski)
+        self.assertTrue(self.calls())
+        self.assertAlmostEqual(value, intrinsic, 4)
+
+    def testDefaultVolBuildsNoLattice(self):
+        for valueFunc in (self.asw.aswValue, self.asw.oasValue):
+            valueFunc(self.curve, .002)
+        self.asw.solveSpread(self.curve, 101., calc_risk=False)
+        self.assertFalse(self.calls())
+
+    def testSolverFloorIsIntrinsic(self):
+        price = self.asw.aswValue(self.curve, .002, 1.0, 0.0)
+        self.asw.vols = []
+        values = self.asw.solveImpliedVol(self.curve, price + .01, .002, 
+                                          calc_risk=False)
+        self.assertEqual(values['vol'], AssetSwap.ZERO_VOL)
+        self.assertFalse(self.calls())
+        
+        self.asw.vols = []
+        self.asw.solveImpliedVol(self.curve, price - .5, .002, 
+                                 calc_risk=False)
+        self.assertEqual(self.asw.vols[0], AssetSwap.ZERO_VOL)
+        self.assertTrue(min(self.asw.vols[1:]) > AssetSwap.ZERO_VOL)
+
+    def testVegaBumpsOneSide(self):
+        for vol in (0.0, 1.5 * AssetSwap.ZERO_VOL, 1e-7, .15):
+            self.asw.vols = []
+            report = self.asw.riskReport(self.curve, .001, 1.0, vol,
+                                         greeks=('vega',))
+            bumps = self.asw.vols[1:]
+            self.assertEqual(len(bumps), 2)
+            above = [v > AssetSwap.ZERO_VOL for v in bumps]
+            self.assertTrue(all(above) or not any(above))
+            self.assertTrue(bumps[1] - bumps[0] >= .0001 - 1e-15)
+
+    def testVegaAtZeroVol(self):
+        report = self.asw.riskReport(self.curve, .001, 1.0, 0.0,
+                                     greeks=('vega',))
+        p1, p2 = [AssetSwap(callableBond()).aswValue(self.curve, .001, 1.0, 
+                                                     vol)
+                  for vol in (.0001, .0002)]
+        self.assertAlmostEqual(report.vega, (p1 - p2) * 100., 12)
+        self.assertTrue(report.vega > 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.bonds import SimpleBond
+from bgpy.QL.tests.common import SETTLE, numpy, setEvaluationDate
+
+if numpy is not None:
+    from bgpy.QL.bondarrays import (ytmToPriceArray, toYTMArray, calcArray,
+                                    priceBonds, yieldBonds)
+
+def bondSample(count=200, seed=1):
+    rnd = random.Random(seed)
+    bonds = []
+    for n in range(count):
+        coupon = rnd.choice([0.0, .03, .04, .05, .0575])
+        maturity = ql.Date(1, rnd.randint(1, 12), rnd.randint(2011, 2040))
+        oid = rnd.choice([None, .045])
+        bonds.append(SimpleBond(coupon, maturity, oid=oid, settledate=SETTLE))
+    yields = [rnd.uniform(.01, .07) for b in bonds]
+    prices = [rnd.uniform(60., 120.) for b in bonds]
+    return bonds, yields, prices
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class BondArraysTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.bonds, self.yields, self.prices = bondSample()
+        # yield equal to coupon, price at par
+        self.yields[0] = self.bonds[0].coupon
+        self.prices[1] = 100.0
+
+    def testPricesMatchScalar(self):
+        prices = priceBonds(self.bonds, self.yields)['price']
+        for b, y, p in zip(self.bonds, self.yields, prices):
+            self.assertEqual(p, b.ytmToPrice(y))
+
+    def testYieldsMatchScalar(self):
+        yields = yieldBonds(self.bonds, self.prices)['bondyield']
+        for b, p, y in zip(self.bonds, self.prices, yields):
+            self.assertAlmostEqual(y, b.toYTM(p), 12)
+
+    def testKernelRoundTrip(self):
+        coupon, nper, frac = .05, numpy.arange(1., 41.), .5
+        prices = ytmToPriceArray(coupon, nper, frac, .04)
+        yields = toYTMArray(prices, coupon, nper, frac)
+        numpy.testing.assert_allclose(yields, .04, atol=1e-7)
+
+    def testCalcArray(self):
+        out = calcArray(.05, 20., .5, bondyield=.05)
+        self.assertEqual(float(out['price']), 100.0)
+        self.assertAlmostEqual(float(out['ai']), .0125, 12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,260 @@
+import pickle
+import random
+import unittest
+
+import bgpy.__QuantLib as ql
+
+import bgpy.QL.bonds as bonds
+from bgpy.QL.bonds import (SimpleBond, Call, CalcCache, callDates, calendar,
+                           rollSettlement)
+from bgpy.QL.munibonds import MuniBond
+from bgpy.QL.tests.common import SETTLE, setEvaluationDate
+
+def bumped(func, x, h=1e-5):
+    '''central first and second differences of func at x'''
+    up, mid, dn = func(x + h), func(x), func(x - h)
+    return (up - dn) / (2. * h), (up - 2. * mid + dn) / (h * h)
+
+class YtmRiskTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.bond = SimpleBond(.05, ql.Date(1, 10, 2025), settledate=SETTLE)
+
+    def testDerivativesMatchBumped(self):
+        price, dprice, d2price = self.bond.ytmRisk(.04)
+        d1, d2 = bumped(self.bond.ytmToPrice, .04, 1e-4)
+        self.assertEqual(price, self.bond.ytmToPrice(.04))
+        self.assertAlmostEqual(dprice, d1, 2)
+        self.assertAlmostEqual(d2price / 1e4, d2 / 1e4, 2)
+
+    def testDv01MatchesBumped(self):
+        b = self.bond
+        bumpeddv01 = (b.ytmToPrice(.0399) - b.ytmToPrice(.0401)) / 2.0
+        self.assertAlmostEqual(b.dv01(.04), bumpeddv01, 5)
+        self.assertAlmostEqual(b.duration(.04),
+                               b.dv01(.04) * 1e4 /
+                               (b.toPrice(.04) + 100. * b.ai()), 12)
+
+    def testZeroYield(self):
+        b = self.bond
+        price, dprice, d2price = b.ytmRisk(0.0)
+        # limit of the formula: average of the values either side of 0
+        up, dn = b.ytmRisk(1e-4), b.ytmRisk(-1e-4)
+        for value, u, d in zip((price, dprice, d2price), up, dn):
+            self.assertAlmostEqual(value / ((u + d) / 2.), 1.0, 5)
+
+    def testZeroCouponAtZeroYield(self):
+        zero = SimpleBond(0.0, ql.Date(1, 5, 2011), settledate=SETTLE)
+        self.assertEqual(zero.ytmRisk(0.0)[0], 100.0)
+        self.assertTrue(zero.dv01(0.0) > 0.0)
+        self.assertTrue(zero.convexity(0.0) > 0.0)
+        d1 = (zero.ytmToPrice(-1e-4) - zero.ytmToPrice(1e-4)) / 2.
+        self.assertAlmostEqual(zero.dv01(0.0), d1, 5)
+
+    def testDv01ToWorst(self):
+        # analytic on the call priced to, not a bumped reprice to worst
+        callable = MuniBond(.05, ql.Date(1, 10, 2032),
+                            Call(ql.Date(1, 10, 2018), 100.),
+                            settledate=SETTLE)
+        price, todate, toprice, toterm = callable.toWorst(.03)
+        self.assertEqual(todate, ql.Date(1, 10, 2018))
+        expected = -callable.ytmRisk(.03, toprice, toterm)[1] * 1e-4
+        self.assertAlmostEqual(callable.dv01(.03), expected, 12)
+        self.assertEqual(callable.calc(.03, dict_out=True)['dv01'],
+                         callable.dv01(.03))
+
+def scanToWorst(bond, level, ytmfunc='ytmToPrice', cmplevel=False):
+    '''
+    the call scan toWorst replaced: a bond to each call date, kept if 
+    its value is at or below the worst so far
+    '''
+    val = getattr(bond, ytmfunc)(level)
+    todate, toprice = bond.maturity, bond.redvalue
+    
+    earliestcall = calendar.advance(bond.settle_, ql.Period(bond.frequency))
+    serials, prices = callDates(bond.callfeature, bond.maturity, 
+                                bond.daycount, bond.face) \
+                      if bond.callfeature else ([], [])
+    for serial, callpx in zip(serials, prices):
+        calldt = ql.Date(serial)
+        if all([bond.daycount.dayCount(earliestcall, calldt) >= 0,
+                callpx <= level or not cmplevel,
+                calldt < todate or callpx < toprice]):
+            cbond = SimpleBond(bond.coupon, calldt, issuedate=bond.issuedate,
+                               oid=bond.oid, redvalue=callpx,
+                               settledate=bond.settle_)
+            newval = getattr(cbond, ytmfunc)(level)
+            if newval <= val:
+                todate, toprice, val = calldt, callpx, newval
+                
+    return (val, todate, toprice)
+
+class CallScheduleTest(unittest.TestCase):
+    
+    def setUp(self):
+        setEvaluationDate()
+        rnd = random.Random(3)
+        self.bonds = []
+        for n in range(40):
+            maturity = ql.Date(1, rnd.randint(1, 12), rnd.randint(2015, 2040))
+            firstcall = ql.Date(1, maturity.month(), 
+                                rnd.randint(2011, maturity.year()))
+            parcall = ql.Date(1, maturity.month(), 
+                              min(firstcall.year() + 2, maturity.year()))
+            call = Call(firstcall, rnd.choice([100., 101., 102.]), parcall)
+            self.bonds.append(MuniBond(rnd.choice([.03, .04, .05, .0575]),
+                                       maturity, call, settledate=SETTLE))
+        self.numpy_ = bonds.np
+        
+    def tearDown(self):
+        bonds.np = self.numpy_
+        
+    def compare(self):
+        for b in self.bonds:
+            # yld == coupon prices every leg at 100: all ties
+            for y in (.02, .04, .06, b.coupon):
+                val, todate, toprice, toterm = b.toWorst(y)
+                self.assertEqual((val, todate, toprice), scanToWorst(b, y))
+            for p in (90., 100., 101.5, 104.):
+                val, todate, toprice, toterm = b.toWorst(p, 'toYTM', True)
+                expected = scanToWorst(b, p, 'toYTM', True)
+                self.assertAlmostEqual(val, expected[0], 10)
+                self.assertEqual((todate, toprice), expected[1:])
+    
+    def testToWorstMatchesScan(self):
+        self.compare()
+        
+    def testToWorstWithoutNumpy(self):
+        bonds.np = None
+        self.compare()
+
+    def testParCallTies(self):
+        b = MuniBond(.05, ql.Date(1, 10, 2030), 
+                     Call(ql.Date(1, 10, 2015), 102., ql.Date(1, 10, 2017)),
+                     settledate=SETTLE)
+        # all legs price to 100: the first call at the lowest price wins
+        self.assertEqual(b.toWorst(.05)[1:3], (ql.Date(1, 10, 2017), 100.))
+
+class SettlementRollTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.terms = [(.05, ql.Date(1, 10, 2032), 
+                       Call(ql.Date(1, 10, 2018), 102., ql.Date(1, 10, 2020))),
+                      (.04, ql.Date(15, 6, 2021), 
+                       Call(ql.Date(15, 6, 2011), 100.)),
+                      (.0575, ql.Date(1, 3, 2028), None)]
+        
+    def bonds(self, settle):
+        return [MuniBond(c, m, call, settledate=settle) 
+                for c, m, call in self.terms]
+
+    def testRollMatchesNewBond(self):
+        rolled = self.bonds(SETTLE)
+        for settle in (ql.Date(3, 1, 2011), ql.Date(1, 10, 2015), 
+                       ql.Date(2, 10, 2018), SETTLE):
+            rollSettlement(rolled, settle)
+            for b, fresh in zip(rolled, self.bonds(settle)):
+                self.assertEqual(b.settlementDate, settle)
+                self.assertEqual((b.nper, b.frac), (fresh.nper, fresh.frac))
+                self.assertEqual(list(b.calllist), list(fresh.calllist))
+                self.assertEqual(b.calllist.first, fresh.calllist.first)
+                for y in (.03, .05):
+                    self.assertEqual(b.calc(y, dict_out=True), 
+                                     fresh.calc(y, dict_out=True))
+
+    def testSameSettlementIsNoop(self):
+        b = self.bonds(SETTLE)[0]
+        calls = b.calllist
+        b.settlementDate = SETTLE
+        self.assertTrue(b.calllist is calls)
+
+class CalcCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        SimpleBond.calcCache = self.cache = CalcCache(maxsize=8)
+        self.call = Call(ql.Date(1, 10, 2020), 102., ql.Date(1, 10, 2022))
+        self.bond = MuniBond(.05, ql.Date(1, 10, 2032), self.call, 
+                             settledate=SETTLE)
+        
+    def tearDown(self):
+        SimpleBond.calcCache = None
+        
+    def testHit(self):
+        price = self.bond.toPrice(.04)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        self.assertEqual(self.bond.toPrice(.04), price)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        
+        # a bond with the same terms shares the entry
+        other = MuniBond(.05, ql.Date(1, 10, 2032), self.call, 
+                         settledate=SETTLE)
+        self.assertEqual(other.toPrice(.04), price)
+        self.assertEqual(self.cache.hits, 2)
+        
+    def testResultsAreCopies(self):
+        result = self.bond.calc(.04, dict_out=True)
+        expected = dict(result)
+        result['price'] = 0.0
+        self.assertEqual(self.bond.calc(.04, dict_out=True), expected)
+        self.assertEqual(self.bond.result, expected)
+        
+    def testSettlementIsPartOfKey(self):
+        price = self.bond.toPrice(.04)
+        self.bond.settlementDate = ql.Date(17, 11, 2012)
+        rolled = self.bond.toPrice(.04)
+        self.assertNotEqual(rolled, price)
+        self.assertEqual(rolled, MuniBond(.05, ql.Date(1, 10, 2032), 
+                                          self.call, 
+                                          settledate=ql.Date(17, 11, 2012))
+                                          .calc(.04))
+        # entries for the old settlement stay valid
+        self.bond.settlementDate = SETTLE
+        hits = self.cache.hits
+        self.assertEqual(self.bond.toPrice(.04), price)
+        self.assertEqual(self.cache.hits, hits + 1)
+    
+    def testCallFeatureIsPartOfKey(self):
+        price = self.bond.toPrice(.04)
+        self.bond.setCallfeature(None)
+        self.assertTrue(self.bond.toPrice(.04) > price)
+        
+    def testNewBondsKeepEntries(self):
+        self.bond.toPrice(.04)
+        MuniBond(.05, ql.Date(1, 10, 2032), self.call, settledate=SETTLE)
+        self.assertEqual(len(self.cache), 1)
+        
+    def testInvalidate(self):
+        self.bond.toPrice(.04)
+        self.bond.toPrice(.05)
+        SimpleBond(.04, ql.Date(1, 10, 2030), settledate=SETTLE).toPrice(.04)
+        self.bond.invalidate()
+        self.assertEqual(len(self.cache), 1)
+        
+    def testLeastRecentlyUsedDropped(self):
+        yields = [.01 + n * .001 for n in range(10)]
+        for y in yields:
+            self.bond.toPrice(y)
+        self.assertEqual(len(self.cache), 8)
+        hits = self.cache.hits
+        self.bond.toPrice(yields[-1])
+        self.bond.toPrice(yields[0])
+        self.assertEqual(self.cache.hits, hits + 1)
+
+class CallTest(unittest.TestCase):
+
+    def testPickle(self):
+        call = Call(ql.Date(1, 10, 2020), 102., ql.Date(1, 10, 2022))
+        for protocol in (0, 1, 2):
+            copy = pickle.loads(pickle.dumps(call, protocol))
+            self.assertEqual((copy.firstcall, copy.callprice, copy.parcall,
+                              copy.frequency), 
+                             (call.firstcall, call.callprice, call.parcall,
+                              call.frequency))
+        copy = pickle.loads(pickle.dumps(Call(ql.Date(1, 10, 2020)), 0))
+        self.assertEqual(copy.parcall, ql.Date())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import random
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.bonds import SimpleBond, Call
+from bgpy.QL.munibonds import MuniBond
+from bgpy.QL.ustbonds import USTBond
+from bgpy.QL.tests.common import SETTLE, numpy, setEvaluationDate
+
+if numpy is not None:
+    from bgpy.QL.bondtable import BondTable
+
+def universe(count=60, seed=5):
+    '''callable and bullet bonds of each type, with and without oid'''
+    rnd = random.Random(seed)
+    bonds = []
+    for n in range(count):
+        coupon = rnd.choice([.03, .04, .05, .0575])
+        maturity = ql.Date(1, rnd.randint(1, 12), rnd.randint(2012, 2040))
+        call = None
+        if rnd.random() < .7 and maturity.year() > 2012:
+            firstcall = ql.Date(1, maturity.month(), 
+                                rnd.randint(2011, maturity.year() - 1))
+            parcall = ql.Date(1, maturity.month(), 
+                              min(firstcall.year() + 2, maturity.year()))
+            call = Call(firstcall, rnd.choice([100., 101., 102.]), parcall)
+        bondtype = rnd.choice([SimpleBond, MuniBond, USTBond])
+        if bondtype is USTBond:
+            call = None
+        bonds.append(bondtype(coupon, maturity, call, 
+                              oid=rnd.choice([None, coupon + .005]),
+                              settledate=SETTLE))
+    return bonds
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class BondTableTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.bonds = universe()
+        self.table = BondTable(size=8).addBonds(self.bonds)
+
+    def compare(self, bonds, table, yields, prices):
+        out = table.calc(bondyield=yields)
+        for n, b in enumerate(bonds):
+            result = b.calc(yields[n], dict_out=True)
+            self.assertEqual(out['price'][n], result['price'])
+            self.assertEqual(out['toDate'][n], result['toDate'].serialNumber())
+            self.assertEqual(out['toPrice'][n], result['toPrice'])
+            
+        out = table.calc(bondprice=prices)
+        for n, b in enumerate(bonds):
+            result = b.calc(bondprice=prices[n], dict_out=True)
+            self.assertAlmostEqual(out['bondyield'][n], result['bondyield'], 
+                                   10)
+            self.assertEqual(out['toDate'][n], result['toDate'].serialNumber())
+
+    def testCalcMatchesBonds(self):
+        rnd = random.Random(7)
+        yields = [rnd.uniform(.01, .07) for b in self.bonds]
+        # yield at coupon: all legs tie at 100
+        yields[:5] = [b.coupon for b in self.bonds[:5]]
+        prices = [rnd.uniform(85., 110.) for b in self.bonds]
+        self.compare(self.bonds, self.table, yields, prices)
+
+    def testSettlementRoll(self):
+        settle = ql.Date(3, 10, 2016)
+        self.table.setSettlement(settle)
+        bonds = [b.__class__(b.coupon, b.maturity, b.callfeature, b.oid, 
+                             b.issuedate, b.redvalue, settle) 
+                 for b in self.bonds]
+        live = [n for n, b in enumerate(bonds) if b.maturity > settle]
+        table = BondTable().addBonds([bonds[n] for n in live])
+        self.assertEqual(self.table.data['nper'][live].tolist(), 
+                         table.data['nper'].tolist())
+        yields = [.04] * len(live)
+        self.compare([bonds[n] for n in live], table, yields, 
+                     [100.5] * len(live))
+        rolled = self.table.calc(bondyield=.04, rows=live)['price']
+        self.assertEqual(rolled.tolist(), 
+                         table.calc(bondyield=yields)['price'].tolist())
+
+    def testBondRoundTrip(self):
+        for n, b in enumerate(self.bonds):
+            bond = self.table.bond(n)
+            self.assertTrue(type(bond) is type(b))
+            self.assertEqual(bond.cacheKey(), b.cacheKey())
+            self.assertEqual(bond.settlementDate, b.settlementDate)
+
+    def testAtSettlements(self):
+        dates = [SETTLE, ql.Date(17, 11, 2011)]
+        table = self.table.atSettlements(dates)
+        self.assertEqual(len(table), 2 * len(self.bonds))
+        self.assertEqual(table.data['settle'][1::2].tolist(), 
+                         [dates[1].serialNumber()] * len(self.bonds))
+
+    def testAddBullets(self):
+        bonds = [b for b in self.bonds if b.callfeature is None and not b.oid]
+        table = BondTable()
+        rows = table.addBullets([b.coupon for b in bonds], 
+                                [b.maturity for b in bonds], SETTLE,
+                                USTBond)
+        self.assertEqual(rows.tolist(), list(range(len(bonds))))
+        bullets = [USTBond(b.coupon, b.maturity, settledate=SETTLE) 
+                   for b in bonds]
+        expected = BondTable().addBonds(bullets).data
+        for name in expected.dtype.names:
+            numpy.testing.assert_array_equal(table.data[name], expected[name])
+
+    def testMemory(self):
+        self.assertTrue(self.table.memoryPerBond(includeLegs=False) < 100)
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class AfterTaxTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.bonds = [b for b in universe(80, seed=11) 
+                      if isinstance(b, MuniBond)]
+        self.table = BondTable().addBonds(self.bonds)
+
+    def testQtaxMatchesMuniBond(self):
+        out = self.table.qtax(ptsyear=.25)
+        for n, b in enumerate(self.bonds):
+            self.assertAlmostEqual(out['qtaxyield'][n], b.qtax(ptsyear=.25),
+                                   10)
+            self.assertAlmostEqual(out['qtaxrval'][n], b.qtaxrval, 10)
+            self.assertEqual(out['amddemin'][n], b.amddemin)
+
+    def testCalcAfterTaxMatchesMuniBond(self):
+        rnd = random.Random(13)
+        # premium, within and beyond de minimis
+        prices = [rnd.choice([rnd.uniform(101., 110.), 
+                              rnd.uniform(b.qtaxrval - b.amddemin, b.qtaxrval)
+                              if b.qtax() else 0.0,
+                              rnd.uniform(80., 95.)]) for b in self.bonds]
+        out = self.table.calcAfterTax(bondprice=prices)
+        flags = set()
+        for n, b in enumerate(self.bonds):
+            aty = b.calcAfterTax(bondprice=prices[n])
+            self.assertAlmostEqual(out['aftertaxyield'][n], aty, 10)
+            self.assertEqual(bool(out['qtaxflag'][n]), b.qtaxflag)
+            flags.add(b.qtaxflag)
+        self.assertEqual(flags, set([True, False]))
+
+    def testCalcAfterTaxFromYield(self):
+        out = self.table.calcAfterTax(bondyield=.045)
+        for n, b in enumerate(self.bonds):
+            price = b.calc(bondyield=.045)
+            self.assertEqual(out['price'][n], price)
+            self.assertAlmostEqual(out['aftertaxyield'][n], 
+                                   b.calcAfterTax(bondprice=price), 10)
+
+if __name__ == '__main__':
+    unittest.main()
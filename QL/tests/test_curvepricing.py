@@ -0,0 +1,68 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.termstructure import SpreadedCurve
+from bgpy.QL.tests.common import SETTLE, numpy, flatCurve
+from bgpy.QL.tests.test_bondarrays import bondSample
+from bgpy.math.solvers import SolverExceptions
+
+if numpy is not None:
+    from bgpy.QL.curvepricing import (curvePrices, zSpreads, discountArrays,
+                                      cashflowArrays)
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class CurvePricingTest(unittest.TestCase):
+
+    def setUp(self):
+        # Actual365Fixed curve, off the model daycount
+        self.curve = flatCurve()
+        self.bonds = bondSample(50)[0]
+        rnd = numpy.random.RandomState(3)
+        self.spreads = rnd.uniform(-.01, .03, len(self.bonds))
+
+    def testDiscountArrays(self):
+        serials = numpy.array([SETTLE.serialNumber() + 400,
+                               SETTLE.serialNumber() + 30,
+                               SETTLE.serialNumber() + 400])
+        dfs, times = discountArrays(self.curve, serials)
+        for serial, df, t in zip(serials.tolist(), dfs, times):
+            dt = ql.Date(serial)
+            self.assertEqual(df, self.curve.discount(dt, True))
+            self.assertEqual(t, ql.Actual365Fixed().yearFraction(SETTLE, dt))
+        self.assertEqual(len(discountArrays(self.curve, [])[0]), 0)
+
+    def testPricesMatchDiscounting(self):
+        prices = curvePrices(self.bonds, self.curve)
+        discount = self.curve.discount
+        for bond, price in zip(self.bonds, prices):
+            serials, amounts = bond.cashflows()
+            pv = sum(a * discount(ql.Date(s), True)
+                     for s, a in zip(serials, amounts))
+            value = pv / discount(bond.settlementDate) - 100.0 * bond.ai()
+            self.assertAlmostEqual(price, value, 10)
+
+    def testSpreadedCurve(self):
+        prices = curvePrices(self.bonds, self.curve, .01)
+        spreaded = SpreadedCurve(self.curve, .01, "Z")
+        numpy.testing.assert_allclose(prices, curvePrices(self.bonds, spreaded),
+                                      rtol=0, atol=1e-10)
+
+    def testZSpreadRoundTrip(self):
+        flows = cashflowArrays(self.bonds)
+        prices = curvePrices(self.bonds, self.curve, self.spreads, flows)
+        spreads = zSpreads(self.bonds, self.curve, prices, flows)
+        numpy.testing.assert_allclose(spreads, self.spreads, rtol=0, atol=1e-10)
+
+    def testConvergedWithoutIterations(self):
+        prices = curvePrices(self.bonds, self.curve)
+        spreads = zSpreads(self.bonds, self.curve, prices, maxiter=0)
+        self.assertFalse(spreads.any())
+
+    def testMaxIterations(self):
+        prices = curvePrices(self.bonds, self.curve, self.spreads)
+        self.assertRaises(SolverExceptions, zSpreads, self.bonds, self.curve,
+                          prices, maxiter=1)
+
+if __name__ == '__main__':
+    unittest.main()
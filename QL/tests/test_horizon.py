@@ -0,0 +1,54 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.tests.common import SETTLE, numpy, setEvaluationDate, flatCurve
+from bgpy.QL.tests.test_bondtable import universe
+
+if numpy is not None:
+    from bgpy.QL.horizon import horizon
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class HorizonTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.bonds = universe(30, seed=9)
+        self.dates = [SETTLE + 91 * k for k in range(0, 24, 3)]
+        self.path = [.03 + .0005 * k for k in range(len(self.dates))]
+
+    def testMatchesBondsRolled(self):
+        out = horizon(self.bonds, self.dates, yields=self.path)
+        for n, b in enumerate(self.bonds):
+            bond = b.__class__(b.coupon, b.maturity, b.callfeature, b.oid,
+                               b.issuedate, b.redvalue, SETTLE)
+            for k, settle in enumerate(self.dates):
+                if settle >= b.maturity:
+                    self.assertTrue(numpy.isnan(out['price'][n, k]))
+                    continue
+                bond.setSettlement(settle)
+                result = bond.calc(self.path[k], dict_out=True)
+                self.assertEqual(out['price'][n, k], result['price'])
+                self.assertEqual(out['toDate'][n, k], 
+                                 result['toDate'].serialNumber())
+                self.assertAlmostEqual(out['ai'][n, k], bond.ai(), 15)
+                self.assertEqual(out['settle'][n, k], settle.serialNumber())
+
+    def testRollDown(self):
+        curve = flatCurve(.035)
+        out = horizon(self.bonds, self.dates, curve=curve, spreads=.002)
+        k = 5
+        n = [b.maturity > self.dates[-1] for b in self.bonds].index(True)
+        b = self.bonds[n]
+        remaining = b.maturity - self.dates[k]
+        expected = curve.bondpar(SETTLE + remaining) + .002
+        self.assertAlmostEqual(out['bondyield'][n, k], expected, 12)
+        
+        # per-bond spreads
+        spreads = numpy.linspace(0., .01, len(self.bonds))
+        out2 = horizon(self.bonds, self.dates, curve=curve, spreads=spreads)
+        self.assertAlmostEqual(out2['bondyield'][n, k] - 
+                               out['bondyield'][n, k], spreads[n] - .002, 12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from math import ceil
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+from bgpy.QL.irswaps import USDLiborSwap, USDLiborSwaption
+from bgpy.QL.tests.common import SETTLE, flatCurve
+from bgpy.QL.tests.test_assetswap import callableBond
+
+class LatticeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.curve = flatCurve()
+        self.swaption = self.swaptionTo(ql.Date(1, 6, 2030))
+
+    def swaptionTo(self, maturity, firstcall=ql.Date(1, 6, 2015)):
+        return USDLiborSwaption(self.curve, firstcall, maturity, .05, 
+                                PayFlag=0, bermudan=True)
+
+    def testAdaptiveSteps(self):
+        years = self.curve.daycount.yearFraction(self.curve.referenceDate(),
+                                                 ql.Date(1, 6, 2030))
+        self.assertEqual(self.swaption.adaptiveSteps(), int(ceil(years * 12)))
+        self.assertEqual(self.swaption.adaptiveSteps(stepsPerYear=1,
+                                                     stepsPerCall=30),
+                         int(ceil(years * 30)))
+        self.assertEqual(self.swaption.adaptiveSteps(stepsPerYear=1000),
+                         USDLiborSwaption.MAX_STEPS)
+        short = self.swaptionTo(ql.Date(1, 6, 2012), ql.Date(1, 6, 2011))
+        self.assertEqual(short.adaptiveSteps(), USDLiborSwaption.MIN_STEPS)
+
+    def testConvergedValue(self):
+        value = self.swaption.convergedValue(.15, timeSteps=40, tol=1e-2,
+                                             maxSteps=640)
+        steps = self.swaption.timeSteps
+        self.assertTrue(self.swaption.accuracy <= 1e-2 or steps == 640)
+        self.assertEqual(value, self.swaption.value(.15, timeSteps=steps))
+        self.assertEqual(self.swaption.accuracy, 
+                         abs(value - self.swaption.value(.15, 
+                                                         timeSteps=steps//2)))
+
+    def testRichardson(self):
+        value = self.swaption.convergedValue(.15, timeSteps=40, tol=1e-2,
+                                             richardson=True)
+        steps = self.swaption.timeSteps
+        self.assertEqual(value, 
+                         2.0 * self.swaption.value(.15, timeSteps=steps) - 
+                         self.swaption.value(.15, timeSteps=steps//2))
+
+    def testMaxSteps(self):
+        self.swaption.convergedValue(.15, timeSteps=40, tol=0.0, maxSteps=320)
+        self.assertEqual(self.swaption.timeSteps, 320)
+
+    def testAssetSwapLattice(self):
+        asw = AssetSwap(callableBond()).setLattice(40, tol=1e-2)
+        asw.aswValue(self.curve, .001, 1.0, .15)
+        self.assertEqual(asw.latticeAccuracy, asw.swaption.accuracy)
+        
+        asw = AssetSwap(callableBond()).setLattice(None)
+        value = asw.aswValue(self.curve, .001, 1.0, .15)
+        steps = asw.swaption.adaptiveSteps(self.curve)
+        fixed = AssetSwap(callableBond()).setLattice(steps)
+        self.assertEqual(value, fixed.aswValue(self.curve, .001, 1.0, .15))
+
+class ZDV01Test(unittest.TestCase):
+
+    def setUp(self):
+        self.curve = flatCurve()
+        self.swap = USDLiborSwap(self.curve, SETTLE, ql.Date(17, 11, 2020), 
+                                 .04)
+
+    def zdv01(self, curve):
+        '''z_dv01 from freshly built bumped swaps'''
+        up, dn = [USDLiborSwap(crv, SETTLE, ql.Date(17, 11, 2020), .04)
+                  for crv in (curve.shift_up, curve.shift_dn)]
+        return (up.value() - dn.value()) / 2.0
+
+    def testTwinsReused(self):
+        dv01 = self.swap.z_dv01()
+        twins = self.swap.bumpedTwins()
+        self.assertEqual(dv01, self.zdv01(self.curve))
+        self.assertEqual(self.swap.z_dv01(), dv01)
+        for twin, kept in zip(self.swap.bumpedTwins(), twins):
+            self.assertTrue(twin is kept)
+
+    def testScenariosRebuilt(self):
+        dv01 = self.swap.z_dv01()
+        twins = self.swap.bumpedTwins()
+        
+        self.curve.scenarios(shock=.0002)
+        dv01_2 = self.swap.z_dv01()
+        rebuilt = self.swap.bumpedTwins()
+        for twin, old, crv in zip(rebuilt, twins, (self.curve.shift_up, 
+                                                   self.curve.shift_dn)):
+            self.assertFalse(twin is old)
+            self.assertTrue(twin.termstructure is crv)
+        self.assertEqual(dv01_2, self.zdv01(self.curve))
+        self.assertAlmostEqual(dv01_2 / dv01, 2.0, 3)
+        
+        self.curve.clear_scenarios()
+        self.assertAlmostEqual(self.swap.z_dv01(), dv01, 12)
+        self.assertFalse(self.swap.bumpedTwins()[0] is rebuilt[0])
+
+    def testNewTermstructure(self):
+        self.swap.z_dv01()
+        other = flatCurve(.05)
+        dv01 = self.swap.z_dv01(other)
+        self.assertTrue(self.swap.bumpedTwins()[0].termstructure is 
+                        other.shift_up)
+        self.assertEqual(dv01, self.zdv01(other))
+
+if __name__ == '__main__':
+    unittest.main()
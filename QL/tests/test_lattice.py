@@ -0,0 +1,57 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+from bgpy.QL.tests.common import numpy, flatCurve, setEvaluationDate
+from bgpy.QL.tests.test_assetswap import callableBond
+
+if numpy is not None:
+    from bgpy.QL.lattice import latticeCallValues
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class LatticeCallValuesTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.curve = flatCurve()
+        self.asw = AssetSwap(callableBond())
+
+    def testMatchesQuantLibTree(self):
+        # exercise dates move to the shared grid: within a cent
+        for spread in (0.0, .002, -.003):
+            value = latticeCallValues(self.curve, [self.asw], .15, 1.0,
+                                      spread)[0]
+            swaption = self.asw.callSwaption(self.curve, spread)
+            self.assertAlmostEqual(value, swaption.value(.15, self.curve,
+                                                         ql.BlackKarasinski,
+                                                         400), delta=.01)
+
+    def testSpreadAtLowVol(self):
+        for spread in (0.0, .002, -.003):
+            value = latticeCallValues(self.curve, [self.asw], 1e-4, 1.0,
+                                      spread)[0]
+            self.assertAlmostEqual(value,
+                                   self.asw.intrinsicCallValue(self.curve,
+                                                               spread), 8)
+
+    def testPerBondSpreads(self):
+        asws = [self.asw, AssetSwap(callableBond(.06))]
+        values = latticeCallValues(self.curve, asws, .15, 1.0, [.002, .001])
+        for asw, spread, value in zip(asws, (.002, .001), values):
+            self.assertEqual(value, latticeCallValues(self.curve, [asw], .15,
+                                                      1.0, spread)[0])
+
+    def testNativeCallValue(self):
+        self.asw.setLattice(native=True)
+        for spreadType in ("S", "O"):
+            valueFunc = self.asw.spreadType[spreadType]
+            valueFunc(self.curve, .002, 1.0, .15)
+            curve = self.curve if spreadType == "S" else self.asw.oasCurve
+            spread = .002 if spreadType == "S" else 0.0
+            self.assertEqual(self.asw.callvalue,
+                             latticeCallValues(curve, [self.asw], .15, 1.0,
+                                               spread)[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.munibonds import MuniBond
+from bgpy.QL.tests.common import SETTLE, setEvaluationDate
+
+class CountingMuniBond(MuniBond):
+    '''counts de minimis yield solves'''
+    solves = 0
+
+    def toYTM(self, *args, **kwargs):
+        self.solves += 1
+        return MuniBond.toYTM(self, *args, **kwargs)
+
+class QtaxTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.bond = CountingMuniBond(.04, ql.Date(1, 6, 2030), oid=.045,
+                                     settledate=SETTLE)
+
+    def testCacheHit(self):
+        qtaxyield = self.bond.qtax()
+        self.assertEqual(self.bond.solves, 1)
+        self.bond.calcAfterTax(bondprice=90.)
+        self.assertEqual(self.bond.qtax(), qtaxyield)
+        self.assertEqual(self.bond.solves, 2)
+
+    def testPtsyearKey(self):
+        self.bond.qtax(ptsyear=.25)
+        self.bond.qtax(ptsyear=.5)
+        self.assertEqual(self.bond.solves, 2)
+        self.bond.qtax(ptsyear=.25)
+        self.assertEqual(self.bond.solves, 2)
+
+    def testSettlementChange(self):
+        self.bond.qtax()
+        settle = ql.Date(1, 12, 2015)
+        self.bond.setSettlement(settle)
+        self.assertEqual(self.bond.qtax_, {})
+
+        fresh = MuniBond(.04, ql.Date(1, 6, 2030), oid=.045, settledate=settle)
+        self.assertEqual(self.bond.qtax(), fresh.qtax())
+        self.assertEqual((self.bond.qtaxrval, self.bond.amddemin),
+                         (fresh.qtaxrval, fresh.amddemin))
+
+    def testRedemptionValueKey(self):
+        self.bond.qtax()
+        self.bond.redvalue = 101.
+        fresh = MuniBond(.04, ql.Date(1, 6, 2030), oid=.045, redvalue=101.,
+                         settledate=SETTLE)
+        self.assertEqual(self.bond.qtax(), fresh.qtax())
+        self.assertEqual((self.bond.qtaxrval, self.bond.amddemin),
+                         (fresh.qtaxrval, fresh.amddemin))
+        self.assertEqual(self.bond.solves, 2)
+
+    def testNoSettlementChange(self):
+        self.bond.qtax()
+        self.bond.setSettlement(SETTLE)
+        self.assertEqual(len(self.bond.qtax_), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+from bgpy.QL.bonds import SimpleBond, Call
+from bgpy.QL.munibonds import MuniBond
+from bgpy.QL.termstructure import SimpleCurve
+from bgpy.QL.oasrunner import (solveSpreads, bondSpec, specBond, 
+                               multiprocessing)
+from bgpy.QL.tests.common import EVALDATE, SETTLE, setEvaluationDate
+
+CURVEDATA = {'3M': .30, '1Y': .50, '2Y': .80, '5Y': 1.80, '10Y': 2.90, 
+             '30Y': 4.00}
+
+class SolveSpreadsTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.curve = SimpleCurve(CURVEDATA, EVALDATE, datadivisor=100.)
+        self.bonds = [SimpleBond(.05, ql.Date(1, 6, 2025), 
+                                 Call(ql.Date(1, 6, 2018), 100.),
+                                 settledate=SETTLE),
+                      MuniBond(.04, ql.Date(1, 12, 2030), 
+                               Call(ql.Date(1, 12, 2020), 101., 
+                                    ql.Date(1, 12, 2022)), 
+                               oid=.045, settledate=SETTLE),
+                      SimpleBond(.045, ql.Date(1, 6, 2020), 
+                                 settledate=SETTLE)]
+        self.prices = [101., 98., 102.]
+        self.kwargs = {'vol': .15, 'calc_risk': False, 'spreadType': "O"}
+
+    def testSpecRoundTrip(self):
+        for bond in self.bonds:
+            copy = specBond(bondSpec(bond))
+            self.assertTrue(type(copy) is type(bond))
+            self.assertEqual(copy.cacheKey(), bond.cacheKey())
+            self.assertEqual(copy.settlementDate, bond.settlementDate)
+
+    def testMatchesSolveSpread(self):
+        results, errors = solveSpreads(self.bonds, self.prices, self.curve, 
+                                       processes=1, **self.kwargs)
+        self.assertEqual(errors, {})
+        for bond, price, values in zip(self.bonds, self.prices, results):
+            expected = AssetSwap(bond).solveSpread(self.curve, price,
+                                                   **self.kwargs)
+            self.assertEqual(values['model'], ql.BlackKarasinski)
+            self.assertEqual(values, expected)
+
+    @unittest.skipIf(multiprocessing is None, "requires multiprocessing")
+    def testProcessesMatchSerial(self):
+        serial = solveSpreads(self.bonds, self.prices, self.curve,
+                              processes=1, model='HullWhite', **self.kwargs)
+        pooled = solveSpreads(self.bonds, self.prices, self.curve,
+                              processes=2, chunksize=1, model=ql.HullWhite,
+                              **self.kwargs)
+        self.assertEqual(pooled, serial)
+        self.assertEqual(pooled[0][0]['model'], ql.HullWhite)
+
+    def testFailures(self):
+        results, errors = solveSpreads(self.bonds[:2], [-5.0, 98.], 
+                                       self.curve, processes=1, 
+                                       **self.kwargs)
+        self.assertEqual(results[0], None)
+        self.assertEqual(list(errors.keys()), [0])
+        self.assertTrue(isinstance(errors[0], str) and errors[0])
+        self.assertTrue(results[1]['spread'] is not None)
+
+    def testInProcessKeepsGlobals(self):
+        evaldate = ql.Date(12, 11, 2010)
+        ql.Settings.instance().setEvaluationDate(evaldate)
+        try:
+            solveSpreads(self.bonds[:1], self.prices[:1], self.curve,
+                         processes=1, **self.kwargs)
+            self.assertEqual(ql.Settings.instance().getEvaluationDate(), 
+                             evaldate)
+        finally:
+            setEvaluationDate()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.bonds import Call
+from bgpy.QL.munibonds import MuniBond
+from bgpy.QL.pricegrid import PriceGrid
+from bgpy.QL.tests.common import SETTLE, setEvaluationDate
+
+def exactPrice(bond, yld):
+    '''unrounded price to worst'''
+    price, todate, toprice, toterm = bond.toWorst(yld)
+    return bond.ytmRisk(yld, toprice, toterm, None)[0]
+
+class PriceGridTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.call = Call(ql.Date(1, 6, 2013), 102., ql.Date(1, 6, 2015))
+        self.bond = MuniBond(.045, ql.Date(1, 6, 2031), self.call, 
+                             settledate=SETTLE)
+        self.exact = MuniBond(.045, ql.Date(1, 6, 2031), self.call, 
+                              settledate=SETTLE)
+        self.bond.setPriceGrid(tol=1e-6)
+        self.grid = self.bond.priceGrid()
+        self.yields = [.0025 + k * .1175 / 2000 for k in range(2001)]
+
+    def testPriceErrorBetweenNodes(self):
+        table = self.grid.priceTable()
+        for y in self.yields:
+            value = table(y)
+            if value is not None:
+                self.assertTrue(abs(value - exactPrice(self.bond, y)) <= 1e-6,
+                                y)
+        self.assertTrue(table.errorBound() * table.safety <= 1e-6)
+        
+    def testLegChangesAreNodes(self):
+        table = self.grid.priceTable()
+        gaps = [iv for iv in table.intervals if iv[6] is None]
+        legs = set([self.bond.toWorst(y)[1] for y in self.yields])
+        self.assertTrue(len(legs) > 1)
+        self.assertEqual(len(gaps), len(legs) - 1)
+        for x0, x1, f0, f1, d0, d1, err, leg in gaps:
+            self.assertTrue(x1 - x0 <= 1e-10)
+            self.assertNotEqual(self.bond.toWorst(x0)[1], 
+                                self.bond.toWorst(x1)[1])
+            self.assertEqual(table(0.5 * (x0 + x1)), None)
+            
+    def testYieldErrorBetweenNodes(self):
+        table = self.grid.yieldTable()
+        for k in range(501):
+            price = table.lo + k * (table.hi - table.lo) / 500
+            value = table(price)
+            if value is not None:
+                self.assertTrue(abs(value - self.exact.toYield(price)) <= 
+                                self.grid.ytol)
+
+    def testToPriceSetsResult(self):
+        for y in (.02, .035, .06):
+            price = self.bond.toPrice(y)
+            self.assertTrue(abs(price - self.exact.toPrice(y)) <= 1.5e-6)
+            self.assertEqual(self.bond.result['toDate'], 
+                             self.exact.result['toDate'])
+            self.assertEqual(self.bond.result['toPrice'], 
+                             self.exact.result['toPrice'])
+            self.assertEqual(self.bond.result['price'], price)
+        self.assertEqual(self.grid.misses, 0)
+        
+        # risk fields from an earlier calc do not survive a grid hit
+        self.bond.calc(.05, dict_out=True)
+        self.bond.toPrice(.04)
+        self.assertFalse('dv01' in self.bond.result)
+        self.assertEqual(self.bond.result['bondyield'], .04)
+
+    def testToYieldSetsResult(self):
+        y = self.bond.toYield(97.5)
+        self.assertAlmostEqual(y, self.exact.toYield(97.5), 8)
+        self.assertEqual(self.bond.result['price'], 97.5)
+        self.assertEqual(self.bond.result['bondyield'], y)
+        self.assertEqual(self.bond.result['toDate'], 
+                         self.exact.result['toDate'])
+
+    def testCouponYieldOffGrid(self):
+        self.assertEqual(self.bond.toPrice(self.bond.coupon), 
+                         self.exact.toPrice(self.bond.coupon))
+        self.assertEqual(self.grid.price(self.bond.coupon), None)
+        
+    def testRebuiltAfterSettlement(self):
+        self.bond.toPrice(.04)
+        self.bond.settlementDate = ql.Date(1, 1, 2012)
+        self.exact.settlementDate = ql.Date(1, 1, 2012)
+        self.assertFalse(self.bond.priceGrid() is self.grid)
+        self.assertTrue(abs(self.bond.toPrice(.04) - 
+                            self.exact.toPrice(.04)) <= 1.5e-6)
+
+if __name__ == '__main__':
+    unittest.main()
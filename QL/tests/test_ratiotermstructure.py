@@ -0,0 +1,57 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.ratiotermstructure import RatioCurve
+from bgpy.QL.tests.common import SETTLE, flatCurve
+
+RATIOS = {'1Y': 70., '5Y': 75., '10Y': 80., '30Y': 90.}
+
+def walkParRatio(curve, years):
+    '''par ratio by a separate walk of the quarterly schedule'''
+    disc = curve.disc_termstr
+    d0, sum1, sum2 = curve.settlement, 0.0, 0.0
+    for n in range(3, years * 12 + 3, 3):
+        dt = curve.calendar.advance(curve.settlement, n, ql.Months,
+                                    ql.ModifiedFollowing)
+        df = disc.discount(dt, True)
+        sum1 += df * disc.forwardPayment(d0, dt)
+        sum2 += df * curve.forwardPayment(d0, dt)
+        d0 = dt
+    return sum2 / sum1
+
+class ParRatioTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.disc = flatCurve()
+        self.curve = RatioCurve(self.disc, RATIOS, datadivisor=100.)
+
+    def testTableMatchesWalk(self):
+        table = self.curve.parRatioTable(30)
+        for years in (1, 2, 5, 12, 30):
+            self.assertAlmostEqual(table[years],
+                                   walkParRatio(self.curve, years), 12)
+            self.assertEqual(self.curve.parRatio('%dY' % years), table[years])
+
+    def testTableExtended(self):
+        table = self.curve.parRatioTable(5)
+        self.assertTrue(self.curve.parRatioTable(10) is table)
+        self.assertEqual(len(table), 11)
+
+    def testDiscountCurveChange(self):
+        before = list(self.curve.parRatioTable(10))
+        self.disc.curve.linkTo(ql.FlatForward(SETTLE, .05,
+                                              ql.Actual365Fixed()))
+        after = self.curve.parRatioTable(10)
+        self.assertNotEqual(after[10], before[10])
+        self.assertAlmostEqual(after[10], walkParRatio(self.curve, 10), 12)
+
+    def testUpdate(self):
+        self.curve.parRatioTable(10)
+        ratios = dict(RATIOS, **{'10Y': 85.})
+        self.curve.update(self.disc, ratios)
+        self.assertAlmostEqual(self.curve.parRatioTable(10)[10],
+                               walkParRatio(self.curve, 10), 12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.irswaps import USDLiborSwap
+from bgpy.QL.tests.common import SETTLE, numpy, flatCurve, setEvaluationDate
+
+if numpy is not None:
+    from bgpy.QL.swapbook import SwapBook
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class SwapBookTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.curve = flatCurve()
+        dates = [SETTLE + n for n in (0, 365, 3650, 10950)]
+        self.curve.curve.linkTo(ql.ZeroCurve(dates, [.01, .015, .035, .045],
+                                             ql.Actual365Fixed()))
+
+        # starts and ends on holidays and weekends included
+        rnd = numpy.random.RandomState(1)
+        n = 40
+        self.starts = [SETTLE + int(d) for d in rnd.randint(0, 800, n)]
+        self.ends = [s + int(d) for s, d in
+                     zip(self.starts, rnd.randint(200, 9000, n))]
+        self.rates = rnd.uniform(.01, .06, n).tolist()
+        self.spreads = rnd.uniform(-.01, .01, n).tolist()
+        self.payer = (rnd.rand(n) > .5).tolist()
+
+    def testMatchesUSDLiborSwap(self):
+        book = SwapBook(self.starts, self.ends, self.rates, self.spreads,
+                        1e6, self.payer)
+        npv = book.value(self.curve)['npv']
+        for i in range(len(book)):
+            swap = USDLiborSwap(self.curve, self.starts[i], self.ends[i],
+                                self.rates[i], int(self.payer[i]),
+                                self.spreads[i], 1e6)
+            self.assertAlmostEqual(npv[i], swap.value(), 6)
+
+    def testFairRate(self):
+        book = SwapBook(self.starts, self.ends, self.rates, self.spreads)
+        fair = SwapBook(self.starts, self.ends,
+                        book.value(self.curve)['fairRate'], self.spreads)
+        numpy.testing.assert_allclose(fair.value(self.curve)['npv'], 0.0,
+                                      rtol=0, atol=1e-10)
+
+    def testSeasonedSwapRejected(self):
+        book = SwapBook([SETTLE - 30, SETTLE], [SETTLE + 3650] * 2, .04)
+        self.assertRaises(ValueError, book.value, self.curve)
+        SwapBook([SETTLE], [SETTLE + 3650], .04).value(self.curve)
+
+if __name__ == '__main__':
+    unittest.main()
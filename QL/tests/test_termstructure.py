@@ -0,0 +1,76 @@
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+from bgpy.QL.termstructure import SpreadedCurve
+from bgpy.QL.tests.common import SETTLE, numpy, flatCurve
+from bgpy.QL.tests.test_assetswap import callableBond
+
+if numpy is not None:
+    from bgpy.QL.lattice import latticeCallValues
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class ShortRateLatticeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.curve = flatCurve()
+
+    def testShared(self):
+        lattice = self.curve.shortRateLattice(.15, 20.)
+        self.assertTrue(self.curve.shortRateLattice(.15, 5.) is lattice)
+        self.assertTrue(self.curve.shortRateLattice(.15, 19.5) is lattice)
+        self.assertEqual(lattice.horizon, 20.)
+        self.assertFalse(self.curve.shortRateLattice(.16, 20.) is lattice)
+        self.assertFalse(self.curve.shortRateLattice(.15, 20., 
+                                                     model=ql.HullWhite)
+                         is lattice)
+        longer = self.curve.shortRateLattice(.15, 25.)
+        self.assertFalse(longer is lattice)
+        self.assertTrue(self.curve.shortRateLattice(.15, 20.) is longer)
+
+    def testBondsShareLattice(self):
+        asws = [AssetSwap(callableBond(c)) for c in (.04, .05, .06)]
+        values = latticeCallValues(self.curve, asws, .15)
+        self.assertEqual(len(self.curve.lattices_), 1)
+        for asw, value in zip(asws, values):
+            asw.setLattice(native=True)
+            asw.aswValue(self.curve, 0.0, 1.0, .15)
+            self.assertEqual(asw.callvalue, value)
+        self.assertEqual(len(self.curve.lattices_), 1)
+
+    def testCurveChangeRebuilds(self):
+        lattice = self.curve.shortRateLattice(.15, 20.)
+        self.curve.curve.linkTo(ql.FlatForward(SETTLE, .05,
+                                               ql.Actual365Fixed()))
+        rebuilt = self.curve.shortRateLattice(.15, 20.)
+        self.assertFalse(rebuilt is lattice)
+        self.assertTrue(rebuilt.fits())
+
+    def testSpreadChange(self):
+        asw = AssetSwap(callableBond())
+        spreaded = SpreadedCurve(self.curve, .001)
+        latticeCallValues(spreaded, [asw], .15)
+        spreaded.setSpread(.003)
+        value = latticeCallValues(spreaded, [asw], .15)[0]
+        
+        fresh = SpreadedCurve(self.curve, .003)
+        self.assertEqual(value, latticeCallValues(fresh, [asw], .15)[0])
+
+    def testEviction(self):
+        self.curve.MAX_LATTICES = 2
+        lattice = self.curve.shortRateLattice(.15, 5.)
+        self.curve.shortRateLattice(.16, 5.)
+        self.assertTrue(self.curve.shortRateLattice(.15, 5.) is lattice)
+        self.curve.shortRateLattice(.17, 5.)
+        self.curve.shortRateLattice(.18, 5.)
+        self.assertEqual(len(self.curve.lattices_), 2)
+        self.assertFalse(self.curve.shortRateLattice(.15, 5.) is lattice)
+
+    def testClear(self):
+        lattice = self.curve.shortRateLattice(.15, 5.)
+        self.curve.clear_scenarios()
+        self.assertFalse(self.curve.shortRateLattice(.15, 5.) is lattice)
+
+if __name__ == '__main__':
+    unittest.main()
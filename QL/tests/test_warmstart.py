@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+from bgpy.QL.bonds import SimpleBond, Call
+from bgpy.QL.warmstart import WarmStart
+from bgpy.QL.tests.common import SETTLE, flatCurve
+
+def bonds_():
+    '''callable bonds out of maturity order, and one bullet'''
+    call = lambda y: Call(ql.Date(1, 6, y), 100.)
+    return [SimpleBond(.05, ql.Date(1, 6, 2030), call(2018), 
+                       settledate=SETTLE),
+            SimpleBond(.045, ql.Date(1, 6, 2022), call(2015), 
+                       settledate=SETTLE),
+            SimpleBond(.04, ql.Date(1, 6, 2026), settledate=SETTLE),
+            SimpleBond(.05, ql.Date(1, 6, 2028), call(2016), 
+                       settledate=SETTLE)]
+
+CUSIPS = ['A2030', 'B2022', 'C2026', 'D2028']
+
+class WarmStartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "warmstart.csv")
+        self.bonds = bonds_()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testCsvRoundTrip(self):
+        store = WarmStart(self.path)
+        store.put('A2030', .0012345678901234, "O", ql.BlackKarasinski)
+        store.put('A2030', 1.0625, "S", ql.HullWhite, kind="ratio")
+        store.put('B2022', .1534, "S", 'BlackKarasinski', kind="vol")
+        store.save()
+
+        loaded = WarmStart(self.path)
+        self.assertEqual(loaded.store_, store.store_)
+        self.assertEqual(loaded.get('A2030', "O"), .0012345678901234)
+        self.assertEqual(loaded.get('A2030', "S", 'HullWhite', "ratio"), 
+                         1.0625)
+        self.assertEqual(loaded.get('B2022', kind="vol"), .1534)
+        self.assertEqual(loaded.get('B2022'), None)
+
+    def solveRecorded(self, store, kind, fail=()):
+        '''solve_ with a stand-in solve recording (cusip, guess)'''
+        calls = []
+        def solve(asw, price, guess):
+            cusip = CUSIPS[[b.maturity for b in self.bonds].index(
+                                                              asw.maturity)]
+            calls.append((cusip, guess))
+            if cusip in fail:
+                raise ValueError("no solution")
+            return {kind: price}
+        results = store.solve_(self.bonds, CUSIPS, [1., 2., 3., 4.], kind,
+                               solve, "S", ql.BlackKarasinski)
+        return calls, results
+
+    def testGuesses(self):
+        store = WarmStart()
+        store.put('C2026', 30.)
+        calls, results = self.solveRecorded(store, "spread", fail=('D2028',))
+        # maturity order; stored value first, else the previous solution
+        self.assertEqual(calls, [('B2022', None), ('C2026', 30.), 
+                                 ('D2028', 3.), ('A2030', 3.)])
+        self.assertEqual([r and r['spread'] for r in results], 
+                         [1., 2., 3., None])
+        self.assertEqual(store.get('C2026'), 3.)
+        self.assertEqual(store.get('D2028'), None)
+
+    def testVolGuesses(self):
+        calls = self.solveRecorded(WarmStart(), "vol")[0]
+        # the bullet's vol does not seed its neighbour
+        self.assertEqual(calls, [('B2022', None), ('C2026', 2.), 
+                                 ('D2028', 2.), ('A2030', 4.)])
+
+    def testSolveSpreads(self):
+        curve = flatCurve()
+        prices = [101.5, 100.25, 99., 102.]
+        store = WarmStart(self.path)
+        cold = store.solveSpreads(self.bonds, CUSIPS, prices, curve, vol=.15,
+                                  spreadType="O", calc_risk=False)
+        store.save()
+        
+        warm = WarmStart(self.path).solveSpreads(self.bonds, CUSIPS, prices,
+                                                 curve, vol=.15, 
+                                                 spreadType="O",
+                                                 calc_risk=False)
+        for bond, price, c, w in zip(self.bonds, prices, cold, warm):
+            expected = AssetSwap(bond).solveSpread(curve, price, .15,
+                                                   spreadType="O",
+                                                   calc_risk=False)
+            self.assertAlmostEqual(c['spread'], expected['spread'], 8)
+            self.assertAlmostEqual(w['spread'], expected['spread'], 8)
+
+if __name__ == '__main__':
+    unittest.main()
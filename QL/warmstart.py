@@ -0,0 +1,139 @@
+'''
+Warm starts for AssetSwap spread, ratio and implied vol solves.
+
+Solutions are stored by (cusip, spreadType, model, kind), kind being
+'spread', 'ratio' or 'vol', and can be saved to / loaded from a csv file
+between runs.  A solve is seeded from the stored value for its cusip
+(e.g. yesterday's close); failing that, from the solution of the
+neighbouring bond in a maturity-sorted batch.
+
+Example:
+> store = WarmStart("oas_warmstart.csv")
+> values = store.solveSpreads(bonds, cusips, prices, curve, vol=.15,
+                              spreadType="O")
+> store.save()
+
+'''
+import csv
+import logging
+import os
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.assetswap import AssetSwap
+
+class WarmStart(object):
+    '''
+    Store of solved spreads, ratios and vols.
+    '''
+    def __init__(self, path=None):
+        self.path = path
+        self.store_ = {}
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def key_(self, cusip, spreadType, model, kind):
+        return (cusip, spreadType, getattr(model, "__name__", model), kind)
+
+    def get(self, cusip, spreadType="S", model=ql.BlackKarasinski,
+            kind="spread"):
+        return self.store_.get(self.key_(cusip, spreadType, model, kind),
+                               None)
+
+    def put(self, cusip, value, spreadType="S", model=ql.BlackKarasinski,
+            kind="spread"):
+        self.store_[self.key_(cusip, spreadType, model, kind)] = value
+
+    def load(self, path=None):
+        path = path if path else self.path
+        f = open(path, "rb")
+        try:
+            for cusip, spreadType, model, kind, value in csv.reader(f):
+                self.store_[(cusip, spreadType, model, kind)] = float(value)
+        finally:
+            f.close()
+        return self
+
+    def save(self, path=None):
+        path = path if path else self.path
+        f = open(path, "wb")
+        try:
+            writer = csv.writer(f)
+            for key in sorted(self.store_):
+                writer.writerow(list(key) + [repr(self.store_[key])])
+        finally:
+            f.close()
+        return self
+
+    def solve_(self, bonds, cusips, prices, kind, solve, spreadType, model):
+        '''
+        solve(asw, price, guess) for each bond in maturity order, seeded
+        from the store or the previous bond's solution.
+        '''
+        order = sorted(range(len(bonds)),
+                       key=lambda n: bonds[n].maturity.serialNumber())
+
+        results = [None] * len(bonds)
+        neighbour = None
+        for n in order:
+            guess = self.get(cusips[n], spreadType, model, kind)
+            if guess is None:
+                guess = neighbour
+
+            try:
+                values = solve(AssetSwap(bonds[n]), prices[n], guess)
+            except Exception as e:
+                logging.info("%s solve failed for %s: %s" % (kind, cusips[n],
+                                                             e))
+                continue
+
+            results[n] = values
+            self.put(cusips[n], values[kind], spreadType, model, kind)
+            
+            # a non-call bond's vol says nothing about its neighbour's
+            if kind != "vol" or bonds[n].calllist:
+                neighbour = values[kind]
+
+        return results
+
+    def solveSpreads(self, bonds, cusips, prices, termstructure, vol=1e-7,
+                     baseSpread=0.0, baseRatio=1.0, solveRatio=False,
+                     spreadType="S", model=ql.BlackKarasinski,
+                     calc_risk=True):
+        '''
+        AssetSwap.solveSpread for each bond, warm started; see
+        solveSpread for arguments.
+
+        returns list of BondValues in the order of bonds, None where the
+        solve failed
+        '''
+        kind = "ratio" if solveRatio else "spread"
+        solve = lambda asw, price, guess: asw.solveSpread(termstructure,
+                                                          price, vol,
+                                                          baseSpread,
+                                                          baseRatio,
+                                                          solveRatio,
+                                                          spreadType, model,
+                                                          calc_risk, guess)
+        return self.solve_(bonds, cusips, prices, kind, solve, spreadType,
+                           model)
+
+    def solveImpliedVols(self, bonds, cusips, prices, termstructure,
+                         spread=0.0, ratio=1.0, spreadType="S",
+                         model=ql.BlackKarasinski, calc_risk=True):
+        '''
+        AssetSwap.solveImpliedVol for each bond, warm started; see
+        solveImpliedVol for arguments.
+
+        returns list of BondValues in the order of bonds, None where the
+        solve failed
+        '''
+        solve = lambda asw, price, guess: asw.solveImpliedVol(termstructure,
+                                                              price, spread,
+                                                              ratio,
+                                                              spreadType,
+                                                              model,
+                                                              calc_risk,
+                                                              guess)
+        return self.solve_(bonds, cusips, prices, "vol", solve, spreadType,
+                           model)
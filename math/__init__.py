@@ -1,4 +1,5 @@
-__all__ = ['npinterp', 'interp', 'Secant', 'SolverExceptions']
+__all__ = ['npinterp', 'interp', 'hermite', 'monotoneSlopes',
+           'Secant', 'Hybrid', 'SolverExceptions', 'SolverStats']
 
-from interpolators import npinterp, interp
-from solvers import Secant, SolverExceptions
+from interpolators import npinterp, interp, hermite, monotoneSlopes
+from solvers import Secant, Hybrid, SolverExceptions, SolverStats
@@ -37,4 +37,34 @@ def interp(xyTuples, x, leftValue=None, rightValue=None):
     m = (float(x) - float(x0))/(float(x1) - float(x0))
         
     return m * y1 + (1.0 - m) * y0
-    
\ No newline at end of file
+    
+def hermite(x, x0, x1, f0, f1, d0, d1):
+    '''
+    Cubic Hermite interpolation on [x0, x1] given values f0, f1 and 
+    slopes d0, d1 at the end points.
+    '''
+    h = x1 - x0
+    t = (x - x0) / h
+    s = 1.0 - t
+    
+    return ((1.0 + 2.0*t)*s*s*f0 + t*s*s*h*d0 + 
+            t*t*(3.0 - 2.0*t)*f1 - t*t*s*h*d1)
+
+def monotoneSlopes(x0, x1, f0, f1, d0, d1):
+    '''
+    Fritsch-Carlson limiting: adjusts end point slopes d0, d1 so the 
+    Hermite cubic on [x0, x1] is monotone.
+    
+    returns (d0, d1)
+    '''
+    delta = (f1 - f0) / (x1 - x0)
+    if delta == 0.0:
+        return (0.0, 0.0)
+        
+    a, b = max(d0 / delta, 0.0), max(d1 / delta, 0.0)
+    r = a*a + b*b
+    if r > 9.0:
+        tau = 3.0 / r**0.5
+        a, b = tau * a, tau * b
+        
+    return (a * delta, b * delta)
@@ -9,6 +9,27 @@ class SolverExceptions(Exception):
     MIN_VALUE = 1e-12
 
 
+class SolverStats(object):
+    '''
+    Convergence statistics, filled in by Hybrid.
+
+    steps counts the kind of step taken: newton, secant or illinois.
+    '''
+    def __init__(self):
+        self.iterations = 0
+        self.evaluations = 0
+        self.derivatives = 0
+        self.converged = False
+        self.bracketed = False
+        self.residual = None
+        self.root = None
+        self.steps = {'newton': 0, 'secant': 0, 'illinois': 0}
+
+    def __repr__(self):
+        return "<SolverStats: %s evaluations, %s iterations, converged=%s>" % (
+                self.evaluations, self.iterations, self.converged)
+
+
 def Secant(x0, x1, valueFunc, objectiveValue):
         '''
         value function must be of one variable
@@ -37,4 +58,150 @@ def Secant(x0, x1, valueFunc, objectiveValue):
 
         assert (ictr < MAXITER+1), "Secant: Max iterations reached: %s" % x1*100.0
         return x1
-        
\ No newline at end of file
+
+def Hybrid(x0, x1, valueFunc, objectiveValue, derivFunc=None,
+           bracket=None, bracketValues=None,
+           xtol=SolverExceptions.MIN_VALUE, ftol=SolverExceptions.MIN_VALUE,
+           maxiter=SolverExceptions.MAX_ITERATIONS, stats=None):
+        '''
+        Safeguarded root finder: solves valueFunc(x) = objectiveValue.
+
+        Takes Newton steps if derivFunc (derivative of valueFunc) is given,
+        secant steps otherwise, starting from x0, x1.  Once the root is
+        bracketed, a step landing outside the bracket is replaced by an
+        Illinois (modified regula falsi) step, so the search cannot wander.
+
+        bracket=(a, b) gives a known bracket up front; bracketValues gives
+        valueFunc at a and b, if already computed, to save two evaluations.
+
+        xtol, ftol: stop when steps or the bracket are within xtol, or the
+        value is within ftol of objectiveValue.  Callers whose valueFunc is
+        only accurate to a few decimals (e.g. a lattice) should loosen them.
+
+        If maxiter is reached, returns the point with the smallest residual
+        inside the bracket (the last point, if never bracketed), as Secant
+        returns its last estimate; stats.converged is then False.
+        Raises SolverExceptions if bracket does not bracket the root or the
+        function is flat.
+
+        Pass stats=SolverStats() to collect convergence statistics.
+        '''
+        if stats is None:
+            stats = SolverStats()
+
+        def f(x):
+            stats.evaluations += 1
+            return valueFunc(x) - objectiveValue
+
+        # bracket end points: [xa, fa], [xb, fb] with fa, fb of opposite sign
+        ends = None
+        side = None
+
+        if bracket:
+            xa, xb = bracket
+            if bracketValues:
+                fa, fb = [v - objectiveValue for v in bracketValues]
+            else:
+                fa, fb = f(xa), f(xb)
+
+            if fa * fb > 0.0:
+                raise SolverExceptions("Hybrid: root not bracketed by %s, %s" %
+                                       (xa, xb))
+            ends = [[xa, fa], [xb, fb]]
+            stats.bracketed = True
+
+            if fa == 0.0 or fb == 0.0:
+                x, fx = (xa, fa) if fa == 0.0 else (xb, fb)
+                stats.converged = True
+                stats.residual, stats.root = fx, x
+                return x
+
+            # start inside the bracket
+            lo, hi = min(xa, xb), max(xa, xb)
+            if not (lo < x0 < hi):
+                x0 = xa if abs(fa) < abs(fb) else xb
+            if not (lo < x1 < hi) or abs(x1 - x0) <= xtol:
+                x1 = 0.5 * (xa + xb)
+
+        #make sure x0 & x1 are different
+        if abs(x1 - x0) <= xtol:
+            x1 = x0 + 0.001
+
+        # Newton starts from x0, secant from x0, x1
+        if derivFunc:
+            xp, fp = None, None
+            x, fx = x0, f(x0)
+        else:
+            xp, fp = x0, f(x0)
+            x, fx = x1, f(x1)
+
+        if not ends and fp is not None and fp * fx < 0.0:
+            ends = [[xp, fp], [x, fx]]
+            stats.bracketed = True
+
+        # smallest residual seen, inside the bracket once there is one
+        best = (x, fx)
+        if ends:
+            best = min([tuple(e) for e in ends] + [best], 
+                       key=lambda e: abs(e[1]))
+
+        for ictr in range(maxiter):
+            stats.iterations += 1
+
+            if abs(fx) <= ftol:
+                stats.converged = True
+                break
+
+            step, kind = None, None
+            if derivFunc:
+                stats.derivatives += 1
+                dx = derivFunc(x)
+                if dx:
+                    step, kind = -fx / dx, 'newton'
+            elif fx != fp:
+                step, kind = -fx * (x - xp) / (fx - fp), 'secant'
+
+            xn = x + step if step is not None else None
+
+            if ends:
+                (xa, fa), (xb, fb) = ends
+                if xn is None or not (min(xa, xb) < xn < max(xa, xb)):
+                    xn, kind = (xa * fb - xb * fa) / (fb - fa), 'illinois'
+            elif xn is None:
+                raise SolverExceptions("Hybrid: flat function at %s" % x)
+
+            stats.steps[kind] += 1
+            fn = f(xn)
+
+            # maintain the bracket
+            if ends:
+                if fn * ends[0][1] > 0.0:
+                    ends[0] = [xn, fn]
+                    if side == 0:
+                        ends[1][1] *= 0.5
+                    side = 0
+                else:
+                    ends[1] = [xn, fn]
+                    if side == 1:
+                        ends[0][1] *= 0.5
+                    side = 1
+            elif fn * fx < 0.0:
+                ends = [[x, fx], [xn, fn]]
+                stats.bracketed = True
+                best = (x, fx)
+
+            if abs(fn) < abs(best[1]):
+                best = (xn, fn)
+
+            done = abs(xn - x) <= xtol
+            xp, fp, x, fx = x, fx, xn, fn
+
+            if done or (ends and abs(ends[0][0] - ends[1][0]) <= xtol):
+                stats.converged = True
+                break
+        else:
+            if stats.bracketed:
+                x, fx = best
+
+        stats.residual, stats.root = fx, x
+        return x
@@ -0,0 +1,70 @@
+import unittest
+
+from bgpy.math.solvers import Secant, Hybrid, SolverExceptions, SolverStats
+
+cubic = lambda x: x**3 - 2.*x - 5.
+ROOT = 2.0945514815423265
+
+class HybridTest(unittest.TestCase):
+
+    def testSecantSteps(self):
+        stats = SolverStats()
+        x = Hybrid(2., 2.5, cubic, 0.0, stats=stats)
+        self.assertAlmostEqual(x, ROOT, 12)
+        self.assertTrue(stats.converged)
+        self.assertEqual(stats.derivatives, 0)
+
+    def testNewtonSteps(self):
+        stats = SolverStats()
+        x = Hybrid(2., 2.5, cubic, 0.0, lambda x: 3.*x*x - 2., stats=stats)
+        self.assertAlmostEqual(x, ROOT, 12)
+        self.assertTrue(stats.steps['newton'] > 0)
+
+    def testMatchesSecant(self):
+        price = lambda y: 100. * (1. + .05) / (1. + y)
+        self.assertAlmostEqual(Hybrid(.05, .06, price, 98.),
+                               Secant(.05, .06, price, 98.), 12)
+
+    def testBracketedRoot(self):
+        # secant from 0, 1 runs off to a local minimum; the bracket holds it
+        stats = SolverStats()
+        x = Hybrid(0., 1., cubic, 0.0, bracket=(0., 3.), stats=stats)
+        self.assertAlmostEqual(x, ROOT, 12)
+        self.assertTrue(stats.bracketed)
+        self.assertTrue(stats.steps['illinois'] > 0)
+
+    def testBracketValues(self):
+        stats = SolverStats()
+        x = Hybrid(1., 2., cubic, 0.0, bracket=(1., 3.), 
+                   bracketValues=(cubic(1.), cubic(3.)), stats=stats)
+        self.assertAlmostEqual(x, ROOT, 12)
+
+    def testNotBracketed(self):
+        self.assertRaises(SolverExceptions, Hybrid, 0., 1., cubic, 0.0,
+                          bracket=(3., 4.))
+
+    def testUnbracketableRoot(self):
+        # no root: returns the last point, not converged, as Secant would
+        stats = SolverStats()
+        x = Hybrid(1., 2., lambda x: x*x + 1., 0.0, stats=stats)
+        self.assertFalse(stats.converged)
+        self.assertFalse(stats.bracketed)
+        self.assertEqual(stats.root, x)
+        self.assertEqual(stats.iterations, SolverExceptions.MAX_ITERATIONS)
+
+    def testMaxIterationsReturnsBestBracketed(self):
+        stats = SolverStats()
+        x = Hybrid(0., 1., cubic, 0.0, bracket=(0., 3.), maxiter=3,
+                   stats=stats)
+        self.assertFalse(stats.converged)
+        self.assertTrue(0. < x < 3.)
+        self.assertEqual(abs(stats.residual), abs(cubic(x)))
+
+    def testXtol(self):
+        stats = SolverStats()
+        x = Hybrid(2., 2.5, cubic, 0.0, xtol=1e-4, ftol=0.0, stats=stats)
+        self.assertAlmostEqual(x, ROOT, 6)
+        self.assertTrue(stats.converged)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,21 @@ Class for simple scales (such as MMD)
 
 """
 
+from bisect import bisect_left
+
 import bgpy.QL as ql
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    # batched yields for the Treasury curve
+    from bgpy.QL.bondtable import BondTable
+else:
+    BondTable = None
+
 def couponSoftDiscount(bondyield, tenor, mincoupon=.05, step=.0025):
     '''Returns new issue coupon level
     
@@ -154,7 +167,7 @@ class Scale(object):
         self.bondyields.clear()
     
 class GovtCurve(object):
-    bondheader = ('term', 'price', 'yield', 'bond')
+    bondheader = ('term', 'price', 'yield', 'bond', 'coupon', 'maturity')
     
     def __init__(self, curveobject=None, curvedate=None, settledays=2,
                  daycount=ql.ActualActual(),
@@ -170,6 +183,10 @@ class GovtCurve(object):
             self.update(curveobject, curvedate)
         
     def update(self, curveobject, curvedate):
+        '''
+        Bills are yielded individually (closed form); notes and bonds are 
+        yielded from coupon and maturity in one batch (issueYields).
+        '''
         #TODO:  add logic for handling TBills (identify by cusip)
         #       discount price input.
         self.curvedate = curvedate
@@ -178,7 +195,7 @@ class GovtCurve(object):
                                             ql.Days)
 
         term = self.daycount.yearFraction        
-        self.bonds = []
+        issues, notes = [], []
         self.curvedata_ = {}
         for tckr, c, mtystr in curveobject:
             quote = curveobject[(tckr, c, mtystr)]
@@ -188,30 +205,63 @@ class GovtCurve(object):
                 cpn = 0.0
                 b = ql.USTBill(mty, settledate=self.settle)
                 prc = b.discountToPrice(quote)
+                yld = b.toYield(prc)
             else:
                 cpn = c/100.0
                 b = ql.USTBond(cpn, mty, settledate=self.settle)
+                yld = None
                 prc = quote
+                notes.append(len(issues))
             
-            yld = b.toYield(prc)
-            bondterm = term(self.settle, mty)
-            
-            info = (bondterm, prc, yld, b)
-            self.bonds.append(dict(zip(self.bondheader, info)))
+            issues.append([term(self.settle, mty), prc, yld, b, cpn, mty])
             self.curvedata_[mty] = (cpn, prc)
         
+        ylds = self.issueYields([issues[n][4] for n in notes],
+                                [issues[n][5] for n in notes],
+                                [issues[n][1] for n in notes],
+                                [issues[n][3] for n in notes])
+        for n, yld in zip(notes, ylds):
+            issues[n][2] = yld
+        
+        # sorted by term, with term index for tenor lookups
+        self.bonds = [dict(zip(self.bondheader, issue)) for issue in issues]
+        self.bonds.sort(key=lambda x: x['term'])
+        self.terms_ = [x['term'] for x in self.bonds]
+        
         self.setTermstructure()
         
         return True
+    
+    def issueYields(self, coupons, maturities, prices, bonds=None):
+        '''
+        Yields of notes and bonds settling on self.settle: one BondTable 
+        calc if numpy is available, otherwise one USTBond per issue (bonds,
+        if given, or built here).
+        '''
+        if not prices:
+            return []
+        
+        if BondTable is not None:
+            table = BondTable(size=len(prices))
+            rows = table.addBullets(coupons, maturities, self.settle, 
+                                    ql.USTBond)
+            return table.calc(bondprice=prices, rows=rows)['bondyield'].tolist()
+        
+        if bonds is None:
+            bonds = [ql.USTBond(cpn, mty, settledate=self.settle)
+                     for cpn, mty in zip(coupons, maturities)]
+        return [b.toYield(prc) for b, prc in zip(bonds, prices)]
         
     def tenor(self, tnr):
-    
+        '''
+        Issue with the longest term shorter than tenor.
+        '''
         term = ql.Tenor(tnr).term
-        self.bonds.sort(key=lambda x: x['term'])
         
-        N = max([n for n in range(len(self.bonds)) 
-                   if self.bonds[n]['term'] < term])
-         
+        N = bisect_left(self.terms_, term) - 1
+        if N < 0:
+            raise ValueError("GovtCurve.tenor(): no issue shorter than %s" % tnr)
+        
         return self.bonds[N]
     
     @property
@@ -0,0 +1,67 @@
+import random
+import unittest
+
+import bgpy.__QuantLib as ql
+
+from bgpy.QL.tenor import Tenor
+from bgpy.QL.ustbonds import USTBond, USTBill
+from bgpy.QL.tests.common import EVALDATE, setEvaluationDate
+from bgpy.structures.scales import GovtCurve
+
+class IssuesOnly(GovtCurve):
+    '''GovtCurve without the curve bootstrap'''
+    def setTermstructure(self):
+        pass
+
+def treasuries(count=60, seed=1):
+    '''{(cusip, coupon, maturity): quote}, bills quoted at discount'''
+    rnd = random.Random(seed)
+    issues = {}
+    for n in range(6):
+        mty = EVALDATE + 30 * (n + 1)
+        issues[('91279%d' % n, 0.0, '%d/%d/%d' % 
+                (mty.month(), mty.dayOfMonth(), mty.year()))] = \
+            rnd.uniform(.1, .3)
+    for n in range(count):
+        mtystr = '%d/15/%d' % (rnd.choice([2, 5, 8, 11]), 
+                               rnd.randint(2011, 2040))
+        issues[('912828%03d' % n, rnd.choice([1.0, 2.5, 4.0, 5.25]), 
+                mtystr)] = 100. + rnd.uniform(-5., 15.)
+    return issues
+
+class GovtCurveTest(unittest.TestCase):
+
+    def setUp(self):
+        setEvaluationDate()
+        self.issues = treasuries()
+        self.curve = IssuesOnly(self.issues, EVALDATE)
+
+    def testYields(self):
+        self.assertEqual(len(self.curve.bonds), len(self.issues))
+        for issue in self.curve.bonds:
+            bond = issue['bond']
+            if issue['coupon']:
+                self.assertTrue(isinstance(bond, USTBond))
+                self.assertEqual(bond.maturity, issue['maturity'])
+            else:
+                self.assertTrue(isinstance(bond, USTBill))
+            self.assertAlmostEqual(issue['yield'], 
+                                   bond.toYield(issue['price']), 10)
+
+    def testTenor(self):
+        for tnr in ('2Y', '5Y', '10Y', '30Y'):
+            term = Tenor(tnr).term
+            shorter = [x for x in self.curve.bonds if x['term'] < term]
+            issue = self.curve.tenor(tnr)
+            self.assertEqual(issue['term'], max(x['term'] for x in shorter))
+            self.assertTrue(isinstance(issue['bond'], USTBond))
+            self.assertEqual(issue['bond'].maturity, issue['maturity'])
+            self.assertAlmostEqual(issue['bond'].toYield(issue['price']),
+                                   issue['yield'], 10)
+        self.assertRaises(ValueError, self.curve.tenor, '1W')
+
+    def testIssueYieldsEmpty(self):
+        self.assertEqual(self.curve.issueYields([], [], []), [])
+
+if __name__ == '__main__':
+    unittest.main()